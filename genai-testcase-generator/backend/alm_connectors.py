@@ -0,0 +1,413 @@
+# backend/alm_connectors.py
+"""
+Fetch the work items referenced on the "ALM Inputs" tab (Jira tickets, Polarion and
+Azure DevOps work items) so generation sees their title, description and acceptance
+criteria instead of bare URLs and ids.
+
+- one keep-alive requests.Session per process, its connection pool sized ALM_POOL_SIZE
+  and retrying 429/5xx with backoff
+- references are grouped per server and fetched with the bulk query each API offers
+  (Jira JQL search, Azure DevOps work items batch, Polarion work item query), following
+  pagination, ALM_BATCH_SIZE ids per query and ALM_FETCH_WORKERS queries at a time
+- responses carrying an ETag or Last-Modified are kept under ALM_CACHE_DIR and sent back
+  as If-None-Match / If-Modified-Since; a 304 reuses the stored body
+
+A connector only runs when its server is configured (JIRA_BASE_URL, POLARION_BASE_URL,
+ADO_ORG_URL). References it cannot fetch (no connector, another server, not found, request
+failed) stay in the ALM inputs and reach the prompt as before.
+
+    items, unresolved, info = get_alm_fetcher().fetch({"Jira": {"tickets": ["https://acme.atlassian.net/browse/HC-12"]}})
+"""
+import os
+import re
+import json
+import html
+import time
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs
+from utils import ensure_folder, atomic_write
+
+LOG = logging.getLogger("alm_connectors")
+LOG.setLevel(logging.INFO)
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ALM_FETCH_ENABLED = os.environ.get("ALM_FETCH_ENABLED", "1").lower() not in ("0", "false", "no")
+ALM_FETCH_WORKERS = int(os.environ.get("ALM_FETCH_WORKERS", "8"))
+ALM_POOL_SIZE = int(os.environ.get("ALM_POOL_SIZE", "16"))
+ALM_BATCH_SIZE = int(os.environ.get("ALM_BATCH_SIZE", "100"))
+ALM_PAGE_SIZE = int(os.environ.get("ALM_PAGE_SIZE", "50"))
+ALM_TIMEOUT_SECONDS = float(os.environ.get("ALM_TIMEOUT_SECONDS", "15"))
+ALM_MAX_RETRIES = int(os.environ.get("ALM_MAX_RETRIES", "3"))
+ALM_CACHE_DIR = os.environ.get("ALM_CACHE_DIR", os.path.join(BASE, "alm_cache"))
+ALM_ITEM_MAX_CHARS = int(os.environ.get("ALM_ITEM_MAX_CHARS", "4000"))
+RETRYABLE_CODES = (429, 500, 502, 503, 504)
+ADO_MAX_IDS = 200  # work items batch limit of the Azure DevOps API
+
+JIRA_KEY_RE = re.compile(r"\b([A-Z][A-Z0-9_]+-\d+)\b")
+ADO_URL_RE = re.compile(r"/_workitems/edit/(\d+)")
+POLARION_PROJECT_RE = re.compile(r"/project/([^/?#]+)")
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def html_to_text(value):
+    """Plain text of an HTML (or Atlassian document) field."""
+    if isinstance(value, dict):
+        if "value" in value:  # Polarion rich text
+            value = value["value"]
+        else:  # Atlassian document format: collect the text nodes
+            return " ".join(t for t in (n.get("text", "") for n in _adf_nodes(value)) if t).strip()
+    text = TAG_RE.sub(" ", str(value or ""))
+    return re.sub(r"[ \t]+", " ", html.unescape(text)).strip()
+
+
+def _adf_nodes(node):
+    yield node
+    for child in node.get("content", []) or []:
+        if isinstance(child, dict):
+            yield from _adf_nodes(child)
+
+
+def same_server(parsed, base_url):
+    """True for a bare id/key, or a URL on the host of base_url."""
+    return not parsed.scheme or parsed.netloc.lower() == urlparse(base_url).netloc.lower()
+
+
+def item_text(item):
+    """Prompt text of one fetched work item, cut to ALM_ITEM_MAX_CHARS."""
+    parts = [item.get("title", ""), item.get("text", "")]
+    if item.get("acceptance"):
+        parts.append("Acceptance criteria: " + item["acceptance"])
+    return "\n".join(p for p in parts if p)[:ALM_ITEM_MAX_CHARS]
+
+
+class ConditionalCache:
+    """Validators and body of cacheable GET responses, one JSON file per request."""
+
+    def __init__(self, cache_dir=ALM_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, etag, last_modified, body):
+        path = self._path(key)
+        ensure_folder(os.path.dirname(path))
+        entry = {"etag": etag, "last_modified": last_modified, "stored": time.time(), "body": body}
+
+        def write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+        atomic_write(path, write)
+
+
+class AlmHttp:
+    """Pooled keep-alive GETs with retries and ETag / If-Modified-Since revalidation."""
+
+    def __init__(self, pool_size=ALM_POOL_SIZE, timeout=ALM_TIMEOUT_SECONDS, retries=ALM_MAX_RETRIES, cache_dir=ALM_CACHE_DIR):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=RETRYABLE_CODES,
+                      allowed_methods=("GET",), respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = timeout
+        self.cache = ConditionalCache(cache_dir) if cache_dir else None
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "not_modified": 0, "errors": 0}
+
+    def _count(self, name, tally=None):
+        with self._lock:
+            self.counters[name] += 1
+            if tally is not None and name in tally:
+                tally[name] += 1
+
+    def get_json(self, url, params=None, headers=None, auth=None, tally=None):
+        headers = dict(headers or {}, Accept="application/json")
+        # the credentials decide what a server returns, so they are part of the cache key
+        identity = json.dumps([url, sorted((params or {}).items()), headers.get("Authorization"), auth], default=str)
+        key = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        cached = self.cache.get(key) if self.cache else None
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+        self._count("requests", tally)
+        try:
+            resp = self.session.get(url, params=params, headers=headers, auth=auth, timeout=self.timeout)
+            if resp.status_code == 304 and cached:
+                self._count("not_modified", tally)
+                return cached["body"]
+            resp.raise_for_status()
+            body = resp.json()
+        except Exception:
+            self._count("errors")
+            raise
+        etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+        if self.cache and (etag or last_modified):
+            self.cache.put(key, etag, last_modified, body)
+        return body
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+
+class JiraConnector:
+    """Jira Cloud / Server: issues by key through the JQL search API."""
+    name = "Jira"
+
+    def __init__(self, base_url=None, email=None, token=None, bearer=None):
+        self.base_url = (base_url or "").rstrip("/")
+        self.auth = (email, token) if email and token else None
+        self.headers = {"Authorization": f"Bearer {bearer}"} if bearer else {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get("JIRA_BASE_URL"), os.environ.get("JIRA_EMAIL"), os.environ.get("JIRA_API_TOKEN"),
+                   os.environ.get("JIRA_BEARER_TOKEN"))
+
+    def parse(self, ref):
+        """(server, issue key) of a ticket URL or key on the configured server, or None."""
+        parsed = urlparse(ref)
+        if not self.base_url or not same_server(parsed, self.base_url):
+            return None
+        keys = parse_qs(parsed.query).get("selectedIssue") or JIRA_KEY_RE.findall(parsed.path or ref)
+        return (self.base_url, keys[-1]) if keys else None
+
+    def fetch_batch(self, http, base, keys):
+        items, start = {}, 0
+        while True:
+            body = http.get_json(f"{base}/rest/api/2/search", params={
+                "jql": f"key in ({','.join(sorted(keys))})", "fields": "summary,description",
+                # strict validation fails the whole batch with 400 over one stale or mistyped key
+                "validateQuery": "warn", "startAt": start, "maxResults": ALM_PAGE_SIZE},
+                headers=self.headers, auth=self.auth)
+            issues = body.get("issues", [])
+            for issue in issues:
+                fields = issue.get("fields") or {}
+                items[issue["key"]] = {"alm": self.name, "id": issue["key"], "url": f"{base}/browse/{issue['key']}",
+                                       "title": fields.get("summary") or "", "text": html_to_text(fields.get("description"))}
+            start += len(issues)
+            if not issues or start >= body.get("total", 0):
+                return items
+
+
+class AzureDevOpsConnector:
+    """Azure DevOps Boards: work items by id through the work items batch API."""
+    name = "Azure DevOps"
+    fields = "System.Title,System.Description,Microsoft.VSTS.Common.AcceptanceCriteria"
+
+    def __init__(self, org_url=None, project=None, pat=None):
+        self.org_url = (org_url or "").rstrip("/")
+        self.project = project or ""
+        self.auth = ("", pat) if pat else None
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get("ADO_ORG_URL"), os.environ.get("ADO_PROJECT"), os.environ.get("ADO_PAT"))
+
+    def parse(self, ref):
+        """(project API root, work item id) of a work item URL or id on the configured organization, or None."""
+        parsed = urlparse(ref)
+        if not self.org_url or not same_server(parsed, self.org_url):
+            return None
+        m = ADO_URL_RE.search(parsed.path)
+        if m:
+            # https://dev.azure.com/{org}/{project}/_workitems/edit/{id}
+            project = parsed.path[:m.start()].rstrip("/").rpartition("/")[2]
+            return (f"{self.org_url}/{project or self.project}", m.group(1))
+        if ref.isdigit() and self.project:
+            return (f"{self.org_url}/{self.project}", ref)
+        return None
+
+    def fetch_batch(self, http, base, ids):
+        body = http.get_json(f"{base}/_apis/wit/workitems", params={
+            "ids": ",".join(sorted(ids, key=int)), "fields": self.fields, "errorPolicy": "omit", "api-version": "7.0"},
+            auth=self.auth)
+        items = {}
+        for wi in body.get("value") or []:
+            if not wi:  # errorPolicy=omit returns null for missing ids
+                continue
+            fields = wi.get("fields") or {}
+            wid = str(wi["id"])
+            items[wid] = {"alm": self.name, "id": wid, "url": f"{base}/_workitems/edit/{wid}",
+                          "title": fields.get("System.Title") or "", "text": html_to_text(fields.get("System.Description")),
+                          "acceptance": html_to_text(fields.get("Microsoft.VSTS.Common.AcceptanceCriteria"))}
+        return items
+
+
+class PolarionConnector:
+    """Polarion ALM: work items by id through the REST API query, page by page."""
+    name = "Polarion"
+
+    def __init__(self, base_url=None, project=None, token=None):
+        self.base_url = (base_url or "").rstrip("/")
+        self.project = project or ""
+        self.headers = {"Authorization": f"Bearer {token}"} if token else {}
+
+    @classmethod
+    def from_env(cls):
+        return cls(os.environ.get("POLARION_BASE_URL"), os.environ.get("POLARION_PROJECT"), os.environ.get("POLARION_TOKEN"))
+
+    def parse(self, ref):
+        """(project API root, work item id) of a work item URL or id on the configured server, or None."""
+        parsed = urlparse(ref)
+        if not self.base_url or not same_server(parsed, self.base_url):
+            return None
+        if parsed.scheme:
+            # https://host/polarion/#/project/{project}/workitem?id={id}
+            wid = (parse_qs(parsed.query).get("id") or parse_qs(parsed.fragment.partition("?")[2]).get("id") or [None])[0]
+            m = POLARION_PROJECT_RE.search(ref)
+            project = m.group(1) if m else self.project
+        else:
+            wid, project = ref, self.project
+        return (f"{self.base_url}/polarion/rest/v1/projects/{project}", wid) if wid and project else None
+
+    def fetch_batch(self, http, base, ids):
+        items, page = {}, 1
+        while True:
+            body = http.get_json(f"{base}/workitems", params={
+                "query": f"id:({' '.join(sorted(ids))})", "fields[workitems]": "title,description",
+                "page[size]": ALM_PAGE_SIZE, "page[number]": page}, headers=self.headers)
+            for wi in body.get("data", []):
+                wid = wi["id"].rsplit("/", 1)[-1]  # "{project}/{id}"
+                attrs = wi.get("attributes") or {}
+                items[wid] = {"alm": self.name, "id": wid, "url": (wi.get("links") or {}).get("portal", ""),
+                              "title": attrs.get("title") or "", "text": html_to_text(attrs.get("description"))}
+            if not body.get("data") or not (body.get("links") or {}).get("next"):
+                return items
+            page += 1
+
+
+CONNECTOR_TYPES = {"jira": JiraConnector, "polarion": PolarionConnector, "azure devops": AzureDevOpsConnector,
+                   "ado": AzureDevOpsConnector, "azure": AzureDevOpsConnector}
+
+
+def alm_references(alm_inputs):
+    """[(ALM name, field, reference)] of every non-empty entry of an ALM inputs dict ({"Jira": {"tickets": [...]}})."""
+    refs = []
+    for alm, data in (alm_inputs or {}).items():
+        fields = data.items() if isinstance(data, dict) else [(None, data)]
+        for field, value in fields:
+            for ref in (value if isinstance(value, list) else [value]):
+                if isinstance(ref, (str, int)) and str(ref).strip():
+                    refs.append((alm, field, str(ref).strip()))
+    return refs
+
+
+class _RunHttp:
+    """The shared AlmHttp, also counting the requests of one fetch."""
+
+    def __init__(self, http):
+        self.http = http
+        self.tally = {"requests": 0, "not_modified": 0}
+
+    def get_json(self, url, params=None, headers=None, auth=None):
+        return self.http.get_json(url, params, headers, auth, tally=self.tally)
+
+
+class AlmFetcher:
+    def __init__(self, connectors=None, http=None, workers=ALM_FETCH_WORKERS, batch_size=ALM_BATCH_SIZE):
+        self.connectors = connectors if connectors is not None else [
+            JiraConnector.from_env(), PolarionConnector.from_env(), AzureDevOpsConnector.from_env()]
+        self._http = http
+        self._lock = threading.Lock()
+        self.workers = workers
+        self.batch_size = batch_size
+
+    @property
+    def http(self):
+        if self._http is None:
+            with self._lock:
+                if self._http is None:
+                    self._http = AlmHttp()
+        return self._http
+
+    def _connector(self, alm):
+        kind = CONNECTOR_TYPES.get(str(alm).strip().lower())
+        return next((c for c in self.connectors if kind is not None and isinstance(c, kind)), None)
+
+    def _batch_size(self, connector):
+        return min(self.batch_size, ADO_MAX_IDS) if isinstance(connector, AzureDevOpsConnector) else self.batch_size
+
+    def fetch(self, alm_inputs):
+        """
+        (items, unresolved, info): the fetched work items ({alm, id, url, title, text[, acceptance]})
+        in reference order, the ALM inputs left without a fetched item (same shape, {} when
+        everything was fetched), and {requested, fetched, failed, unsupported, http_requests,
+        not_modified, errors}.
+        """
+        refs = alm_references(alm_inputs)
+        targets, batches = [], {}
+        for alm, _, ref in refs:
+            connector = self._connector(alm)
+            target = connector.parse(ref) if connector else None
+            targets.append((connector, *target) if target else None)
+            if target:
+                batches.setdefault((connector, target[0]), set()).add(target[1])
+
+        jobs = []
+        for (connector, base), ids in batches.items():
+            ids, size = sorted(ids), self._batch_size(connector)
+            jobs.extend((connector, base, ids[i:i + size]) for i in range(0, len(ids), size))
+        run = _RunHttp(self.http) if jobs else None
+        fetched, errors = {}, []
+        if jobs:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(jobs))), thread_name_prefix="alm-fetch") as pool:
+                futures = {pool.submit(c.fetch_batch, run, base, ids): (c, base, ids) for c, base, ids in jobs}
+                for fut in as_completed(futures):
+                    c, base, ids = futures[fut]
+                    try:
+                        fetched.update(((c, base, wid), item) for wid, item in fut.result().items())
+                    except Exception as e:
+                        LOG.warning("%s fetch of %d items from %s failed: %s", c.name, len(ids), base, e)
+                        errors.append(f"{c.name} {base}: {e}")
+
+        items, unresolved, seen = [], {}, set()
+        for (alm, field, ref), target in zip(refs, targets):
+            item = fetched.get(target) if target else None
+            if item is None:
+                if field is None:
+                    unresolved.setdefault(alm, []).append(ref)
+                else:
+                    unresolved.setdefault(alm, {}).setdefault(field, []).append(ref)
+            elif target not in seen:  # the same item referenced twice is sent once
+                seen.add(target)
+                items.append(item)
+        missing = sum(1 for t in targets if t and t not in fetched)
+        info = {"requested": len(refs), "fetched": len(items), "failed": missing,
+                "unsupported": sum(1 for t in targets if t is None),
+                "http_requests": run.tally["requests"] if run else 0,
+                "not_modified": run.tally["not_modified"] if run else 0, "errors": errors[:5]}
+        if missing or errors:
+            LOG.warning("ALM fetch: %d of %d references not fetched", missing, len(refs))
+        return items, unresolved, info
+
+    def stats(self):
+        return self._http.stats() if self._http is not None else {}
+
+
+_FETCHER = None
+_FETCHER_LOCK = threading.Lock()
+
+def get_alm_fetcher():
+    global _FETCHER
+    if _FETCHER is None:
+        with _FETCHER_LOCK:
+            if _FETCHER is None:
+                _FETCHER = AlmFetcher()
+    return _FETCHER
@@ -0,0 +1,125 @@
+# backend/ann_index.py
+"""
+FAISS index types for the RAG vector index, chosen by corpus size.
+
+    flat   exact search (IndexFlatL2); default below RAG_IVF_MIN_VECTORS
+    ivf    inverted lists over full vectors ("IVF<nlist>,Flat"); default up to RAG_PQ_MIN_VECTORS
+    ivfpq  inverted lists over product-quantized codes ("IVF<nlist>,PQ<m>x<bits>"); default above that
+    hnsw   graph index ("HNSW<M>"); never picked automatically, set RAG_INDEX_TYPE=hnsw
+
+Indexes are written once and opened memory-mapped and read-only, so every worker
+process on the host shares the page-cache copy instead of holding its own (faiss-cpu >= 1.11;
+see read_index for older builds). Search-time
+recall/latency knobs (RAG_IVF_NPROBE, RAG_HNSW_EF_SEARCH) are applied on load and can be
+changed without rebuilding.
+"""
+import os
+import math
+import logging
+import numpy as np
+
+LOG = logging.getLogger("ann_index")
+LOG.setLevel(logging.INFO)
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+RAG_INDEX_TYPE = os.environ.get("RAG_INDEX_TYPE", "auto").lower()
+RAG_IVF_MIN_VECTORS = int(os.environ.get("RAG_IVF_MIN_VECTORS", "20000"))
+RAG_PQ_MIN_VECTORS = int(os.environ.get("RAG_PQ_MIN_VECTORS", "1000000"))
+RAG_IVF_NLIST = int(os.environ.get("RAG_IVF_NLIST", "0"))          # 0 = about 4 * sqrt(n)
+RAG_IVF_NPROBE = int(os.environ.get("RAG_IVF_NPROBE", "16"))
+RAG_PQ_M = int(os.environ.get("RAG_PQ_M", "0"))                    # 0 = about dim / 4 sub-quantizers
+RAG_PQ_NBITS = int(os.environ.get("RAG_PQ_NBITS", "8"))             # bits per sub-quantizer code
+RAG_HNSW_M = int(os.environ.get("RAG_HNSW_M", "32"))
+RAG_HNSW_EF_CONSTRUCTION = int(os.environ.get("RAG_HNSW_EF_CONSTRUCTION", "80"))
+RAG_HNSW_EF_SEARCH = int(os.environ.get("RAG_HNSW_EF_SEARCH", "64"))
+RAG_TRAIN_SAMPLE = int(os.environ.get("RAG_TRAIN_SAMPLE", "100000"))
+RAG_INDEX_MMAP = os.environ.get("RAG_INDEX_MMAP", "1").lower() not in ("0", "false", "no")
+
+MIN_POINTS_PER_LIST = 39  # FAISS warns below this many training points per centroid
+
+
+def choose_index_type(n, requested=RAG_INDEX_TYPE):
+    """Index type for n vectors: the requested one, or by size for "auto" (flat when too small to train)."""
+    kind = requested if requested in INDEX_TYPES else "auto"
+    if kind == "auto":
+        kind = "flat" if n < RAG_IVF_MIN_VECTORS else ("ivf" if n < RAG_PQ_MIN_VECTORS else "ivfpq")
+    if kind in ("ivf", "ivfpq") and n < MIN_POINTS_PER_LIST * 16:
+        kind = "flat"
+    return kind
+
+
+def ivf_nlist(n, nlist=RAG_IVF_NLIST):
+    if nlist <= 0:
+        nlist = int(4 * math.sqrt(n))
+    return max(1, min(nlist, n // MIN_POINTS_PER_LIST))
+
+
+def pq_m(dim, m=RAG_PQ_M):
+    """Sub-quantizer count dividing dim (FAISS requirement), closest to dim / 4 when unset."""
+    target = m if m > 0 else max(1, dim // 4)
+    divisors = [d for d in range(1, dim + 1) if dim % d == 0]
+    return min(divisors, key=lambda d: (abs(d - target), -d))
+
+
+def factory_string(kind, n, dim):
+    if kind == "ivf":
+        return f"IVF{ivf_nlist(n)},Flat"
+    if kind == "ivfpq":
+        return f"IVF{ivf_nlist(n)},PQ{pq_m(dim)}x{RAG_PQ_NBITS}"
+    if kind == "hnsw":
+        return f"HNSW{RAG_HNSW_M}"
+    return "Flat"
+
+
+def build_index(vecs, kind):
+    """A trained, populated L2 index of `kind` over vecs (float32, n x dim)."""
+    import faiss
+    vecs = np.ascontiguousarray(vecs, dtype="float32")
+    n, dim = vecs.shape
+    index = faiss.index_factory(dim, factory_string(kind, n, dim), faiss.METRIC_L2)
+    if kind == "hnsw":
+        index.hnsw.efConstruction = RAG_HNSW_EF_CONSTRUCTION
+    if not index.is_trained:
+        sample = vecs
+        if n > RAG_TRAIN_SAMPLE:
+            rows = np.random.default_rng(0).choice(n, RAG_TRAIN_SAMPLE, replace=False)
+            sample = vecs[np.sort(rows)]
+        index.train(sample)
+    index.add(vecs)
+    return tune_index(index)
+
+
+def tune_index(index, nprobe=RAG_IVF_NPROBE, ef_search=RAG_HNSW_EF_SEARCH):
+    """Apply the search-time recall/latency parameters that match the index type."""
+    import faiss
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+    return index
+
+
+def read_index(path, mmap=RAG_INDEX_MMAP):
+    """
+    Open a saved index, memory-mapped read-only. IO_FLAG_MMAP_IFC (faiss >= 1.11) maps the
+    vector/code storage of every index type; HNSW still reads its neighbor graph privately.
+    Older builds only map IVF inverted lists, so flat and HNSW indexes are read into each
+    worker there (logged).
+    """
+    import faiss
+    flags = 0
+    if mmap:
+        flags = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        if not flags:
+            flags = getattr(faiss, "IO_FLAG_MMAP", 0)
+            LOG.warning("faiss %s cannot memory-map flat storage; only IVF inverted lists are shared "
+                        "across workers (faiss-cpu >= 1.11 maps every index type)", getattr(faiss, "__version__", "?"))
+        flags |= getattr(faiss, "IO_FLAG_READ_ONLY", 0)
+    return tune_index(faiss.read_index(path, flags))
+
+
+def write_index(index, path):
+    import faiss
+    faiss.write_index(index, path)
@@ -1,10 +1,24 @@
 import os
 import json
+import re
 import logging
 import uuid
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
-from generator import GeneratorService
+from generator import GeneratorService, PIPELINE_STAGES, report_progress, prepare_local_files
+from job_queue import JobQueue, QueueFullError, JOB_TTL_SECONDS
+from llm_cache import LLM_CACHE
+from vertex_ai_client import CLIENTS
+from rag_loader import warm_rag_index
+from few_shot import warm_few_shot_registry
+from session_store import create_session_store, SESSION_STORE
+from metrics import timed_stage, render_metrics, register_collector, REQUESTS
+from exporters import EXPORTS, EXPORT_FORMATS, export_extension, frame_rows
+from incremental import CASE_GROUPS_FILE, load_case_groups, save_case_groups, group_cases
+from results_store import RESULTS_FORMAT, RESULTS_DEFAULT_LIMIT, query_results
+from case_library import get_case_library, warm_case_library, ENTRY_KINDS
+from alm_connectors import get_alm_fetcher
+from bulk import BulkRunner, BulkConflictError, BULK_CONCURRENCY, parse_jsonl, write_input, read_status, is_running
 from utils import ensure_folder
 from datetime import datetime
 import threading
@@ -19,12 +33,76 @@ CORS(app)
 BASE_UPLOADS = os.environ.get("TEMP_FOLDER", os.path.join(os.path.dirname(__file__), "..", "uploads"))
 ensure_folder(BASE_UPLOADS)
 
-# 🔹 Session storage
-SESSIONS = {}
+# 🔹 Session storage (SESSION_STORE=sqlite|memory, expires after SESSION_TTL_SECONDS)
+SESSIONS = create_session_store(BASE_UPLOADS)
 
 # 🔹 Testcase generator instance
 GENERATOR = GeneratorService()
 
+# 🔹 Background job queue for async generation (JOB_MAX_WORKERS / JOB_QUEUE_DEPTH);
+#    with the shared SQLite store, /jobs/<id> answers on every worker
+JOB_STORE = (create_session_store(BASE_UPLOADS, table="jobs", ttl_seconds=JOB_TTL_SECONDS, on_evict=None)
+             if SESSION_STORE != "memory" else None)
+JOBS = JobQueue(store=JOB_STORE)
+JOB_STAGES = PIPELINE_STAGES + ("write_files",)
+
+# 🔹 Bulk runs: one resumable folder per bulk id
+BULK_FOLDER = os.path.join(BASE_UPLOADS, "bulk")
+BULK_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+BULK_ACTIVE = set()  # bulk folders with a job queued or running in this process
+BULK_ACTIVE_LOCK = threading.Lock()
+
+# 🔹 Export LLM cache and Vertex client counters on /metrics: running totals as "<name>_total"
+#    counters (so rate()/increase() work), current levels such as in_flight as gauges
+def _service_counters():
+    for prefix, stats, totals in (("tcgen_llm_cache", LLM_CACHE.stats(), set(LLM_CACHE.counters)),
+                                  ("tcgen_vertex", CLIENTS.stats(), set(CLIENTS.counters) | {"breaker_trips"})):
+        for key, value in stats.items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if key in totals:
+                yield f"{prefix}_{key}_total", "counter", f"{prefix.split('_', 1)[1]} {key}", value
+            else:
+                yield f"{prefix}_{key}", "gauge", f"{prefix.split('_', 1)[1]} {key}", value
+register_collector(_service_counters)
+
+
+# =========================
+# One-time process startup
+# =========================
+
+_STARTED = False
+_STARTUP_LOCK = threading.Lock()
+_BACKEND_THREAD = None
+_BACKEND_LOCK = threading.Lock()
+
+def startup(warm=True):
+    """
+    Initialize the process once: create the sample few-shot/RAG files, then load or build
+    the RAG index, the few-shot registry and the case library in the background (which
+    also initializes Vertex AI). Later calls return immediately, so it is safe to call from every request
+    and every Streamlit rerun.
+    """
+    global _STARTED
+    if _STARTED:
+        return False
+    with _STARTUP_LOCK:
+        if _STARTED:
+            return False
+        prepare_local_files()
+        if warm:
+            threading.Thread(target=warm_rag_index, name="rag-warm-up", daemon=True).start()
+            threading.Thread(target=warm_few_shot_registry, name="few-shot-warm-up", daemon=True).start()
+            threading.Thread(target=warm_case_library, name="case-library-warm-up", daemon=True).start()
+        _STARTED = True
+    LOG.info("Backend startup complete")
+    return True
+
+
+@app.before_request
+def ensure_started():
+    startup()
+
 
 # =========================
 # Flask Routes
@@ -32,15 +110,158 @@ GENERATOR = GeneratorService()
 
 @app.route("/generate_testcases", methods=["POST"])
 def generate_testcases():
-    """Flask route: returns JSON for frontend requests."""
+    """
+    Flask route: returns JSON for frontend requests.
+    With ?async=1 (or "async": true in the payload) the request is queued and
+    202 + job id is returned immediately; poll /jobs/<job_id> for the result.
+    """
     try:
         payload = request.get_json(force=True)
-        return jsonify(generate_testcases_handler(payload)), 200
+        if request.args.get("async", "").lower() in ("1", "true", "yes") or payload.get("async"):
+            return submit_generation_job(payload)
+        result = generate_testcases_handler(payload)
+        REQUESTS.inc(endpoint="generate_testcases", outcome="ok")
+        return jsonify(result), 200
     except Exception as e:
         LOG.exception("generate_testcases failed")
+        REQUESTS.inc(endpoint="generate_testcases", outcome="error")
         return jsonify({"error": str(e)}), 500
 
 
+def submit_generation_job(payload):
+    try:
+        job_id = JOBS.submit(generate_testcases_handler, payload, stages=JOB_STAGES)
+    except QueueFullError as e:
+        resp = jsonify({"error": str(e)})
+        resp.headers["Retry-After"] = "30"
+        return resp, 429
+    return jsonify({"job_id": job_id, "state": "queued", "status_url": f"/jobs/{job_id}"}), 202
+
+
+@app.route("/generate_testcases/stream", methods=["POST"])
+def generate_testcases_stream():
+    """Server-Sent Events: each test case is pushed as soon as the model emits it, then the review."""
+    payload = request.get_json(force=True)
+
+    def events():
+        for event, data in stream_testcases_handler(payload):
+            if event == "done":
+                data = {k: v for k, v in data.items() if not k.startswith("file_path_")}
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(stream_with_context(events()), mimetype="text/event-stream", headers=headers)
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """State, per-stage progress and (once finished) result links of an async job."""
+    job = JOBS.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    result = job.pop("result", None)
+    if result:
+        job["result"] = {k: v for k, v in result.items() if not k.startswith("file_path_")}
+    return jsonify(job), 200
+
+
+@app.route("/bulk_generate", methods=["POST"])
+def bulk_generate():
+    """
+    Queue a bulk run. Body: JSONL of requirement records (one per line), or JSON
+    {"records": [...], "alm_tool": "jira", "bulk_id": "..."}. Reusing a bulk_id
+    without records (or with the same records) resumes that run from its checkpoint;
+    different records for it, or a run of it still in progress, are a 409.
+    """
+    try:
+        if request.is_json:
+            payload = request.get_json(force=True)
+            records = payload.get("records")
+        else:
+            payload = dict(request.args)
+            records = parse_jsonl(request.get_data(as_text=True)) or None
+        bulk_id = payload.get("bulk_id") or request.args.get("bulk_id") or str(uuid.uuid4())
+        if not BULK_ID_RE.fullmatch(bulk_id):
+            return jsonify({"error": "Invalid bulk_id"}), 400
+        bulk_dir = os.path.join(BULK_FOLDER, bulk_id)
+        use_cache = payload.get("use_cache", True) not in (False, "0", "false")
+        with BULK_ACTIVE_LOCK:
+            if bulk_dir in BULK_ACTIVE or is_running(bulk_dir):
+                raise BulkConflictError(f"Bulk run {bulk_id} is already queued or running")
+            if records:
+                write_input(bulk_dir, records)
+            elif not os.path.exists(os.path.join(bulk_dir, "input.jsonl")):
+                return jsonify({"error": "No records given and no bulk run to resume"}), 400
+            BULK_ACTIVE.add(bulk_dir)
+            try:
+                job_id = JOBS.submit(run_bulk_job, bulk_dir, (payload.get("alm_tool") or "jira").lower(), use_cache,
+                                     stages=("items", "write_files"))
+            except Exception:
+                BULK_ACTIVE.discard(bulk_dir)
+                raise
+    except BulkConflictError as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFullError as e:
+        resp = jsonify({"error": str(e)})
+        resp.headers["Retry-After"] = "30"
+        return resp, 429
+    return jsonify({"bulk_id": bulk_id, "job_id": job_id, "status_url": f"/bulk/{bulk_id}"}), 202
+
+
+def run_bulk_job(bulk_dir, alm_tool, use_cache, progress=None):
+    try:
+        report_progress(progress, "items", "running")
+        runner = BulkRunner(GENERATOR, bulk_dir, BULK_CONCURRENCY, alm_tool, use_cache)
+        status = runner.run()
+        report_progress(progress, "items", "done")
+        return status
+    finally:
+        with BULK_ACTIVE_LOCK:
+            BULK_ACTIVE.discard(bulk_dir)
+
+
+@app.route("/bulk/<bulk_id>", methods=["GET"])
+def bulk_status(bulk_id):
+    """Counts, items/minute and (once finished) download links of a bulk run."""
+    if not BULK_ID_RE.fullmatch(bulk_id):
+        return jsonify({"error": "Invalid bulk_id"}), 400
+    status = read_status(os.path.join(BULK_FOLDER, bulk_id))
+    if status is None:
+        return jsonify({"error": "Bulk run not found"}), 404
+    status["downloads"] = [f"/bulk/{bulk_id}/download/{name}" for name in status.get("outputs", [])]
+    return jsonify(status), 200
+
+
+@app.route("/bulk/<bulk_id>/cases", methods=["GET"])
+def bulk_cases(bulk_id):
+    """One page of a finished bulk run's cases for ?alm_tool= (default jira); same query parameters as /sessions/<id>/cases."""
+    status = read_status(os.path.join(BULK_FOLDER, bulk_id)) if BULK_ID_RE.fullmatch(bulk_id) else None
+    name = f"bulk_{(request.args.get('alm_tool') or 'jira').lower()}.{RESULTS_FORMAT}"
+    if not status or name not in status.get("outputs", []):
+        return jsonify({"error": "Bulk results not found"}), 404
+    try:
+        return jsonify(dict(query_cases(os.path.join(BULK_FOLDER, bulk_id, name), request.args), bulk_id=bulk_id)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/bulk/<bulk_id>/download/<filename>", methods=["GET"])
+def bulk_download(bulk_id, filename):
+    status = read_status(os.path.join(BULK_FOLDER, bulk_id)) if BULK_ID_RE.fullmatch(bulk_id) else None
+    if not status or filename not in status.get("outputs", []):
+        return "File not found", 404
+    return send_file(os.path.join(BULK_FOLDER, bulk_id, filename), as_attachment=True)
+
+
+def send_export(path):
+    """send_file once the background export of path has finished."""
+    if not EXPORTS.wait(path):
+        return "Export failed" if EXPORTS.state(path) == "failed" else "File not found", 404
+    return send_file(path, as_attachment=True)
+
+
 @app.route("/download_reviewed/<session_id>/<filename>", methods=["GET"])
 def download_reviewed(session_id, filename):
     """Serve reviewed Excel file via browser."""
@@ -50,7 +271,7 @@ def download_reviewed(session_id, filename):
     path = s.get("reviewed_path")
     if not path or os.path.basename(path) != filename:
         return "File not found", 404
-    return send_file(path, as_attachment=True)
+    return send_export(path)
 
 
 @app.route("/download_raw/<session_id>/<filename>", methods=["GET"])
@@ -62,41 +283,177 @@ def download_raw(session_id, filename):
     path = s.get("raw_path")
     if not path or os.path.basename(path) != filename:
         return "File not found", 404
-    return send_file(path, as_attachment=True)
+    return send_export(path)
+
+
+@app.route("/download/<session_id>/<fmt>", methods=["GET"])
+def download_export(session_id, fmt):
+    """Serve one of the session's exports (xlsx, csv, jsonl, parquet, jira_import, ...)."""
+    s = SESSIONS.get(session_id)
+    if not s:
+        return "Session not found", 404
+    path = (s.get("exports") or {}).get(fmt)
+    if not path:
+        return "Export not found", 404
+    return send_export(path)
+
+
+@app.route("/sessions/<session_id>/cases", methods=["GET"])
+def session_cases(session_id):
+    """
+    One page of the session's reviewed cases, read from its results file:
+    ?offset=0&limit=50&columns=a,b&q=<text>&sort=<column>&order=asc|desc
+    """
+    try:
+        return jsonify(session_cases_handler(session_id, request.args)), 200
+    except LookupError as e:
+        return jsonify({"error": str(e)}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/library/search", methods=["GET"])
+def library_search():
+    """
+    Search the test cases of all past sessions: ?q=<text>&k=10&alm_tool=jira&kind=case|requirement
+    &mode=hybrid|vector|lexical. Requirement hits carry the cases generated for them.
+    """
+    query = (request.args.get("q") or "").strip()
+    kind = request.args.get("kind", "case")
+    if not query:
+        return jsonify({"error": "Missing q"}), 400
+    if kind not in ENTRY_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(ENTRY_KINDS)}"}), 400
+    try:
+        k = max(1, min(100, int(request.args.get("k", 10))))
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    library = get_case_library()
+    results = library.search(query, k, kind=kind, alm_tool=request.args.get("alm_tool"), mode=request.args.get("mode", "hybrid"))
+    return jsonify({"query": query, "results": results, "library": library.stats()}), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus text exposition: stage latency histograms, prompt/response sizes, cache and client counters."""
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 
 @app.route("/status", methods=["GET"])
 def status():
     """Simple health check."""
-    return jsonify({"ok": True, "sessions": len(SESSIONS)})
+    return jsonify({"ok": True, "sessions": len(SESSIONS), "jobs": JOBS.stats(), "llm_cache": LLM_CACHE.stats(),
+                    "vertex": CLIENTS.stats(), "exports": EXPORTS.stats(),
+                    "library": get_case_library().stats(), "alm": get_alm_fetcher().stats()})
 
 
 # =========================
 # Direct-call handler (for Streamlit)
 # =========================
 
-def generate_testcases_handler(payload: dict):
+def generate_testcases_handler(payload: dict, progress=None):
     """
     Direct-call version for Streamlit.
     Returns dict including preview_html and absolute file paths.
+    progress(stage, state) is called as each pipeline stage starts and finishes.
     """
-    username = payload.get("username", "user")
-    inputs = payload.get("inputs", {})
-    typed = inputs.get("typed_requirements", [])
-    uploaded_files = inputs.get("uploaded_files", [])
-    alm_inputs = inputs.get("alm_inputs", {})
-    alm_tool = (payload.get("alm_tool") or "jira").lower()
+    username, typed, uploaded_files, alm_inputs, alm_tool = parse_payload(payload)
+    export_formats = parse_export_formats(payload)
 
     LOG.info("Generating test cases for user=%s alm_tool=%s", username, alm_tool)
 
     # 🔹 Generate test cases using GeneratorService
+    run_report = {}
     raw_cases, reviewed_cases, columns, prompt_used = GENERATOR.generate_full_pipeline(
         typed_requirements=typed,
         uploaded_files=uploaded_files,
         alm_inputs=alm_inputs,
-        alm_tool=alm_tool
+        alm_tool=alm_tool,
+        progress=progress,
+        sharded=payload.get("sharded"),
+        report=run_report,
+        use_cache=payload.get("use_cache", True) is not False,
+        previous=previous_case_groups(payload),
+        reuse_first=payload.get("reuse_first")
     )
 
+    return save_session_outputs(username, alm_tool, raw_cases, reviewed_cases, columns, prompt_used,
+                                run_report, progress, export_formats)
+
+
+def parse_payload(payload: dict):
+    username = payload.get("username", "user")
+    inputs = payload.get("inputs", {})
+    return (
+        username,
+        inputs.get("typed_requirements", []),
+        inputs.get("uploaded_files", []),
+        inputs.get("alm_inputs", {}),
+        (payload.get("alm_tool") or "jira").lower(),
+    )
+
+
+def previous_case_groups(payload: dict):
+    """
+    Case groups of payload["previous_session_id"] for an incremental run: None when no previous
+    session is named, {} (regenerate everything) when it has expired or kept no groups.
+    """
+    session_id = payload.get("previous_session_id")
+    if not session_id:
+        return None
+    s = SESSIONS.get(session_id)
+    if not s:
+        LOG.info("Previous session %s not found; regenerating all requirements", session_id)
+        return {}
+    return load_case_groups(s.get("case_groups_path")) or {}
+
+
+def query_cases(path, args):
+    """query_results with request-style args (strings, columns comma separated, order=asc|desc)."""
+    columns = args.get("columns")
+    if isinstance(columns, str):
+        columns = [c.strip() for c in columns.split(",") if c.strip()]
+    try:
+        offset, limit = int(args.get("offset", 0)), int(args.get("limit", RESULTS_DEFAULT_LIMIT))
+    except (TypeError, ValueError):
+        raise ValueError("offset and limit must be integers")
+    return query_results(path, offset, limit, columns or None, text=args.get("q") or None,
+                         sort=args.get("sort") or None, descending=str(args.get("order", "asc")).lower() == "desc")
+
+
+def session_cases_handler(session_id, args):
+    """Direct-call version of /sessions/<id>/cases (used by Streamlit for paging). Raises LookupError/ValueError."""
+    s = SESSIONS.get(session_id)
+    if not s:
+        raise LookupError("Session not found")
+    path = s.get("results_path")
+    if not path or not EXPORTS.wait(path):
+        raise LookupError("Results not found")
+    return dict(query_cases(path, args), session_id=session_id)
+
+
+def parse_export_formats(payload: dict):
+    """Requested export formats (list or comma separated) plus the reviewed xlsx; unknown ones raise ValueError."""
+    formats = payload.get("export_formats") or EXPORT_FORMATS
+    if isinstance(formats, str):
+        formats = formats.split(",")
+    formats = list(dict.fromkeys(["xlsx"] + [f.strip().lower() for f in formats if f.strip()]))
+    for fmt in formats:
+        export_extension(fmt)
+    return formats
+
+
+def save_session_outputs(username, alm_tool, raw_cases, reviewed_cases, columns, prompt_used, run_report=None, progress=None,
+                         export_formats=None):
+    """
+    Queue the raw JSON, reviewed Excel, the results file (RESULTS_FORMAT) and any extra
+    export_formats (default EXPORT_FORMATS) on the background export writers, register the
+    session and build the API result.
+    """
+    run_report = run_report or {}
+    export_formats = export_formats or parse_export_formats({})
+    # the columnar results file behind /sessions/<id>/cases
+    export_formats = list(dict.fromkeys(export_formats + [RESULTS_FORMAT]))
     ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
     safe_user = "".join([c if c.isalnum() else "_" for c in username]) or "user"
     session_id = str(uuid.uuid4())
@@ -105,23 +462,39 @@ def generate_testcases_handler(payload: dict):
 
     # 🔹 File paths
     raw_path = os.path.join(out_dir, f"{safe_user}_raw_{alm_tool}_{ts}.json")
-    reviewed_path = os.path.join(out_dir, f"{safe_user}_reviewed_{alm_tool}_{ts}.xlsx")
+    stem = os.path.join(out_dir, f"{safe_user}_reviewed_{alm_tool}_{ts}")
+    reviewed_path = stem + ".xlsx"
+    export_paths = {fmt: reviewed_path if fmt == "xlsx" else f"{stem}_{fmt}.{export_extension(fmt)}" for fmt in export_formats}
 
-    # 🔹 Save files
-    with open(raw_path, "w", encoding="utf-8") as f:
-        json.dump(raw_cases, f, indent=2, ensure_ascii=False)
-    reviewed_cases.to_excel(reviewed_path, index=False)
+    # 🔹 Save files (written off the request thread; downloads wait for them)
+    timings = run_report.setdefault("timings", {})
+    with timed_stage("write_files", progress, timings):
+        reviewed_columns = reviewed_cases.columns.tolist()
+        # which cases came from which requirement, for incremental resubmissions (small, written inline)
+        case_groups_path = None
+        if run_report.get("fingerprints") is not None:
+            case_groups_path = os.path.join(out_dir, CASE_GROUPS_FILE)
+            save_case_groups(case_groups_path, alm_tool, reviewed_columns, reviewed_cases.fillna("").to_dict(orient="records"),
+                             run_report["fingerprints"])
+        EXPORTS.submit(raw_path, "json", None, raw_cases)
+        for fmt, path in export_paths.items():
+            EXPORTS.submit(path, fmt, reviewed_columns, frame_rows(reviewed_cases))
+    index_session(out_dir, alm_tool, reviewed_columns, reviewed_cases, run_report.get("fingerprints"))
 
     # 🔹 Store session info
-    SESSIONS[session_id] = {
+    SESSIONS.put(session_id, {
         "username": username,
         "created_at": datetime.utcnow().isoformat() + "Z",
         "raw_path": raw_path,
         "reviewed_path": reviewed_path,
         "columns": columns,
         "prompt": prompt_used,
-        "alm_tool": alm_tool
-    }
+        "alm_tool": alm_tool,
+        "out_dir": out_dir,
+        "exports": export_paths,
+        "results_path": export_paths[RESULTS_FORMAT],
+        "case_groups_path": case_groups_path
+    })
 
     # 🔹 Prepare preview HTML (first 10 rows)
     preview_html = reviewed_cases.head(10).to_html(index=False, escape=False)
@@ -131,21 +504,104 @@ def generate_testcases_handler(payload: dict):
         "message": "Test cases generated and AI-reviewed",
         "session_id": session_id,
         "count": len(reviewed_cases),
+        "dedup": run_report.get("dedup"),
+        "timings": timings,
+        "prompt_budget": run_report.get("prompt_budget"),
+        "salvage": run_report.get("salvage"),
+        "incremental": run_report.get("incremental"),
+        "library": run_report.get("library"),
+        "alm_fetch": run_report.get("alm_fetch"),
         "preview_html": preview_html,
         "columns": columns,
         "download_reviewed": f"/download_reviewed/{session_id}/{os.path.basename(reviewed_path)}",
         "download_raw": f"/download_raw/{session_id}/{os.path.basename(raw_path)}",
         "file_path_reviewed": reviewed_path,  # ✅ absolute path for Streamlit download
-        "file_path_raw": raw_path
+        "file_path_raw": raw_path,
+        "exports": {fmt: f"/download/{session_id}/{fmt}" for fmt in export_paths},
+        "cases_url": f"/sessions/{session_id}/cases"
     }
 
 
+def index_session(out_dir, alm_tool, columns, reviewed_cases, fingerprints):
+    """
+    Add the session's newly generated cases to the case library (reused ones are indexed
+    already); a library failure never fails the request.
+    """
+    try:
+        cases = reviewed_cases.fillna("").to_dict(orient="records")
+        groups = None
+        if fingerprints:
+            reused = set(fingerprints.get("reused", ()))
+            groups = {fp: g for fp, g in group_cases(cases, fingerprints["cases"]).items() if fp not in reused}
+            cases = [c for c, fp in zip(cases, fingerprints["cases"]) if fp not in reused]
+        get_case_library().add_session(os.path.basename(out_dir), alm_tool, columns, cases, groups,
+                                       (fingerprints or {}).get("texts"))
+    except Exception as e:
+        LOG.warning("Could not add session to the case library: %s", e)
+
+
+def stream_testcases_handler(payload: dict):
+    """
+    Streaming version of generate_testcases_handler. Yields (event, data) pairs:
+    "columns", one "testcase" per generated case as the model emits it, "generated"
+    (count + dedup summary) once review starts, then "reviewed" and "done" with the
+    same result dict as the non-streaming handler, or "error". Incremental resubmissions
+    (previous_session_id) and reuse-first runs (reuse_first, default CASE_LIBRARY_REUSE_FIRST)
+    send the cases they reuse as one "reused" event right after "columns"; only the remaining
+    requirements are streamed from the model.
+    """
+    username, typed, uploaded_files, alm_inputs, alm_tool = parse_payload(payload)
+    LOG.info("Streaming test cases for user=%s alm_tool=%s", username, alm_tool)
+    run_report = {}
+    generated = 0
+    try:
+        export_formats = parse_export_formats(payload)
+        for event, data in GENERATOR.stream_full_pipeline(
+            typed_requirements=typed,
+            uploaded_files=uploaded_files,
+            alm_inputs=alm_inputs,
+            alm_tool=alm_tool,
+            report=run_report,
+            use_cache=payload.get("use_cache", True) is not False,
+            previous=previous_case_groups(payload),
+            reuse_first=payload.get("reuse_first")
+        ):
+            if event == "columns":
+                yield "columns", {"columns": data}
+            elif event == "reused":
+                yield "reused", {"count": len(data), "cases": data}
+            elif event == "testcase":
+                generated += 1
+                yield "testcase", {"index": generated, "case": data}
+            elif event == "generated":
+                yield "generated", data
+            elif event == "result":
+                raw_cases, reviewed_cases, columns, prompt_used = data
+                yield "reviewed", {"count": len(reviewed_cases), "cases": reviewed_cases.fillna("").to_dict(orient="records")}
+                yield "done", save_session_outputs(username, alm_tool, raw_cases, reviewed_cases, columns, prompt_used, run_report,
+                                                   export_formats=export_formats)
+                REQUESTS.inc(endpoint="generate_testcases_stream", outcome="ok")
+    except Exception as e:
+        LOG.exception("stream_testcases failed")
+        REQUESTS.inc(endpoint="generate_testcases_stream", outcome="error")
+        yield "error", {"error": str(e)}
+
+
 # =========================
 # Run backend in background (for Streamlit)
 # =========================
 
 def run_backend():
-    port = int(os.environ.get("PORT", 8080))
-    threading.Thread(
-        target=lambda: app.run(host="0.0.0.0", port=port, debug=False, use_reloader=False)
-    ).start()
+    """Start the Flask server thread once per process; Streamlit reruns call this on every interaction."""
+    global _BACKEND_THREAD
+    startup()
+    with _BACKEND_LOCK:
+        if _BACKEND_THREAD is not None and _BACKEND_THREAD.is_alive():
+            return _BACKEND_THREAD
+        port = int(os.environ.get("BACKEND_PORT", os.environ.get("PORT", 8080)))
+        _BACKEND_THREAD = threading.Thread(
+            target=lambda: app.run(host="0.0.0.0", port=port, debug=False, use_reloader=False),
+            name="flask-backend", daemon=True
+        )
+        _BACKEND_THREAD.start()
+        return _BACKEND_THREAD
@@ -0,0 +1,206 @@
+# backend/blob_store.py
+"""
+Content-addressed storage for uploaded files.
+
+Each upload is stored once under uploads/blobs/<sha256[:2]>/<sha256>; a session folder
+only holds manifest.json mapping file names to digests. A blob's reference count is the
+number of session manifests that list it. A background janitor removes expired session
+folders, unreferenced blobs, and the oldest sessions when the store exceeds its quota.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+from utils import ensure_folder, atomic_write
+
+LOG = logging.getLogger("blob_store")
+LOG.setLevel(logging.INFO)
+
+UPLOADS_ROOT = os.path.abspath(os.environ.get("TEMP_FOLDER", os.path.join(os.path.dirname(__file__), "..", "uploads")))
+UPLOAD_SESSION_TTL_SECONDS = int(os.environ.get("UPLOAD_SESSION_TTL_SECONDS", str(24 * 3600)))
+UPLOAD_QUOTA_BYTES = int(os.environ.get("UPLOAD_QUOTA_BYTES", str(1024 * 1024 * 1024)))
+UPLOAD_BLOB_GRACE_SECONDS = int(os.environ.get("UPLOAD_BLOB_GRACE_SECONDS", "600"))
+UPLOAD_JANITOR_INTERVAL_SECONDS = int(os.environ.get("UPLOAD_JANITOR_INTERVAL_SECONDS", "300"))
+
+MANIFEST = "manifest.json"
+SESSION_MARKER = "_session_"
+
+
+class BlobStore:
+    def __init__(self, root=UPLOADS_ROOT):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        ensure_folder(self.blob_dir)
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put(self, data, digest=None):
+        """Store bytes once; returns (digest, written) where written is False if the blob already existed."""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        ensure_folder(os.path.dirname(path))
+        def _write(tmp):
+            with open(tmp, "wb") as f:
+                f.write(data)
+        atomic_write(path, _write)
+        return digest, True
+
+    def open(self, digest):
+        return open(self.blob_path(digest), "rb")
+
+    # =========================
+    # Session manifests
+    # =========================
+
+    def read_manifest(self, session_folder):
+        try:
+            with open(os.path.join(session_folder, MANIFEST), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def add_files(self, session_folder, files):
+        """
+        files: iterable of (file_name, bytes). Files whose name/digest are already in the
+        session manifest cost no disk I/O. Returns the number of new blobs written.
+        """
+        with self._lock:
+            manifest = self.read_manifest(session_folder)
+            changed, written = False, 0
+            for name, data in files:
+                digest = hashlib.sha256(data).hexdigest()
+                if manifest.get(name, {}).get("digest") == digest and os.path.exists(self.blob_path(digest)):
+                    continue
+                digest, new_blob = self.put(data, digest)
+                written += int(new_blob)
+                manifest[name] = {"digest": digest, "size": len(data), "added_at": time.time()}
+                changed = True
+            if changed:
+                ensure_folder(session_folder)
+                def _write(tmp):
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(manifest, f, indent=2)
+                atomic_write(os.path.join(session_folder, MANIFEST), _write)
+        return written
+
+    def session_folders(self):
+        try:
+            names = os.listdir(self.root)
+        except FileNotFoundError:
+            return []
+        return [os.path.join(self.root, n) for n in names
+                if SESSION_MARKER in n and os.path.isdir(os.path.join(self.root, n))]
+
+    def refcounts(self):
+        counts = {}
+        for folder in self.session_folders():
+            for entry in self.read_manifest(folder).values():
+                counts[entry["digest"]] = counts.get(entry["digest"], 0) + 1
+        return counts
+
+    # =========================
+    # Janitor
+    # =========================
+
+    def _blobs(self):
+        for root, _, files in os.walk(self.blob_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                yield name, path, st.st_size, st.st_mtime
+
+    def _session_age(self, folder, now):
+        try:
+            return now - os.stat(os.path.join(folder, MANIFEST)).st_mtime
+        except OSError:
+            return now - os.stat(folder).st_mtime
+
+    def collect(self, session_ttl=UPLOAD_SESSION_TTL_SECONDS, quota_bytes=UPLOAD_QUOTA_BYTES,
+                grace_seconds=UPLOAD_BLOB_GRACE_SECONDS):
+        """One janitor pass. Returns counts of removed sessions/blobs and bytes freed."""
+        now = time.time()
+        stats = {"sessions_removed": 0, "blobs_removed": 0, "bytes_freed": 0}
+        sessions = []
+        for folder in self.session_folders():
+            try:
+                age = self._session_age(folder, now)
+            except OSError:
+                continue
+            if age > session_ttl:
+                shutil.rmtree(folder, ignore_errors=True)
+                stats["sessions_removed"] += 1
+            else:
+                sessions.append((age, folder))
+
+        def sweep_unreferenced():
+            referenced = self.refcounts()
+            total = 0
+            for digest, path, size, mtime in list(self._blobs()):
+                # the grace period covers blobs written just before their manifest entry
+                if digest not in referenced and now - mtime > grace_seconds:
+                    try:
+                        os.remove(path)
+                        stats["blobs_removed"] += 1
+                        stats["bytes_freed"] += size
+                        continue
+                    except OSError:
+                        pass
+                total += size
+            return total
+
+        total = sweep_unreferenced()
+        # over quota: drop the least recently active sessions until the remaining blobs fit
+        sessions.sort(reverse=True)
+        while total > quota_bytes and sessions:
+            _, folder = sessions.pop(0)
+            shutil.rmtree(folder, ignore_errors=True)
+            stats["sessions_removed"] += 1
+            grace_seconds = 0
+            total = sweep_unreferenced()
+        if stats["sessions_removed"] or stats["blobs_removed"]:
+            LOG.info("Upload janitor: %s", stats)
+        return stats
+
+
+_STORE = None
+_JANITOR = None
+_STORE_LOCK = threading.Lock()
+
+def get_blob_store():
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = BlobStore()
+        return _STORE
+
+def start_upload_janitor(interval=UPLOAD_JANITOR_INTERVAL_SECONDS):
+    """Start the background janitor once per process (safe to call on every Streamlit rerun)."""
+    global _JANITOR
+    with _STORE_LOCK:
+        if _JANITOR is not None:
+            return _JANITOR
+        stop = threading.Event()
+
+        def loop():
+            while not stop.wait(interval):
+                try:
+                    get_blob_store().collect()
+                except Exception as e:
+                    LOG.warning("Upload janitor pass failed: %s", e)
+
+        _JANITOR = threading.Thread(target=loop, name="upload-janitor", daemon=True)
+        _JANITOR.stop = stop
+        _JANITOR.start()
+        return _JANITOR
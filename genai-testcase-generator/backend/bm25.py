@@ -0,0 +1,66 @@
+# backend/bm25.py
+"""
+Local lexical retrieval: an in-memory BM25 inverted index over RAG chunk texts,
+and reciprocal rank fusion (RRF) to merge ranked lists from several retrievers.
+No network, no extra dependencies; building it for the rag/ corpus takes milliseconds.
+"""
+import re
+import math
+from collections import Counter, defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have in is it its must not of on or shall should "
+    "that the their this to was were will with".split()
+)
+RRF_K = 60
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class BM25Index:
+    def __init__(self, texts=(), k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc, term frequency)]
+        self.doc_len = []
+        self.idf = {}
+        self.add(texts)
+
+    @property
+    def n_docs(self):
+        return len(self.doc_len)
+
+    def add(self, texts):
+        """Append documents (indexes continue after the existing ones) and refresh the term statistics."""
+        for text in texts:
+            doc = len(self.doc_len)
+            counts = Counter(tokenize(text))
+            self.doc_len.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((doc, tf))
+        self.avg_len = (sum(self.doc_len) / self.n_docs) if self.n_docs else 0.0
+        self.idf = {term: math.log(1.0 + (self.n_docs - len(p) + 0.5) / (len(p) + 0.5)) for term, p in self.postings.items()}
+
+    def search(self, query, k=5):
+        """Top-k (doc index, BM25 score) pairs, best first; documents sharing no term are not returned."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1.0 - self.b + self.b * self.doc_len[doc] / (self.avg_len or 1.0))
+                scores[doc] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))[:k]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Fuse ranked lists of doc indexes: score(d) = sum 1 / (k + rank). Returns [(doc, score)] best first."""
+    fused = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            fused[doc] += 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda kv: (-kv[1], kv[0]))
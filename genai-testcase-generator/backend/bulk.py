@@ -0,0 +1,286 @@
+# backend/bulk.py
+"""
+Bulk generation over a JSONL file of requirement records.
+
+Each line is one item, e.g.
+    {"id": "JIRA-101", "alm_tool": "jira", "typed_requirements": ["..."], "alm_inputs": {...}}
+("requirement"/"text" are accepted instead of "typed_requirements"). Items run through
+GeneratorService with bounded concurrency. Every finished item is appended to
+checkpoint.jsonl in the bulk folder, so re-running the same folder skips completed
+items and retries failed ones. A folder's records are fixed once written (different
+records for it raise BulkConflictError), and one run at a time holds its lock file.
+When all items are done, consolidated bulk_<alm_tool>.json/.xlsx files are written next
+to the checkpoint.
+"""
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from utils import ensure_folder, atomic_write
+from exporters import write_export
+from results_store import RESULTS_FORMAT
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process run lock
+    fcntl = None
+
+LOG = logging.getLogger("bulk")
+LOG.setLevel(logging.INFO)
+
+BULK_CONCURRENCY = int(os.environ.get("BULK_CONCURRENCY", "4"))
+
+INPUT_FILE = "input.jsonl"
+CHECKPOINT_FILE = "checkpoint.jsonl"
+STATUS_FILE = "status.json"
+LOCK_FILE = "run.lock"
+SOURCE_COLUMN = "SourceItem"
+
+
+class BulkConflictError(RuntimeError):
+    """The bulk folder holds different records, or a run of it is already in progress."""
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def parse_jsonl(text):
+    """Records from JSONL text; blank lines are skipped, a bad line raises ValueError with its number."""
+    records = []
+    for n, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {n}: {e}")
+    return records
+
+
+def normalize_record(record, n, default_alm_tool="jira"):
+    typed = record.get("typed_requirements") or record.get("requirement") or record.get("text") or []
+    if isinstance(typed, str):
+        typed = [typed]
+    return {
+        "id": str(record.get("id") or record.get("key") or f"item-{n}"),
+        "alm_tool": (record.get("alm_tool") or default_alm_tool).lower(),
+        "typed_requirements": typed,
+        "alm_inputs": record.get("alm_inputs") or {},
+    }
+
+
+def write_input(bulk_dir, records):
+    """
+    Save the records of a bulk run. The same records again are a no-op (a resume); different
+    ones raise BulkConflictError, since the folder's checkpoint would mark changed items done.
+    """
+    path = os.path.join(bulk_dir, INPUT_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if parse_jsonl(f.read()) == json.loads(json.dumps(list(records))):
+                return
+        raise BulkConflictError(f"Bulk run {os.path.basename(os.path.normpath(bulk_dir))} already has different "
+                                "records; use a new bulk_id, or resend without records to resume")
+    ensure_folder(bulk_dir)
+    def _write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    atomic_write(os.path.join(bulk_dir, INPUT_FILE), _write)
+
+
+@contextmanager
+def run_lock(bulk_dir):
+    """Hold the bulk folder's run lock (across threads and processes); BulkConflictError when another run has it."""
+    ensure_folder(bulk_dir)
+    with open(os.path.join(bulk_dir, LOCK_FILE), "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise BulkConflictError(f"Bulk run {os.path.basename(os.path.normpath(bulk_dir))} is already running")
+        yield  # closing the file releases the lock, also when the process dies
+
+
+def is_running(bulk_dir):
+    if not os.path.isdir(bulk_dir):
+        return False
+    try:
+        with run_lock(bulk_dir):
+            return False
+    except BulkConflictError:
+        return True
+
+
+def read_status(bulk_dir):
+    try:
+        with open(os.path.join(bulk_dir, STATUS_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class BulkRunner:
+    """Runs the items of one bulk folder; safe to construct again on the same folder to resume."""
+
+    def __init__(self, generator, bulk_dir, concurrency=BULK_CONCURRENCY, default_alm_tool="jira", use_cache=True):
+        self.generator = generator
+        self.bulk_dir = bulk_dir
+        self.concurrency = max(1, concurrency)
+        self.default_alm_tool = default_alm_tool
+        self.use_cache = use_cache
+        self.checkpoint_path = os.path.join(bulk_dir, CHECKPOINT_FILE)
+        self._lock = threading.Lock()
+        self.status = {}
+
+    def load_items(self):
+        with open(os.path.join(self.bulk_dir, INPUT_FILE), "r", encoding="utf-8") as f:
+            records = parse_jsonl(f.read())
+        return [normalize_record(r, n, self.default_alm_tool) for n, r in enumerate(records, start=1)]
+
+    def load_checkpoint(self):
+        """Latest checkpoint entry per item id (a later retry overrides an earlier failure)."""
+        done = {}
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    done[entry["id"]] = entry
+        except FileNotFoundError:
+            pass
+        return done
+
+    def _append_checkpoint(self, entry):
+        with self._lock:
+            with open(self.checkpoint_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _write_status(self, **update):
+        with self._lock:
+            self.status.update(update)
+            elapsed = time.monotonic() - self._started
+            processed = self.status["completed"] + self.status["failed"] - self.status["resumed"]
+            self.status["elapsed_seconds"] = round(elapsed, 1)
+            self.status["items_per_minute"] = round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0
+            snapshot = dict(self.status)
+        def _write(tmp):
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, indent=2)
+        atomic_write(os.path.join(self.bulk_dir, STATUS_FILE), _write)
+
+    def run_item(self, item):
+        normalized, df_reviewed, columns, _ = self.generator.generate_full_pipeline(
+            typed_requirements=item["typed_requirements"],
+            alm_inputs=item["alm_inputs"],
+            alm_tool=item["alm_tool"],
+            use_cache=self.use_cache,
+        )
+        return {"columns": columns, "cases": df_reviewed.fillna("").to_dict(orient="records")}
+
+    def _process(self, item):
+        entry = {"id": item["id"], "alm_tool": item["alm_tool"]}
+        try:
+            entry.update(status="ok", **self.run_item(item))
+        except Exception as e:
+            LOG.warning("Bulk item %s failed: %s", item["id"], e)
+            entry.update(status="failed", error=str(e))
+        entry["finished_at"] = _now()
+        self._append_checkpoint(entry)
+        with self._lock:
+            key = "completed" if entry["status"] == "ok" else "failed"
+            counts = {key: self.status[key] + 1, "pending": self.status["pending"] - 1}
+        self._write_status(**counts)
+        LOG.info("Bulk %s: %s (%d pending)", entry["status"], item["id"], counts["pending"])
+        return entry
+
+    def run(self):
+        """Process every item not yet completed; returns the final status dict. BulkConflictError if the folder is already running."""
+        with run_lock(self.bulk_dir):
+            return self._run()
+
+    def _run(self):
+        items = self.load_items()
+        checkpoint = self.load_checkpoint()
+        todo = [i for i in items if checkpoint.get(i["id"], {}).get("status") != "ok"]
+        resumed = len(items) - len(todo)
+        self._started = time.monotonic()
+        self.status = {
+            "bulk_id": os.path.basename(os.path.normpath(self.bulk_dir)),
+            "state": "running",
+            "total": len(items),
+            "completed": resumed,
+            "failed": 0,
+            "resumed": resumed,
+            "pending": len(todo),
+            "started_at": _now(),
+            "finished_at": None,
+            "outputs": [],
+        }
+        self._write_status()
+        if resumed:
+            LOG.info("Bulk resume: %d/%d items already completed", resumed, len(items))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk") as pool:
+            for entry in pool.map(self._process, todo):
+                checkpoint[entry["id"]] = entry
+
+        outputs = self.write_outputs([checkpoint[i["id"]] for i in items if i["id"] in checkpoint])
+        self._write_status(state="finished", finished_at=_now(), outputs=outputs)
+        return dict(self.status)
+
+    def write_outputs(self, entries):
+        """Consolidated JSON, Excel and results file (for paging) per ALM tool, with the source item id as the first column."""
+        by_tool = {}
+        for entry in entries:
+            if entry.get("status") != "ok":
+                continue
+            columns, cases = by_tool.setdefault(entry["alm_tool"], ([SOURCE_COLUMN], []))
+            columns.extend(c for c in entry["columns"] if c not in columns)
+            cases.extend(dict({SOURCE_COLUMN: entry["id"]}, **case) for case in entry["cases"])
+        outputs = []
+        for alm_tool, (columns, cases) in by_tool.items():
+            json_path = os.path.join(self.bulk_dir, f"bulk_{alm_tool}.json")
+            xlsx_path = os.path.join(self.bulk_dir, f"bulk_{alm_tool}.xlsx")
+            write_export(json_path, "json", columns, cases)
+            results_path = os.path.join(self.bulk_dir, f"bulk_{alm_tool}.{RESULTS_FORMAT}")
+            write_export(xlsx_path, "xlsx", columns, cases)
+            write_export(results_path, RESULTS_FORMAT, columns, cases)
+            outputs.extend(os.path.basename(p) for p in (json_path, xlsx_path, results_path))
+        return outputs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate test cases for every record of a JSONL file (resumable).")
+    parser.add_argument("input", nargs="?", help="JSONL file of requirement records (omit to resume --out)")
+    parser.add_argument("--out", required=True, help="bulk folder; re-running with the same folder resumes")
+    parser.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY)
+    parser.add_argument("--alm-tool", default="jira", help="ALM tool for records that do not set one")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM response cache")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    try:
+        if args.input:
+            with open(args.input, "r", encoding="utf-8") as f:
+                write_input(args.out, parse_jsonl(f.read()))
+        from generator import GeneratorService, prepare_local_files
+        prepare_local_files()
+        runner = BulkRunner(GeneratorService(), args.out, args.concurrency, args.alm_tool.lower(), use_cache=not args.no_cache)
+        print(json.dumps(runner.run(), indent=2))
+    except BulkConflictError as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    main()
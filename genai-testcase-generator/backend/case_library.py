@@ -0,0 +1,295 @@
+# backend/case_library.py
+"""
+Searchable library of every test case generated so far, across sessions.
+
+Entries live in one append-only JSON-lines file under CASE_LIBRARY_DIR:
+    kind "case"         one reviewed test case (searchable by its text)
+    kind "requirement"  one requirement/document section and the reviewed cases made from it
+
+New sessions are appended as they are saved; each process reads only the lines added
+since its last look, so every worker sees them without a rebuild. Session folders that
+predate the library are backfilled from their case_groups.json, or from the reviewed
+xlsx / raw JSON output when that is all there is.
+
+Search combines the BM25 index and embedding similarity (rank fusion, as for RAG).
+Embeddings go through the shared on-disk embedding cache, so only new entries are
+ever sent to the embedding model. With reuse-first generation, a requirement whose
+closest library requirement is at least CASE_LIBRARY_THRESHOLD similar (cosine)
+takes that requirement's cases instead of a model call.
+"""
+import os
+import re
+import glob
+import json
+import logging
+import threading
+import numpy as np
+from bm25 import BM25Index, reciprocal_rank_fusion
+from rag_loader import EmbeddingStore, RAG_CACHE_DIR
+from vertex_ai_client import get_embedding_model, EMBEDDING_MODEL_NAME
+from utils import ensure_folder
+from incremental import CASE_GROUPS_FILE
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends from one process only
+    fcntl = None
+
+LOG = logging.getLogger("case_library")
+LOG.setLevel(logging.INFO)
+
+UPLOADS_DIR = os.environ.get("TEMP_FOLDER", os.path.join(os.path.dirname(__file__), "..", "uploads"))
+CASE_LIBRARY_DIR = os.environ.get("CASE_LIBRARY_DIR", os.path.join(UPLOADS_DIR, "library"))
+CASE_LIBRARY_THRESHOLD = float(os.environ.get("CASE_LIBRARY_THRESHOLD", "0.9"))
+CASE_LIBRARY_REUSE_FIRST = os.environ.get("CASE_LIBRARY_REUSE_FIRST", "0").lower() in ("1", "true", "yes")
+CASE_LIBRARY_FUSION_DEPTH = int(os.environ.get("CASE_LIBRARY_FUSION_DEPTH", "50"))
+
+ENTRIES_FILE = "entries.jsonl"
+ENTRY_KINDS = ("case", "requirement")
+SEARCH_MODES = ("hybrid", "vector", "lexical")
+OUTPUT_NAME_RE = re.compile(r"_(raw|reviewed)_([a-z0-9]+)_\d{8}_\d{6}\.(?:json|xlsx)$")
+
+
+def case_text(case):
+    return " | ".join(str(v) for v in case.values() if str(v).strip())
+
+
+def session_entries(source, alm_tool, columns, cases, groups=None, texts=None):
+    """Library entries of one session: every case, plus each requirement with its cases when known."""
+    entries = [{"kind": "case", "source": source, "alm_tool": alm_tool, "columns": list(columns),
+                "text": case_text(c), "case": c} for c in cases]
+    for fp, group in (groups or {}).items():
+        text = (texts or {}).get(fp)
+        if text and group:
+            entries.append({"kind": "requirement", "source": source, "alm_tool": alm_tool, "columns": list(columns),
+                            "text": text, "cases": group})
+    return entries
+
+
+class CaseLibrary:
+    def __init__(self, library_dir=CASE_LIBRARY_DIR, uploads_dir=UPLOADS_DIR, cache_dir=RAG_CACHE_DIR, model=None,
+                 model_name=EMBEDDING_MODEL_NAME):
+        self.dir = library_dir
+        self.uploads_dir = uploads_dir
+        self.path = os.path.join(library_dir, ENTRIES_FILE)
+        self.store = EmbeddingStore(cache_dir, model_name)
+        self.model_name = model_name
+        self._model = model
+        self._lock = threading.RLock()
+        self.entries = []
+        self.sources = set()
+        self.lexical = BM25Index()
+        self._offset = 0
+        self._vectors = []      # unit-length embedding per entry (None until embedded)
+        self._matrix = None     # stacked self._vectors, rebuilt after appends
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name)
+        return self._model
+
+    # ---- storage ----
+
+    def _append_sessions(self, sessions):
+        """
+        Append [(source, entries)] under an exclusive file lock, skipping sources another
+        process indexed in the meantime. Returns the number of entries written.
+        """
+        ensure_folder(self.dir)
+        with self._lock, open(self.path, "ab") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # one writer at a time across worker processes
+            try:
+                self.sync()
+                fresh = [e for source, entries in sessions if source not in self.sources for e in entries]
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in fresh).encode("utf-8"))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+        self.sync()
+        return len(fresh)
+
+    def sync(self):
+        """Load the entries appended since the last call (by this or any other process)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return 0
+        if size == self._offset:
+            return 0
+        with self._lock:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            complete = data[:data.rfind(b"\n") + 1]  # a line still being written is read next time
+            new = []
+            for line in complete.splitlines():
+                try:
+                    new.append(json.loads(line))
+                except ValueError:
+                    LOG.warning("Skipping unreadable case library line")
+            self._offset += len(complete)
+            self.entries.extend(new)
+            self.sources.update(e["source"] for e in new)
+            self.lexical.add(e["text"] for e in new)
+            self._vectors.extend([None] * len(new))
+            self._matrix = None
+        return len(new)
+
+    def add_session(self, source, alm_tool, columns, cases, groups=None, texts=None):
+        """Index a freshly saved session (source = its folder name). Returns the number of entries added."""
+        return self._append_sessions([(source, session_entries(source, alm_tool, columns, cases, groups, texts))])
+
+    def backfill(self):
+        """Index session folders under uploads_dir that the library has not seen yet."""
+        self.sync()
+        sessions = []
+        for folder in sorted(glob.glob(os.path.join(self.uploads_dir, "*", ""))):
+            source = os.path.basename(os.path.dirname(folder))
+            if source in self.sources:
+                continue
+            try:
+                entries = self._read_session(folder, source)
+            except Exception as e:
+                LOG.warning("Skipping session folder %s: %s", source, e)
+                continue
+            if entries:
+                sessions.append((source, entries))
+        added = self._append_sessions(sessions) if sessions else 0
+        if added:
+            LOG.info("Case library backfilled %d entries from %d sessions", added, len(sessions))
+        return added
+
+    def _read_session(self, folder, source):
+        """Entries of a session folder: case_groups.json, else the reviewed xlsx, else the raw JSON."""
+        groups_path = os.path.join(folder, CASE_GROUPS_FILE)
+        if os.path.exists(groups_path):
+            with open(groups_path, encoding="utf-8") as f:
+                saved = json.load(f)
+            cases = [c for group in saved.get("groups", {}).values() for c in group]
+            return session_entries(source, saved.get("alm_tool"), saved.get("columns", []), cases,
+                                   saved.get("groups"), saved.get("texts"))
+        outputs = {}
+        for path in glob.glob(os.path.join(folder, "*")):
+            m = OUTPUT_NAME_RE.search(os.path.basename(path))
+            if m:
+                outputs.setdefault(m.group(1), (m.group(2), path))
+        if "reviewed" in outputs:
+            import pandas as pd
+            alm_tool, path = outputs["reviewed"]
+            df = pd.read_excel(path).fillna("")
+            return session_entries(source, alm_tool, df.columns.tolist(), df.astype(str).to_dict(orient="records"))
+        if "raw" in outputs:
+            alm_tool, path = outputs["raw"]
+            with open(path, encoding="utf-8") as f:
+                cases = [c for c in json.load(f) if isinstance(c, dict)]
+            return session_entries(source, alm_tool, list(cases[0].keys()) if cases else [], cases)
+        return []
+
+    # ---- search ----
+
+    def _matrix_for_search(self):
+        """Unit-length embedding matrix of all entries, embedding only the ones not seen before."""
+        with self._lock:
+            if self._matrix is None:
+                missing = [i for i, v in enumerate(self._vectors) if v is None]
+                if missing:
+                    vecs = self.store.embed([self.entries[i]["text"] for i in missing], self.model)
+                    vecs /= np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+                    for i, v in zip(missing, vecs):
+                        self._vectors[i] = v
+                self._matrix = np.vstack(self._vectors) if self._vectors else None
+            return self._matrix
+
+    def _mask(self, kind, alm_tool, columns=None):
+        """Entries eligible for a search. Its length also pins the entries a search looks at, since syncs only append."""
+        return np.array([e["kind"] == kind and (alm_tool is None or e["alm_tool"] == alm_tool)
+                         and (columns is None or e["columns"] == list(columns)) for e in self.entries[:]], dtype=bool)
+
+    def _similarities(self, query, mask):
+        matrix = self._matrix_for_search()[:len(mask)]
+        q = np.asarray(self.model.get_embeddings([query])[0].values, dtype="float32")
+        sims = matrix @ (q / max(float(np.linalg.norm(q)), 1e-12))
+        return np.where(mask, sims, -np.inf)
+
+    def _lexical(self, query, mask, depth):
+        # BM25 postings cover every kind, so rank them all and keep the first `depth` eligible ones
+        return [d for d, _ in self.lexical.search(query, self.lexical.n_docs) if d < len(mask) and mask[d]][:depth]
+
+    def search(self, query, k=10, kind="case", alm_tool=None, mode="hybrid"):
+        """
+        Top-k library entries for query, best first: dicts with the entry fields plus
+        "similarity" (cosine, None when embeddings are unavailable) and "retriever".
+        """
+        mode = mode if mode in SEARCH_MODES else "hybrid"
+        self.sync()
+        if not self.entries:
+            return []
+        mask = self._mask(kind, alm_tool)
+        depth = max(k, CASE_LIBRARY_FUSION_DEPTH)
+        lexical = self._lexical(query, mask, depth) if mode != "vector" else []
+        sims, retriever = None, mode
+        if mode != "lexical":
+            try:
+                sims = self._similarities(query, mask)
+            except Exception as e:
+                LOG.warning("Case library embedding failed, using lexical search: %s", e)
+                retriever = "lexical_fallback"
+                lexical = lexical or self._lexical(query, mask, depth)
+        if sims is not None:
+            order = [int(d) for d in np.argsort(-sims, kind="stable")[:min(depth, int(mask.sum()))]]
+            ranked = [d for d, _ in reciprocal_rank_fusion([order, lexical])] if mode == "hybrid" else order
+        else:
+            ranked = lexical
+        out = []
+        for d in ranked[:k]:
+            hit = dict(self.entries[d])
+            hit["similarity"] = None if sims is None else round(float(sims[d]), 4)
+            hit["retriever"] = retriever
+            out.append(hit)
+        return out
+
+    def match_requirement(self, text, alm_tool, columns, threshold=CASE_LIBRARY_THRESHOLD):
+        """(cases, similarity) of the closest library requirement at or above threshold, or (None, best similarity)."""
+        self.sync()
+        mask = self._mask("requirement", alm_tool, columns)
+        if not mask.any():
+            return None, None
+        sims = self._similarities(text, mask)
+        best = int(np.argmax(sims))
+        if sims[best] < threshold:
+            return None, float(sims[best])
+        return [dict(c) for c in self.entries[best]["cases"]], float(sims[best])
+
+    def stats(self):
+        counts = {kind: 0 for kind in ENTRY_KINDS}
+        for e in self.entries:
+            counts[e["kind"]] = counts.get(e["kind"], 0) + 1
+        return {"entries": len(self.entries), "sessions": len(self.sources), **counts}
+
+    def warm(self):
+        """Backfill older sessions and embed every entry ahead of the first search."""
+        self.backfill()
+        if self.entries:
+            self._matrix_for_search()
+
+
+_LIBRARY = None
+_LIBRARY_LOCK = threading.Lock()
+
+def get_case_library():
+    global _LIBRARY
+    if _LIBRARY is None:
+        with _LIBRARY_LOCK:
+            if _LIBRARY is None:
+                _LIBRARY = CaseLibrary()
+    return _LIBRARY
+
+def warm_case_library():
+    """Backfill and embed the library in the background. Failures are logged, not raised."""
+    try:
+        get_case_library().warm()
+    except Exception as e:
+        LOG.warning("Case library warm-up failed (will retry on first search): %s", e)
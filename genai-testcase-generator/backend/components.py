@@ -3,13 +3,14 @@ import streamlit as st
 import os
 from datetime import datetime
 import re
+from blob_store import get_blob_store, UPLOADS_ROOT
 
 def is_valid_username(name):
     return bool(re.match(r'^\w+$', name))
 
 def create_session_folder(username):
     session_id = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-    folder = os.path.join("uploads", f"{username}_session_{session_id}")
+    folder = os.path.join(UPLOADS_ROOT, f"{username}_session_{session_id}")
     os.makedirs(folder, exist_ok=True)
     return folder
 
@@ -26,14 +27,9 @@ def tabs_ui():
     with tab2:
         uploaded_files = st.file_uploader("Upload requirement document(s)", type=["pdf", "docx", "txt"], accept_multiple_files=True)
         if uploaded_files:
-            batch_folder = os.path.join(st.session_state.session_folder, f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
-            os.makedirs(batch_folder, exist_ok=True)
-            st.session_state.uploaded_files = []
-            for file in uploaded_files:
-                file_path = os.path.join(batch_folder, file.name)
-                with open(file_path, "wb") as f:
-                    f.write(file.getbuffer())
-                st.session_state.uploaded_files.append(file)
+            # content-addressed: reruns and re-uploads of the same bytes write nothing
+            get_blob_store().add_files(st.session_state.session_folder, [(f.name, f.getvalue()) for f in uploaded_files])
+            st.session_state.uploaded_files = list(uploaded_files)
             st.success(f"✅ {len(uploaded_files)} file(s) uploaded and stored.")
 
     with tab3:
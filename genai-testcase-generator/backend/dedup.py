@@ -0,0 +1,115 @@
+# backend/dedup.py
+"""
+Local duplicate detection for generated test cases, run before the AI review so the
+reviewer prompt only carries distinct cases.
+
+Two passes:
+1. exact: hash of the normalized text (case/whitespace/punctuation-insensitive)
+2. near:  MinHash over word shingles with LSH banding to find candidate pairs,
+          confirmed by estimated Jaccard similarity >= threshold
+"""
+import os
+import re
+import hashlib
+import logging
+import numpy as np
+
+LOG = logging.getLogger("dedup")
+LOG.setLevel(logging.INFO)
+
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.85"))
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+NUM_BANDS = 16
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+# columns that identify a case rather than describe it
+ID_COLUMNS = ("testcaseid", "test case id", "id")
+
+
+def case_text(case, columns):
+    return " ".join(str(case.get(c, "")) for c in columns if str(c).strip().lower() not in ID_COLUMNS)
+
+def normalize_text(text):
+    return " ".join(WORD_RE.findall(text.lower()))
+
+def _shingle_hashes(words, k=SHINGLE_SIZE):
+    if len(words) < k:
+        grams = [" ".join(words)] if words else [""]
+    else:
+        grams = [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+    return np.array(
+        [int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=4).digest(), "little") for g in set(grams)],
+        dtype=np.uint64,
+    )
+
+def minhash_signature(normalized):
+    hashes = _shingle_hashes(normalized.split())
+    # (a * x + b) mod p truncated to 32 bits; a * x wraps at 2**64, which is fine for MinHash
+    phv = ((np.outer(hashes, _PERM_A) + _PERM_B) % MERSENNE_PRIME) & MAX_HASH
+    return phv.min(axis=0)
+
+
+def find_duplicates(cases, columns, threshold=DEDUP_THRESHOLD):
+    """
+    Returns (kept_indices, merges) where merges is a list of
+    {"kept": i, "dropped": j, "kind": "exact"|"near", "similarity": float}.
+    The first occurrence of each group is kept.
+    """
+    normalized = [normalize_text(case_text(c, columns)) for c in cases]
+    merges, kept, seen = [], [], {}
+    for i, text in enumerate(normalized):
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key in seen:
+            merges.append({"kept": seen[key], "dropped": i, "kind": "exact", "similarity": 1.0})
+        else:
+            seen[key] = i
+            kept.append(i)
+
+    if threshold >= 1.0 or len(kept) < 2:
+        return kept, merges
+
+    sigs = np.vstack([minhash_signature(normalized[i]) for i in kept])
+    rows = NUM_PERM // NUM_BANDS
+    buckets = {}
+    dropped = set()
+    for pos, i in enumerate(kept):
+        sig = sigs[pos]
+        bands = [(b, sig[b * rows:(b + 1) * rows].tobytes()) for b in range(NUM_BANDS)]
+        candidates = set()
+        for band in bands:
+            candidates.update(buckets.get(band, ()))
+        if candidates:
+            cand = np.fromiter(sorted(candidates), dtype=np.int64)
+            sims = (sigs[cand] == sig).mean(axis=1)
+            best = int(np.argmax(sims))
+            if sims[best] >= threshold:
+                merges.append({"kept": kept[cand[best]], "dropped": i, "kind": "near", "similarity": round(float(sims[best]), 3)})
+                dropped.add(i)
+                continue
+        for band in bands:
+            buckets.setdefault(band, []).append(pos)
+    return [i for i in kept if i not in dropped], merges
+
+
+def dedup_testcases(cases, columns, threshold=DEDUP_THRESHOLD):
+    """Drop exact and near-duplicate cases. Returns (unique_cases, report)."""
+    kept, merges = find_duplicates(cases, columns, threshold)
+    report = {
+        "input": len(cases),
+        "kept": len(kept),
+        "exact_duplicates": sum(1 for m in merges if m["kind"] == "exact"),
+        "near_duplicates": sum(1 for m in merges if m["kind"] == "near"),
+        "merged": merges,
+    }
+    if merges:
+        LOG.info("Dedup removed %d of %d cases (%d exact, %d near)", len(merges), len(cases),
+                 report["exact_duplicates"], report["near_duplicates"])
+    return [cases[i] for i in kept], report
@@ -0,0 +1,273 @@
+# backend/exporters.py
+"""
+Streaming export writers for generated test cases.
+
+Every writer takes (path, columns, rows) where rows is any iterable of dicts and
+writes one row at a time, so memory stays flat however many cases are exported:
+write-only openpyxl workbooks, CSV, JSON Lines, a line-per-object JSON array and
+Parquet in EXPORT_BATCH_ROWS row groups (needs pyarrow). ALM import layouts
+(jira_import, azure_import, polarion_import) rename and fill columns to what the
+tool's CSV/Excel importer expects. ExportManager runs the writers on a small
+thread pool so the request thread only hands the rows over; downloads wait for
+the file they serve. Marker files (<path>.pending / <path>.failed) carry the
+export state to the other workers, which may be asked for the file first.
+"""
+import os
+import csv
+import time
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils import atomic_write
+from metrics import timed_stage
+
+LOG = logging.getLogger("exporters")
+LOG.setLevel(logging.INFO)
+
+EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", "2"))
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "10000"))
+EXPORT_WAIT_SECONDS = float(os.environ.get("EXPORT_WAIT_SECONDS", "120"))
+EXPORT_POLL_SECONDS = 0.2
+PENDING_SUFFIX = ".pending"
+FAILED_SUFFIX = ".failed"
+# formats written for every session besides the raw JSON (comma separated)
+EXPORT_FORMATS = [f.strip() for f in os.environ.get("EXPORT_FORMATS", "xlsx").split(",") if f.strip()]
+
+
+def cell(value):
+    """Scalar for a spreadsheet/CSV cell: None/NaN -> "", lists and dicts -> JSON text."""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def write_xlsx(path, columns, rows):
+    from openpyxl import Workbook
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+    def _clean(v):
+        v = cell(v)
+        return ILLEGAL_CHARACTERS_RE.sub("", v) if isinstance(v, str) else v
+    def _write(tmp):
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Sheet1")
+        ws.append(list(columns))
+        for row in rows:
+            ws.append([_clean(row.get(c)) for c in columns])
+        wb.save(tmp)
+    atomic_write(path, _write)
+
+
+def write_csv(path, columns, rows):
+    def _write(tmp):
+        # utf-8-sig so Excel opens non-ASCII text correctly
+        with open(tmp, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow([cell(row.get(c)) for c in columns])
+    atomic_write(path, _write)
+
+
+def write_jsonl(path, columns, rows):
+    def _write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({c: row.get(c, "") for c in columns}, ensure_ascii=False, default=str) + "\n")
+    atomic_write(path, _write)
+
+
+def write_json(path, columns, rows):
+    """JSON array with one object per line; columns=None keeps every key of each row."""
+    def _write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("[")
+            for n, row in enumerate(rows):
+                obj = row if columns is None else {c: row.get(c, "") for c in columns}
+                f.write(("\n" if n == 0 else ",\n") + json.dumps(obj, ensure_ascii=False, default=str))
+            f.write("\n]\n")
+    atomic_write(path, _write)
+
+
+def write_parquet(path, columns, rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+    schema = pa.schema([(str(c), pa.string()) for c in columns])
+    def _flush(writer, batch):
+        arrays = [pa.array([str(cell(r.get(c))) for r in batch], type=pa.string()) for c in columns]
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    def _write(tmp):
+        with pq.ParquetWriter(tmp, schema, compression="snappy") as writer:
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= EXPORT_BATCH_ROWS:
+                    _flush(writer, batch)
+                    batch = []
+            if batch:
+                _flush(writer, batch)
+    atomic_write(path, _write)
+
+
+# 🔹 ALM import layouts: target column -> source columns (case-insensitive, first match) or a constant
+ALM_LAYOUTS = {
+    "jira_import": ("csv", [
+        ("Summary", ("summary", "title", "description")),
+        ("Issue Type", "Test"),
+        ("Description", ("description", "stepaction", "actions")),
+        ("Requirement", ("customfield_requirement", "requirementid", "linkedrequirement", "requirement")),
+        ("Test Steps", ("steps", "step", "stepaction", "actions")),
+        ("Expected Result", ("expectedresults", "expectedresult")),
+        ("Acceptance Criteria", ("acceptancecriteria",)),
+    ]),
+    "azure_import": ("csv", [
+        ("ID", ""),
+        ("Work Item Type", "Test Case"),
+        ("Title", ("title", "summary", "description")),
+        ("Test Step", "1"),
+        ("Step Action", ("stepaction", "steps", "step", "actions")),
+        ("Step Expected", ("expectedresult", "expectedresults")),
+        ("Tags", ("requirementid", "customfield_requirement", "linkedrequirement")),
+        ("State", "Design"),
+    ]),
+    "polarion_import": ("xlsx", [
+        ("ID", ("id",)),
+        ("Title", ("title", "summary")),
+        ("Description", ("description",)),
+        ("Linked Work Items", ("linkedrequirement", "requirementid", "customfield_requirement")),
+        ("Test Steps", ("step", "steps", "stepaction", "actions")),
+        ("Expected Result", ("expectedresult", "expectedresults")),
+        ("Type", "testcase"),
+    ]),
+}
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv, "jsonl": write_jsonl, "json": write_json, "parquet": write_parquet}
+
+
+def alm_rows(layout, columns, rows):
+    """Rows re-keyed to an ALM layout; returns (target columns, row iterator)."""
+    by_name = {str(c).strip().lower(): c for c in columns}
+    sources = []
+    for target, source in layout:
+        if isinstance(source, str):
+            sources.append((target, None, source))
+        else:
+            sources.append((target, next((by_name[s] for s in source if s in by_name), None), ""))
+    targets = [t for t, _, _ in sources]
+    def _iter():
+        for row in rows:
+            yield {t: (row.get(src, "") if src is not None else const) for t, src, const in sources}
+    return targets, _iter()
+
+
+def frame_rows(df):
+    """Lazy dict rows of a DataFrame (no full to_dict copy)."""
+    columns = df.columns.tolist()
+    return (dict(zip(columns, values)) for values in df.itertuples(index=False, name=None))
+
+
+def export_extension(fmt):
+    if fmt in ALM_LAYOUTS:
+        return ALM_LAYOUTS[fmt][0]
+    if fmt in WRITERS:
+        return fmt
+    raise ValueError(f"Unknown export format {fmt!r} (use one of {', '.join(list(WRITERS) + list(ALM_LAYOUTS))})")
+
+
+def write_export(path, fmt, columns, rows):
+    """Write rows (iterable of dicts) to path in one of WRITERS or ALM_LAYOUTS."""
+    if fmt in ALM_LAYOUTS:
+        ext, layout = ALM_LAYOUTS[fmt]
+        columns, rows = alm_rows(layout, columns, rows)
+        fmt = ext
+    export_extension(fmt)
+    with timed_stage(f"export_{fmt}"):
+        WRITERS[fmt](path, columns, rows)
+    return path
+
+
+class ExportManager:
+    """Background writers keyed by output path; wait(path) blocks until that file is written."""
+
+    def __init__(self, workers=EXPORT_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="export")
+        self._pending = {}
+        self._failed = {}
+        self._lock = threading.Lock()
+
+    def submit(self, path, fmt, columns, rows):
+        export_extension(fmt)
+        _remove(path + FAILED_SUFFIX)
+        _write_marker(path + PENDING_SUFFIX, "")
+        future = self._executor.submit(write_export, path, fmt, columns, rows)
+        with self._lock:
+            self._pending[path] = future
+            self._failed.pop(path, None)
+        future.add_done_callback(lambda f: self._finished(path, f))
+        return future
+
+    def _finished(self, path, future):
+        error = future.exception()
+        with self._lock:
+            if self._pending.get(path) is future:
+                del self._pending[path]
+            if error is not None:
+                self._failed[path] = str(error)
+        if error is not None:
+            LOG.warning("Export of %s failed: %s", path, error)
+            _write_marker(path + FAILED_SUFFIX, str(error))
+        _remove(path + PENDING_SUFFIX)
+
+    def state(self, path):
+        """pending / failed / ready / missing; exports of other workers are read from the marker files."""
+        with self._lock:
+            if path in self._pending:
+                return "pending"
+            if path in self._failed:
+                return "failed"
+        if os.path.exists(path + FAILED_SUFFIX):
+            return "failed"
+        if os.path.exists(path + PENDING_SUFFIX):
+            return "pending"
+        return "ready" if os.path.exists(path) else "missing"
+
+    def wait(self, path, timeout=EXPORT_WAIT_SECONDS):
+        """True once path is written (immediately for files not being exported)."""
+        with self._lock:
+            future = self._pending.get(path)
+        if future is not None:
+            try:
+                future.result(timeout=timeout)
+            except Exception:
+                return False
+        deadline = time.monotonic() + timeout
+        while self.state(path) == "pending" and time.monotonic() < deadline:
+            time.sleep(EXPORT_POLL_SECONDS)  # written by another worker
+        return self.state(path) == "ready"
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "failed": len(self._failed)}
+
+
+def _write_marker(path, text):
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+    except OSError as e:
+        LOG.warning("Could not write export marker %s: %s", path, e)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+EXPORTS = ExportManager()
@@ -0,0 +1,170 @@
+# backend/few_shot.py
+"""
+In-memory registry of the few-shot examples under backend/examples/.
+
+Every file named "<alm_tool>_*.xlsx" (or .csv) belongs to that ALM tool; the rows of
+all its files form one example pool, with the columns of "<alm_tool>_testcase_eg.xlsx"
+(or the first file) as output format. Pools are parsed once and reloaded only when a
+file's mtime/size changes. Rows are embedded through the shared on-disk embedding
+cache, and each request gets the FEW_SHOT_TOP_K rows most similar to its
+requirements, best first. Pools no larger than k are used as-is without embedding.
+"""
+import os
+import glob
+import logging
+import threading
+import numpy as np
+from rag_loader import EmbeddingStore, RAG_CACHE_DIR
+from vertex_ai_client import get_embedding_model, EMBEDDING_MODEL_NAME
+
+LOG = logging.getLogger("few_shot")
+LOG.setLevel(logging.INFO)
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), "examples")
+FEW_SHOT_TOP_K = int(os.environ.get("FEW_SHOT_TOP_K", "8"))
+EXAMPLE_EXTENSIONS = (".xlsx", ".csv")
+ALM_TOOLS = ("jira", "azure", "polarion", "etl")
+
+
+def example_files(examples_dir, alm_tool):
+    """Example files of one ALM tool, the primary "<tool>_testcase_eg" file first."""
+    primary = f"{alm_tool}_testcase_eg.xlsx"
+    paths = [p for p in glob.glob(os.path.join(examples_dir, f"{alm_tool}_*"))
+             if p.lower().endswith(EXAMPLE_EXTENSIONS) and not os.path.basename(p).startswith("~$")]
+    return sorted(paths, key=lambda p: (os.path.basename(p) != primary, os.path.basename(p)))
+
+
+def read_examples(path):
+    import pandas as pd
+    return pd.read_csv(path) if path.lower().endswith(".csv") else pd.read_excel(path)
+
+
+def row_text(row):
+    return " | ".join(str(v) for v in row if str(v).strip() and str(v) != "nan")
+
+
+class ExamplePool:
+    """All example rows of one ALM tool plus their (lazily computed) unit-length embeddings."""
+
+    def __init__(self, alm_tool, df, signature):
+        self.alm_tool = alm_tool
+        self.df = df
+        self.signature = signature
+        self.texts = [row_text(r) for r in df.itertuples(index=False)]
+        self.vectors = None
+
+    @property
+    def columns(self):
+        return self.df.columns.tolist()
+
+
+class FewShotRegistry:
+    def __init__(self, examples_dir=EXAMPLES_DIR, cache_dir=RAG_CACHE_DIR, model=None, model_name=EMBEDDING_MODEL_NAME, top_k=FEW_SHOT_TOP_K):
+        self.examples_dir = examples_dir
+        self.top_k = top_k
+        self.model_name = model_name
+        self.store = EmbeddingStore(cache_dir, model_name)
+        self._model = model
+        self._pools = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name)
+        return self._model
+
+    def _signature(self, alm_tool):
+        sig = []
+        for path in example_files(self.examples_dir, alm_tool):
+            st = os.stat(path)
+            sig.append((os.path.basename(path), st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def _load(self, alm_tool, signature):
+        import pandas as pd
+        frames = []
+        for name, _, _ in signature:
+            try:
+                frames.append(read_examples(os.path.join(self.examples_dir, name)))
+            except Exception as e:
+                LOG.warning("Skipping unreadable few-shot file %s: %s", name, e)
+        if not frames:
+            return None
+        columns = frames[0].columns.tolist()
+        df = pd.concat([f.reindex(columns=columns) for f in frames], ignore_index=True).fillna("")
+        self.loads += 1
+        LOG.info("Loaded %d few-shot examples for %s from %d files", len(df), alm_tool, len(frames))
+        return ExamplePool(alm_tool, df, signature)
+
+    def pool(self, alm_tool):
+        """Current ExamplePool of an ALM tool (reloaded if its files changed), or None."""
+        signature = self._signature(alm_tool)
+        pool = self._pools.get(alm_tool)
+        if pool is not None and pool.signature == signature:
+            return pool
+        with self._lock:
+            pool = self._pools.get(alm_tool)
+            if pool is None or pool.signature != signature:
+                pool = self._load(alm_tool, signature) if signature else None
+                self._pools[alm_tool] = pool
+        return pool
+
+    def _vectors(self, pool):
+        if pool.vectors is None:
+            with self._lock:
+                if pool.vectors is None:
+                    vecs = self.store.embed(pool.texts, self.model)
+                    pool.vectors = vecs / np.maximum(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12)
+        return pool.vectors
+
+    def select(self, alm_tool, query, k=None):
+        """
+        (DataFrame of the k examples most similar to `query`, best first; info dict).
+        Falls back to file order when the pool fits in k or embedding fails.
+        """
+        k = self.top_k if k is None else k
+        pool = self.pool(alm_tool)
+        if pool is None:
+            return None, {"pool": 0, "selected": 0, "method": "none"}
+        info = {"pool": len(pool.df), "selected": min(k, len(pool.df)), "method": "all"}
+        if len(pool.df) <= k or not query:
+            return pool.df.head(k), info
+        try:
+            vecs = self._vectors(pool)
+            q = np.asarray(self.model.get_embeddings([query])[0].values, dtype="float32")
+            scores = vecs @ (q / max(float(np.linalg.norm(q)), 1e-12))
+            order = np.argsort(-scores, kind="stable")[:k]
+            info["method"] = "similarity"
+            return pool.df.iloc[order].reset_index(drop=True), info
+        except Exception as e:
+            LOG.warning("Few-shot similarity selection failed for %s, using file order: %s", alm_tool, e)
+            info["method"] = "file_order"
+            return pool.df.head(k), info
+
+    def warm(self, alm_tools=ALM_TOOLS):
+        """Parse and embed every pool ahead of the first request."""
+        for alm_tool in alm_tools:
+            pool = self.pool(alm_tool)
+            if pool is not None and len(pool.df) > self.top_k:
+                self._vectors(pool)
+
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_few_shot_registry():
+    global _REGISTRY
+    if _REGISTRY is None:
+        with _REGISTRY_LOCK:
+            if _REGISTRY is None:
+                _REGISTRY = FewShotRegistry()
+    return _REGISTRY
+
+def warm_few_shot_registry():
+    """Load and embed the example pools in the background. Failures are logged, not raised."""
+    try:
+        get_few_shot_registry().warm()
+    except Exception as e:
+        LOG.warning("Few-shot warm-up failed (will retry on first request): %s", e)
@@ -1,59 +1,108 @@
 # backend/generator.py
 import os
 import json
-import pandas as pd
 import logging
-from vertex_ai_client import generate_with_gemini, get_embedding_model, init_vertex_with_credentials
-from rag_loader import get_relevant_docs_local, ensure_rag_files_local
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from vertex_ai_client import generate_with_gemini, stream_with_gemini
+from rag_loader import get_relevant_chunks, ensure_rag_files_local, RAG_TOP_K
+from rag_ingest import format_chunks, chunk_units, PARAGRAPH_SPLIT_RE
 from utils import ensure_folder
 from reviewer import ai_review_testcases
+from dedup import dedup_testcases, case_text, ID_COLUMNS
+from stream_parser import JsonArrayStreamParser, salvage_json_array
+from metrics import timed_stage
+from few_shot import get_few_shot_registry, EXAMPLES_DIR
+from alm_connectors import get_alm_fetcher, item_text, ALM_FETCH_ENABLED
+from case_library import get_case_library, CASE_LIBRARY_REUSE_FIRST, CASE_LIBRARY_THRESHOLD
+from incremental import make_unit, plan_units, matching_groups, attribute_cases, group_cases, assemble, continue_numbering, record_fingerprints
+from prompt_budget import fit_text, fit_chunks, fit_rows, PROMPT_RAG_TOKENS, PROMPT_FEW_SHOT_TOKENS, PROMPT_USER_TOKENS
 
 LOG = logging.getLogger("generator")
 LOG.setLevel(logging.INFO)
 
-BASE_DIR = os.path.dirname(__file__)
-EXAMPLES_DIR = os.path.join(BASE_DIR, "examples")
-ensure_folder(EXAMPLES_DIR)
+# 🔹 Sharded (fan-out) generation: off | on | auto (shard only when the input is large)
+GEN_SHARD_MODE = os.environ.get("GEN_SHARD_MODE", "auto").lower()
+GEN_SHARD_AUTO_CHARS = int(os.environ.get("GEN_SHARD_AUTO_CHARS", "8000"))
+GEN_SHARD_MAX_CHARS = int(os.environ.get("GEN_SHARD_MAX_CHARS", "6000"))
+GEN_PARALLELISM = int(os.environ.get("GEN_PARALLELISM", "4"))
+GEN_CASES_PER_SHARD = os.environ.get("GEN_CASES_PER_SHARD", "3-6")
+
+# 🔹 When model output is cut off, ask once for just the missing cases
+GEN_CONTINUE_ON_TRUNCATION = os.environ.get("GEN_CONTINUE_ON_TRUNCATION", "1").lower() not in ("0", "false", "no")
 
 def create_sample_few_shots():
+    ensure_folder(EXAMPLES_DIR)
     examples = {
-        "jira_testcase_eg.xlsx": pd.DataFrame([{"TestCaseID":"TC-JIRA-001","Description":"View appointment slots","Requirement":"Patients can view slots","ExpectedResult":"Slots list shown","Priority":"High","Notes":"Jira example"}]),
-        "azure_testcase_eg.xlsx": pd.DataFrame([{"TestCaseID":"TC-AZ-001","Description":"Email reminder","Requirement":"Send reminder 24h","ExpectedResult":"Reminder sent","Priority":"Medium","Notes":"Azure example"}]),
-        "polarion_testcase_eg.xlsx": pd.DataFrame([{"TestCaseID":"TC-POL-001","Description":"Cancel appointment","Requirement":"Doctor can cancel","ExpectedResult":"Appointment removed","Priority":"Medium","Notes":"Polarion example"}]),
-        "etl_testcase_eg.xlsx": pd.DataFrame([{"TestCaseID":"TC-ETL-001","Description":"ETL load completes","Requirement":"ETL must load daily","ExpectedResult":"Data loaded","Priority":"Medium","Notes":"ETL example"}])
+        "jira_testcase_eg.xlsx": [{"TestCaseID":"TC-JIRA-001","Description":"View appointment slots","Requirement":"Patients can view slots","ExpectedResult":"Slots list shown","Priority":"High","Notes":"Jira example"}],
+        "azure_testcase_eg.xlsx": [{"TestCaseID":"TC-AZ-001","Description":"Email reminder","Requirement":"Send reminder 24h","ExpectedResult":"Reminder sent","Priority":"Medium","Notes":"Azure example"}],
+        "polarion_testcase_eg.xlsx": [{"TestCaseID":"TC-POL-001","Description":"Cancel appointment","Requirement":"Doctor can cancel","ExpectedResult":"Appointment removed","Priority":"Medium","Notes":"Polarion example"}],
+        "etl_testcase_eg.xlsx": [{"TestCaseID":"TC-ETL-001","Description":"ETL load completes","Requirement":"ETL must load daily","ExpectedResult":"Data loaded","Priority":"Medium","Notes":"ETL example"}]
     }
-    for fname, df in examples.items():
+    for fname, rows in examples.items():
         path = os.path.join(EXAMPLES_DIR, fname)
         if not os.path.exists(path):
-            df.to_excel(path, index=False)
+            import pandas as pd
+            pd.DataFrame(rows).to_excel(path, index=False)
             LOG.info("Created sample few-shot example: %s", path)
 
-create_sample_few_shots()
-ensure_rag_files_local()
+def prepare_local_files():
+    """Create the sample few-shot and RAG files if missing (part of the one-time startup)."""
+    create_sample_few_shots()
+    ensure_rag_files_local()
+
+# 🔹 Stages reported to the optional progress callback of generate_full_pipeline
+PIPELINE_STAGES = ("rag", "generation", "parse", "dedup", "review")
+
+def report_progress(progress, stage, state):
+    if progress is not None:
+        progress(stage, state)
+
+def stage_timings(report):
+    """Per-request "<stage>_ms" breakdown kept in the run report (None when there is no report)."""
+    return report.setdefault("timings", {}) if report is not None else None
+
+def budget_usage(report):
+    """Per-section prompt token usage (budget, tokens, kept/dropped) kept in the run report."""
+    return report.setdefault("prompt_budget", {}) if report is not None else None
+
+def record_salvage(report, section, info):
+    if report is not None:
+        report.setdefault("salvage", {})[section] = info
+
+def min_case_count(case_count):
+    """Lower bound of a "10-15" style case count."""
+    return int(str(case_count).split("-")[0])
+
+def record_budget(report, section, usage):
+    if usage.get("dropped") or usage.get("truncated"):
+        LOG.info("Prompt budget trimmed %s: %s", section, usage)
+    usage_by_section = budget_usage(report)
+    if usage_by_section is not None:
+        usage_by_section[section] = usage
 
 class GeneratorService:
     def __init__(self):
         self.columns = ["TestCaseID", "Description", "Requirement", "ExpectedResult", "Priority", "Notes"]
-        try:
-            init_vertex_with_credentials()
-        except Exception as e:
-            LOG.warning("Vertex AI init warning: %s", e)
 
-    def load_few_shot(self, alm_tool):
-        mapping = {"jira": "jira_testcase_eg.xlsx","azure": "azure_testcase_eg.xlsx","polarion": "polarion_testcase_eg.xlsx","etl": "etl_testcase_eg.xlsx"}
-        fname = mapping.get(alm_tool, mapping["jira"])
-        path = os.path.join(EXAMPLES_DIR, fname)
+    def load_few_shot(self, alm_tool, query=None):
+        """
+        Few-shot examples for an ALM tool from the in-memory registry: the examples most
+        similar to `query` (all of them, up to FEW_SHOT_TOP_K, without a query). Returns (df, info).
+        """
+        registry = get_few_shot_registry()
+        if registry.pool(alm_tool) is None:
+            alm_tool = "jira"
         try:
-            return pd.read_excel(path)
+            return registry.select(alm_tool, query)
         except Exception as e:
             LOG.warning("Failed to load few-shot: %s", e)
-            return None
+            return None, {"pool": 0, "selected": 0, "method": "none"}
 
-    def build_prompt(self, prompt_text, alm_format_columns, few_shot_text, relevant_docs_text):
+    def build_prompt(self, prompt_text, alm_format_columns, few_shot_text, relevant_docs_text, case_count="10-15"):
         column_list_str = ", ".join([f'"{c}"' for c in alm_format_columns])
         return f"""
 You are an expert QA engineer specializing in healthcare software.
-Based on the following user request, generate 10-15 unique test cases.
+Based on the following user request, generate {case_count} unique test cases.
 Include Positive, Negative, Security, Performance, and Usability scenarios.
 
 Relevant docs:
@@ -68,16 +117,25 @@ Return strictly valid JSON array where each object has keys: {column_list_str}.
 Do not include explanations or markdown.
 """
 
-    def generate_with_gemini_safe(self, prompt_text, alm_format_columns, relevant_docs_text, few_shot_text, max_retries=2):
-        meta_prompt = self.build_prompt(prompt_text, alm_format_columns, few_shot_text, relevant_docs_text)
+    def generate_with_gemini_safe(self, prompt_text, alm_format_columns, relevant_docs_text, few_shot_text, max_retries=2, case_count="10-15", use_cache=True):
+        meta_prompt = self.build_prompt(prompt_text, alm_format_columns, few_shot_text, relevant_docs_text, case_count)
         for attempt in range(max_retries):
-            raw = generate_with_gemini(meta_prompt)
+            raw = generate_with_gemini(meta_prompt, use_cache=use_cache)
             if raw and raw.strip():
                 return raw
             LOG.warning("Empty response from Gemini, retrying (%d/%d)...", attempt+1, max_retries)
         raise RuntimeError("Vertex AI Gemini returned empty output after retries.")
 
     def parse_generator_output_safe(self, raw_text):
+        parsed, text, _ = self.parse_with_salvage(raw_text)
+        return parsed, text
+
+    def parse_with_salvage(self, raw_text):
+        """
+        (cases, text, salvage_info). salvage_info is None when the output parsed cleanly;
+        otherwise the complete objects were recovered from truncated/malformed output and
+        the info says what was lost. Raises only when nothing could be recovered.
+        """
         text = raw_text.strip()
         # remove code fences
         if text.startswith("```"):
@@ -90,40 +148,389 @@ Do not include explanations or markdown.
             parsed = json.loads(js)
             if not isinstance(parsed, list):
                 raise ValueError("Parsed JSON is not a list")
-            return parsed, text
+            return parsed, text, None
         except Exception:
+            pass
+        parsed, info = salvage_json_array(text)
+        if not parsed:
             LOG.error("Raw output could not be parsed as JSON:\n%s", text)
             raise RuntimeError(f"Failed to parse JSON from generator output. Check logs for raw output.")
+        LOG.warning("Recovered %d test cases from truncated/malformed output: %s", len(parsed), info)
+        return parsed, text, info
 
-    def generate_full_pipeline(self, typed_requirements=None, uploaded_files=None, alm_inputs=None, alm_tool="jira", external_prompt=None):
-        typed_requirements = typed_requirements or []
-        uploaded_files = uploaded_files or []
-        alm_inputs = alm_inputs or {}
+    def needs_continuation(self, info, recovered, case_count="10-15"):
+        """Missing case count worth a follow-up call (0 if the output was complete or already long enough)."""
+        if not GEN_CONTINUE_ON_TRUNCATION or info is None:
+            return 0
+        if info["complete"] and not info["dropped"]:
+            return 0
+        return max(0, min_case_count(case_count) - recovered)
 
-        prompt_for_rag = " ".join(typed_requirements) or external_prompt or "healthcare requirements"
+    def continue_generation(self, prompt_text, alm_format_columns, relevant_docs_text, few_shot_text, existing_cases, missing, use_cache=True):
+        """
+        One short follow-up request for `missing` cases after a cut-off response. The cases
+        already recovered are listed so the model does not repeat them. Returns (cases, info).
+        """
+        done = "\n".join(f"- {case_text(c, alm_format_columns)[:160]}" for c in existing_cases)
+        follow_up = f"{prompt_text}\n\nThese test cases were already generated; do not repeat them:\n{done}"
         try:
-            docs = get_relevant_docs_local(prompt_for_rag, k=3)
-            relevant_docs_text = "\n\n".join(docs)
+            raw = self.generate_with_gemini_safe(follow_up, alm_format_columns, relevant_docs_text, few_shot_text,
+                                                 max_retries=1, case_count=str(missing), use_cache=use_cache)
+            cases, _, info = self.parse_with_salvage(raw)
         except Exception as e:
-            LOG.warning("RAG retrieval failed: %s", e)
-            relevant_docs_text = ""
-
-        df_few = self.load_few_shot(alm_tool)
-        few_shot_text = df_few.to_string(index=False) if df_few is not None else ""
-        alm_format_columns = df_few.columns.tolist() if df_few is not None else self.columns
+            LOG.warning("Continuation request failed: %s", e)
+            return [], {"requested": missing, "recovered": 0, "error": str(e)}
+        return cases, {"requested": missing, "recovered": len(cases), "complete": info is None or info["complete"]}
 
-        user_prompt = external_prompt or "\n".join([
+    def build_user_prompt(self, typed_requirements, uploaded_files, alm_inputs, alm_items=()):
+        return "\n".join([
             "Typed Requirements:\n" + "\n".join(typed_requirements) if typed_requirements else "",
             "Uploaded Files Content:\n" + "\n".join([f"{f.get('file_name','file')}\n{f.get('content','')}" for f in uploaded_files]) if uploaded_files else "",
+            "ALM Work Items:\n" + "\n".join(f"{i['alm']} {i['id']}\n{item_text(i)}" for i in alm_items) if alm_items else "",
             "ALM Inputs:\n" + json.dumps(alm_inputs) if alm_inputs else ""
-        ]).strip() or prompt_for_rag
+        ]).strip()
+
+    def build_units(self, typed_requirements, uploaded_files, alm_inputs, max_chars=GEN_SHARD_MAX_CHARS, alm_items=()):
+        """
+        Split the input into independent generation units: one per requirement, per document
+        section, per fetched ALM work item, and the remaining ALM inputs. Each unit carries its
+        prompt text and a content fingerprint.
+        """
+        units = [make_unit("requirement", r, "Typed Requirement:\n" + r) for r in typed_requirements if r.strip()]
+        for f in uploaded_files:
+            name = f.get("file_name", "file")
+            paragraphs = [("", p.strip()) for p in PARAGRAPH_SPLIT_RE.split(f.get("content", "")) if p.strip()]
+            sections = chunk_units(paragraphs, max_chars=max_chars)
+            for n, (_, text) in enumerate(sections, start=1):
+                label = f"{name} (section {n}/{len(sections)})" if len(sections) > 1 else name
+                units.append(make_unit("section", text, f"Uploaded File Content — {label}:\n{text}"))
+        for item in alm_items:
+            text = item_text(item)
+            units.append(make_unit("alm_item", text, f"ALM Work Item — {item['alm']} {item['id']}:\n{text}"))
+        if alm_inputs:
+            units.append(make_unit("alm_inputs", json.dumps(alm_inputs, sort_keys=True), "ALM Inputs:\n" + json.dumps(alm_inputs)))
+        return units
+
+    def build_shards(self, typed_requirements, uploaded_files, alm_inputs, max_chars=GEN_SHARD_MAX_CHARS):
+        return [u["text"] for u in self.build_units(typed_requirements, uploaded_files, alm_inputs, max_chars)]
+
+    def should_shard(self, mode, shards, user_prompt):
+        if len(shards) < 2 or mode == "off":
+            return False
+        return mode == "on" or len(user_prompt) > GEN_SHARD_AUTO_CHARS
+
+    def _generate_shard(self, shard_text, alm_format_columns, relevant_docs_text, few_shot_text, use_cache=True):
+        raw = self.generate_with_gemini_safe(shard_text, alm_format_columns, relevant_docs_text, few_shot_text, case_count=GEN_CASES_PER_SHARD, use_cache=use_cache)
+        return self.parse_generator_output_safe(raw)
+
+    def generate_sharded(self, shards, alm_format_columns, relevant_docs_text, few_shot_text, parallelism=GEN_PARALLELISM, use_cache=True):
+        """Run one generation call per shard with at most `parallelism` in flight; results are merged in shard order."""
+        results = [None] * len(shards)
+        with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(shards))), thread_name_prefix="shard") as pool:
+            futures = {pool.submit(self._generate_shard, text, alm_format_columns, relevant_docs_text, few_shot_text, use_cache): i for i, text in enumerate(shards)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    results[i] = fut.result()
+                except Exception as e:
+                    LOG.warning("Generation shard %d/%d failed: %s", i + 1, len(shards), e)
+        done = [r for r in results if r is not None]
+        if not done:
+            raise RuntimeError(f"All {len(shards)} generation shards failed.")
+        LOG.info("Sharded generation: %d/%d shards succeeded", len(done), len(shards))
+        parsed = [obj for cases, _ in done for obj in cases]
+        used_text = "\n\n".join(text for _, text in done)
+        return parsed, used_text
+
+    def renumber_cases(self, cases, alm_format_columns):
+        id_col = next((c for c in alm_format_columns if str(c).strip().lower() in ID_COLUMNS), None)
+        if id_col is not None:
+            for n, case in enumerate(cases, start=1):
+                case[id_col] = f"TC{n:03d}"
+        return cases
+
+    def retrieve_context(self, prompt_for_rag, progress=None, report=None):
+        with timed_stage("rag", progress, stage_timings(report)):
+            try:
+                chunks = get_relevant_chunks(prompt_for_rag, k=RAG_TOP_K)
+                relevant_docs_text, usage = fit_chunks(chunks, PROMPT_RAG_TOKENS, format_chunks)
+                usage["retriever"] = chunks[0].get("retriever") if chunks else None
+                record_budget(report, "rag", usage)
+            except Exception as e:
+                LOG.warning("RAG retrieval failed: %s", e)
+                relevant_docs_text = ""
+        return relevant_docs_text
+
+    def fetch_alm_items(self, alm_inputs, report=None):
+        """
+        (fetched work items, ALM inputs left unfetched) for the references on the ALM inputs tab.
+        Without ALM_FETCH_ENABLED the inputs are returned untouched; report["alm_fetch"] counts the rest.
+        """
+        if not ALM_FETCH_ENABLED or not alm_inputs:
+            return [], alm_inputs
+        with timed_stage("alm_fetch", timings=stage_timings(report)):
+            items, unresolved, info = get_alm_fetcher().fetch(alm_inputs)
+        if report is not None and info["requested"]:
+            report["alm_fetch"] = info
+        return items, unresolved
+
+    def load_format(self, alm_tool, report=None, query=None):
+        """Few-shot text (selected for `query`, trimmed to PROMPT_FEW_SHOT_TOKENS) and output columns for an ALM tool."""
+        df_few, selection = self.load_few_shot(alm_tool, query)
+        few_shot_text, usage = fit_rows(df_few, PROMPT_FEW_SHOT_TOKENS)
+        usage.update(selection)
+        record_budget(report, "few_shot", usage)
+        alm_format_columns = df_few.columns.tolist() if df_few is not None else self.columns
+        return few_shot_text, alm_format_columns
+
+    def normalize_case(self, obj, alm_format_columns):
+        return {c: obj.get(c,"") if isinstance(obj, dict) else "" for c in alm_format_columns}
+
+    def generate_full_pipeline(self, typed_requirements=None, uploaded_files=None, alm_inputs=None, alm_tool="jira", external_prompt=None, progress=None, sharded=None, report=None, use_cache=True, previous=None, reuse_first=None):
+        """
+        sharded: None follows GEN_SHARD_MODE, True/False force fan-out generation on/off.
+        use_cache: False bypasses the LLM response cache for this run.
+        report: optional dict filled with run details (the dedup summary and per-stage timings).
+        previous: case groups saved for an earlier session (incremental.load_case_groups). Only
+            added or changed requirements go to the model; unchanged ones reuse their reviewed
+            cases, and the returned raw cases are only the newly generated ones.
+        reuse_first: take the cases of close matches from the case library and only generate
+            for the rest (None follows CASE_LIBRARY_REUSE_FIRST).
+        """
+        import pandas as pd
+        report = report if report is not None else {}
+        timings = stage_timings(report)
+        typed_requirements = typed_requirements or []
+        uploaded_files = uploaded_files or []
+        alm_inputs = alm_inputs or {}
+
+        alm_items, alm_inputs = ([], alm_inputs) if external_prompt else self.fetch_alm_items(alm_inputs, report)
+        prompt_for_rag = (" ".join(typed_requirements) or external_prompt or " ".join(i["title"] for i in alm_items)
+                          or "healthcare requirements")
+        few_shot_text, alm_format_columns = self.load_format(alm_tool, report, prompt_for_rag)
+        units = [] if external_prompt else self.build_units(typed_requirements, uploaded_files, alm_inputs, alm_items=alm_items)
 
-        raw_text = self.generate_with_gemini_safe(user_prompt, alm_format_columns, relevant_docs_text, few_shot_text)
-        parsed_cases, used_text = self.parse_generator_output_safe(raw_text)
+        reused, units_to_generate = self.plan_reuse(units, alm_tool, alm_format_columns, previous, reuse_first, report)
+        if reused is not None:
+            if not units_to_generate:
+                cases, case_fps = assemble(units, reused, {})
+                record_fingerprints(report, units, case_fps, reused)
+                return [], pd.DataFrame(cases, columns=alm_format_columns), alm_format_columns, ""
+            prompt_for_rag = " ".join(u["text"] for u in units_to_generate if u["kind"] == "requirement") or prompt_for_rag
+            user_prompt = "\n\n".join(u["text"] for u in units_to_generate)
+        else:
+            user_prompt = external_prompt or self.build_user_prompt(typed_requirements, uploaded_files, alm_inputs, alm_items) or prompt_for_rag
+        relevant_docs_text = self.retrieve_context(prompt_for_rag, progress, report)
 
-        # normalize
-        normalized = [{c: obj.get(c,"") if isinstance(obj, dict) else "" for c in alm_format_columns} for obj in parsed_cases]
-        reviewed_list = ai_review_testcases(normalized, alm_format_columns, relevant_docs_text, few_shot_text)
-        df_reviewed = pd.DataFrame(reviewed_list, columns=alm_format_columns)
+        shard_mode = GEN_SHARD_MODE if sharded is None else ("on" if sharded else "off")
+        shards = [u["text"] for u in units_to_generate]
+        use_shards = self.should_shard(shard_mode, shards, user_prompt)
+        if not use_shards:
+            # shards are bounded by GEN_SHARD_MAX_CHARS; a single prompt is cut to the user budget
+            user_prompt, usage = fit_text(user_prompt, PROMPT_USER_TOKENS)
+            record_budget(report, "user", usage)
 
+        with timed_stage("generation", progress, timings):
+            if use_shards:
+                # each shard is parsed inside its worker, so the parse stage only normalizes
+                parsed_cases, used_text = self.generate_sharded(shards, alm_format_columns, relevant_docs_text, few_shot_text, use_cache=use_cache)
+            else:
+                raw_text = self.generate_with_gemini_safe(user_prompt, alm_format_columns, relevant_docs_text, few_shot_text, use_cache=use_cache)
+
+        salvage = None
+        with timed_stage("parse", progress, timings):
+            if not use_shards:
+                parsed_cases, used_text, salvage = self.parse_with_salvage(raw_text)
+            # normalize
+            normalized = [self.normalize_case(obj, alm_format_columns) for obj in parsed_cases]
+            if use_shards:
+                normalized = self.renumber_cases(normalized, alm_format_columns)
+
+        if salvage is not None:
+            missing = self.needs_continuation(salvage, len(normalized))
+            if missing:
+                with timed_stage("continuation", timings=timings):
+                    extra, salvage["continuation"] = self.continue_generation(
+                        user_prompt, alm_format_columns, relevant_docs_text, few_shot_text, normalized, missing, use_cache)
+                normalized = self.renumber_cases(normalized + [self.normalize_case(o, alm_format_columns) for o in extra], alm_format_columns)
+            record_salvage(report, "generation", salvage)
+
+        unique_cases = self.dedup_cases(normalized, alm_format_columns, progress, report)
+        df_reviewed = self.review_cases(unique_cases, alm_format_columns, relevant_docs_text, few_shot_text, progress, use_cache, report)
+        if reused is not None:
+            df_reviewed = self.merge_incremental(df_reviewed, units, units_to_generate, reused, alm_format_columns, report)
+        elif units:
+            record_fingerprints(report, units, attribute_cases(df_reviewed.fillna("").to_dict("records"), units, alm_format_columns))
         return normalized, df_reviewed, alm_format_columns, used_text
+
+    def plan_reuse(self, units, alm_tool, alm_format_columns, previous, reuse_first, report):
+        """
+        (reused groups, units still to generate). With `previous`, unchanged units keep their saved
+        cases; with reuse-first, close case-library matches are reused too. reused is None when
+        neither applies and the whole input goes to the model.
+        """
+        reused = None
+        units_to_generate = units
+        if previous is not None and units:
+            groups = matching_groups(previous, alm_tool, alm_format_columns) or {}
+            reused, units_to_generate, report["incremental"] = plan_units(units, groups)
+            LOG.info("Incremental run: %s", report["incremental"])
+        if (CASE_LIBRARY_REUSE_FIRST if reuse_first is None else reuse_first) and units_to_generate:
+            reused = reused if reused is not None else {}
+            units_to_generate = self.reuse_from_library(units_to_generate, alm_tool, alm_format_columns, reused, report)
+        return reused, units_to_generate
+
+    def reuse_from_library(self, units, alm_tool, alm_format_columns, reused, report):
+        """
+        Reuse-first: units whose closest library requirement is at least CASE_LIBRARY_THRESHOLD
+        similar take that requirement's cases (added to `reused`). Returns the units still to generate.
+        """
+        library = get_case_library()
+        id_col = next((c for c in alm_format_columns if str(c).strip().lower() in ID_COLUMNS), None)
+        remaining, matched = [], 0
+        with timed_stage("library", timings=stage_timings(report)):
+            for n, u in enumerate(units):
+                if u["kind"] == "alm_inputs":
+                    remaining.append(u)
+                    continue
+                try:
+                    cases, _ = library.match_requirement(u["text"], alm_tool, alm_format_columns)
+                except Exception as e:
+                    LOG.warning("Case library lookup failed, generating the remaining requirements: %s", e)
+                    remaining.extend(units[n:])
+                    break
+                if cases:
+                    continue_numbering([c for group in reused.values() for c in group], cases, id_col)
+                    reused[u["fingerprint"]] = cases
+                    matched += 1
+                else:
+                    remaining.append(u)
+        report["library"] = {"checked": len(units), "reused": matched, "generated": len(remaining),
+                             "threshold": CASE_LIBRARY_THRESHOLD}
+        LOG.info("Case library reuse: %s", report["library"])
+        return remaining
+
+    def merge_incremental(self, df_reviewed, units, generated_units, reused, alm_format_columns, report):
+        """Reviewed cases of the regenerated units merged with the reused ones, in requirement order."""
+        import pandas as pd
+        new_cases = df_reviewed.fillna("").to_dict("records")
+        id_col = next((c for c in alm_format_columns if str(c).strip().lower() in ID_COLUMNS), None)
+        continue_numbering([c for group in reused.values() for c in group], new_cases, id_col)
+        regenerated = group_cases(new_cases, attribute_cases(new_cases, generated_units, alm_format_columns))
+        cases, case_fps = assemble(units, reused, regenerated)
+        record_fingerprints(report, units, case_fps, reused)
+        return pd.DataFrame(cases, columns=alm_format_columns)
+
+    def dedup_cases(self, normalized, alm_format_columns, progress=None, report=None):
+        # drop exact/near duplicates locally so the reviewer prompt only carries distinct cases
+        with timed_stage("dedup", progress, stage_timings(report)):
+            unique_cases, dedup_report = dedup_testcases(normalized, alm_format_columns)
+        if report is not None:
+            report["dedup"] = dedup_report
+        return unique_cases
+
+    def review_cases(self, unique_cases, alm_format_columns, relevant_docs_text, few_shot_text, progress=None, use_cache=True, report=None):
+        import pandas as pd
+        with timed_stage("review", progress, stage_timings(report)):
+            reviewed_list = ai_review_testcases(unique_cases, alm_format_columns, relevant_docs_text, few_shot_text, use_cache=use_cache, report=report)
+            df_reviewed = pd.DataFrame(reviewed_list, columns=alm_format_columns)
+        return df_reviewed
+
+    def stream_full_pipeline(self, typed_requirements=None, uploaded_files=None, alm_inputs=None, alm_tool="jira", progress=None, report=None, use_cache=True, previous=None, reuse_first=None):
+        """
+        Streaming variant of generate_full_pipeline (single prompt, no sharding). Yields
+        ("columns", columns), then ("testcase", case) as soon as each object of the model's
+        streamed JSON array is complete, ("generated", {count, dedup}) once generation and dedup
+        are done, then ("result", (normalized, df_reviewed, columns, raw_text)) after the review.
+        previous, reuse_first: as for generate_full_pipeline; the reused cases are yielded at once as
+            ("reused", cases), before any model call, and only the other units are streamed from the model.
+        """
+        import pandas as pd
+        report = report if report is not None else {}
+        timings = stage_timings(report)
+        typed_requirements = typed_requirements or []
+        uploaded_files = uploaded_files or []
+        alm_inputs = alm_inputs or {}
+
+        alm_items, alm_inputs = self.fetch_alm_items(alm_inputs, report)
+        prompt_for_rag = " ".join(typed_requirements) or " ".join(i["title"] for i in alm_items) or "healthcare requirements"
+        few_shot_text, alm_format_columns = self.load_format(alm_tool, report, prompt_for_rag)
+        yield "columns", alm_format_columns
+
+        units = self.build_units(typed_requirements, uploaded_files, alm_inputs, alm_items=alm_items)
+        reused, units_to_generate = self.plan_reuse(units, alm_tool, alm_format_columns, previous, reuse_first, report)
+        id_col = next((c for c in alm_format_columns if str(c).strip().lower() in ID_COLUMNS), None)
+        # generated cases are numbered after these as they are sent; None keeps the model's ids
+        numbered_after = None
+        if reused is not None:
+            numbered_after, case_fps = assemble(units, reused, {})
+            yield "reused", numbered_after
+            if not units_to_generate:
+                record_fingerprints(report, units, case_fps, reused)
+                yield "generated", {"count": 0, "dedup": None}
+                yield "result", ([], pd.DataFrame(numbered_after, columns=alm_format_columns), alm_format_columns, "")
+                return
+            prompt_for_rag = " ".join(u["text"] for u in units_to_generate if u["kind"] == "requirement") or prompt_for_rag
+            user_prompt = "\n\n".join(u["text"] for u in units_to_generate)
+        else:
+            user_prompt = self.build_user_prompt(typed_requirements, uploaded_files, alm_inputs, alm_items) or prompt_for_rag
+        relevant_docs_text = self.retrieve_context(prompt_for_rag, progress, report)
+
+        user_prompt, usage = fit_text(user_prompt, PROMPT_USER_TOKENS)
+        record_budget(report, "user", usage)
+        meta_prompt = self.build_prompt(user_prompt, alm_format_columns, few_shot_text, relevant_docs_text)
+
+        parser = JsonArrayStreamParser()
+        parts, normalized = [], []
+        with timed_stage("generation", progress, timings):
+            for text in stream_with_gemini(meta_prompt, use_cache=use_cache):
+                parts.append(text)
+                for obj in parser.feed(text):
+                    case = self.normalize_case(obj, alm_format_columns)
+                    if numbered_after is not None:
+                        continue_numbering(numbered_after + normalized, [case], id_col)
+                    normalized.append(case)
+                    yield "testcase", case
+        raw_text = "".join(parts)
+
+        with timed_stage("parse", progress, timings):
+            if not normalized:
+                # not a well-formed stream of objects; fall back to the whole-text parser
+                parsed_cases, raw_text = self.parse_generator_output_safe(raw_text)
+                normalized = [self.normalize_case(obj, alm_format_columns) for obj in parsed_cases]
+                if numbered_after is not None:
+                    continue_numbering(numbered_after, normalized, id_col)
+                fallback = normalized
+            else:
+                fallback = []
+                if parser.errors:
+                    LOG.warning("Skipped %d undecodable objects in streamed output", len(parser.errors))
+        for case in fallback:
+            yield "testcase", case
+
+        if normalized and not fallback and not parser.finished:
+            # the stream was cut off before the closing ']': request only the missing cases
+            salvage = {"complete": False, "recovered": len(normalized), "repaired": parser.repaired,
+                       "dropped": len(parser.errors), "truncated_chars": len(parser.pending)}
+            missing = self.needs_continuation(salvage, len(normalized))
+            if missing:
+                with timed_stage("continuation", timings=timings):
+                    extra, salvage["continuation"] = self.continue_generation(
+                        user_prompt, alm_format_columns, relevant_docs_text, few_shot_text, normalized, missing, use_cache)
+                for obj in extra:
+                    # number each case before it is sent, after the ids already streamed, so the
+                    # ids shown live are the ones reviewed and saved
+                    case = self.normalize_case(obj, alm_format_columns)
+                    continue_numbering((numbered_after or []) + normalized, [case], id_col)
+                    normalized.append(case)
+                    yield "testcase", case
+            record_salvage(report, "generation", salvage)
+
+        unique_cases = self.dedup_cases(normalized, alm_format_columns, progress, report)
+        yield "generated", {"count": len(normalized), "dedup": report["dedup"]}
+        df_reviewed = self.review_cases(unique_cases, alm_format_columns, relevant_docs_text, few_shot_text, progress, use_cache, report)
+        if reused is not None:
+            df_reviewed = self.merge_incremental(df_reviewed, units, units_to_generate, reused, alm_format_columns, report)
+        else:
+            record_fingerprints(report, units, attribute_cases(df_reviewed.fillna("").to_dict("records"), units, alm_format_columns))
+        yield "result", (normalized, df_reviewed, alm_format_columns, raw_text)
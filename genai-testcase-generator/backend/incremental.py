@@ -0,0 +1,151 @@
+# backend/incremental.py
+"""
+Incremental regeneration: every requirement, uploaded-document section, fetched ALM work
+item and the remaining ALM inputs block is a unit with a content fingerprint. A session remembers which reviewed
+test cases came from which fingerprint; a resubmission that names that session only
+sends added or changed units to the model, reuses the cases of unchanged ones and
+drops the cases of units that are gone.
+
+Fingerprints hash the unit kind and its whitespace/case-normalized text, so reordering
+requirements or reformatting them does not force regeneration. Reviewed cases are
+attributed back to the unit whose text shares the most terms with them, since the
+reviewer may merge, rewrite or add cases.
+"""
+import os
+import re
+import json
+import hashlib
+import math
+import logging
+from utils import atomic_write
+from bm25 import tokenize
+
+LOG = logging.getLogger("incremental")
+LOG.setLevel(logging.INFO)
+
+CASE_GROUPS_FILE = "case_groups.json"
+WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def fingerprint(kind, text):
+    normalized = " ".join(WORD_RE.findall(text.lower()))
+    return hashlib.sha256(f"{kind}\0{normalized}".encode("utf-8")).hexdigest()[:20]
+
+
+def make_unit(kind, text, prompt_text):
+    """A generation unit: prompt_text is what the model sees, text is what the fingerprint covers."""
+    return {"fingerprint": fingerprint(kind, text), "kind": kind, "text": prompt_text}
+
+
+def plan_units(units, previous):
+    """
+    Split units against a previous {fingerprint: [cases]} map.
+    Returns (reused {fingerprint: [cases]}, changed [unit], summary dict).
+    """
+    reused, changed, seen = {}, [], set()
+    for u in units:
+        fp = u["fingerprint"]
+        if fp in seen:
+            continue
+        seen.add(fp)
+        if fp in previous:
+            reused[fp] = previous[fp]
+        else:
+            changed.append(u)
+    summary = {
+        "requirements": len(seen),
+        "reused": len(reused),
+        "regenerated": len(changed),
+        "removed": len(set(previous) - seen),
+        "reused_cases": sum(len(c) for c in reused.values()),
+    }
+    return reused, changed, summary
+
+
+def attribute_cases(cases, units, columns):
+    """Fingerprint of the unit each case most likely came from (term overlap, normalized for unit length)."""
+    if not units:
+        return []
+    unit_terms = [set(tokenize(u["text"])) for u in units]
+    out = []
+    for case in cases:
+        terms = set(tokenize(" ".join(str(case.get(c, "")) for c in columns)))
+        scores = [len(terms & ut) / math.sqrt(len(ut) or 1) for ut in unit_terms]
+        best = max(range(len(units)), key=lambda i: (scores[i], -i))
+        out.append(units[best]["fingerprint"])
+    return out
+
+
+def continue_numbering(reused_cases, new_cases, id_col):
+    """Number new cases after the highest TC id of the reused ones, so reused ids stay stable."""
+    if id_col is None:
+        return new_cases
+    numbers = [int(m.group()) for c in reused_cases for m in [re.search(r"\d+", str(c.get(id_col, "")))] if m]
+    start = max(numbers, default=0) + 1
+    for n, case in enumerate(new_cases, start=start):
+        case[id_col] = f"TC{n:03d}"
+    return new_cases
+
+
+def group_cases(cases, fingerprints):
+    groups = {}
+    for case, fp in zip(cases, fingerprints):
+        groups.setdefault(fp, []).append(case)
+    return groups
+
+
+def assemble(units, reused, regenerated):
+    """Cases in unit order (reused or freshly generated), and the fingerprint of each."""
+    cases, fingerprints, seen = [], [], set()
+    for u in units:
+        fp = u["fingerprint"]
+        if fp in seen:
+            continue
+        seen.add(fp)
+        group = reused.get(fp, regenerated.get(fp, []))
+        cases.extend(group)
+        fingerprints.extend([fp] * len(group))
+    return cases, fingerprints
+
+
+def record_fingerprints(report, units, case_fingerprints, reused=()):
+    """
+    Keep every unit's fingerprint (some get no cases), the fingerprint of each reviewed case
+    and the units whose cases were reused rather than generated in the run report.
+    """
+    report["fingerprints"] = {"units": [u["fingerprint"] for u in units], "cases": case_fingerprints,
+                              "texts": {u["fingerprint"]: u["text"] for u in units}, "reused": sorted(reused)}
+
+
+def save_case_groups(path, alm_tool, columns, cases, fingerprints):
+    """Write {fingerprint: [cases]} for a session; fingerprints is the run report entry of record_fingerprints."""
+    groups = {fp: [] for fp in fingerprints["units"]}
+    groups.update(group_cases(cases, fingerprints["cases"]))
+    payload = {"alm_tool": alm_tool, "columns": list(columns), "groups": groups, "texts": fingerprints.get("texts", {})}
+
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+    atomic_write(path, write)
+
+
+def load_case_groups(path):
+    """The case groups saved for a session ({alm_tool, columns, groups}), or None when unreadable."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        LOG.warning("Could not read case groups %s: %s", path, e)
+        return None
+
+
+def matching_groups(previous, alm_tool, columns):
+    """{fingerprint: [cases]} of a previous run, or None when it was made for another ALM format."""
+    if not previous:
+        return None
+    if previous.get("alm_tool") != alm_tool or previous.get("columns") != list(columns):
+        LOG.info("Previous session used a different ALM format; regenerating everything")
+        return None
+    return previous.get("groups") or {}
@@ -1,43 +1,181 @@
 # frontend/input_handler.py
 import io
-import docx
-import PyPDF2
+import os
+import hashlib
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+LOG = logging.getLogger("input_handler")
+LOG.setLevel(logging.INFO)
+
+# 🔹 Extraction limits, pool size and cache budget
+EXTRACT_MAX_PAGES = int(os.environ.get("EXTRACT_MAX_PAGES", "300"))
+EXTRACT_MAX_CHARS = int(os.environ.get("EXTRACT_MAX_CHARS", "1000000"))
+EXTRACT_WORKERS = int(os.environ.get("EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_CACHE_MAX_CHARS = int(os.environ.get("EXTRACT_CACHE_MAX_CHARS", "50000000"))
+EXTRACT_START_METHOD = os.environ.get("EXTRACT_START_METHOD", "spawn")
+
+
+def _truncation_note(kind, limit):
+    return f"\n[Truncated: document exceeds the {limit} {kind} extraction limit]"
+
+def _cap(parts, max_chars):
+    """Yield parts until max_chars is reached; the last part is cut to fit."""
+    total = 0
+    for part in parts:
+        if total + len(part) > max_chars:
+            yield part[:max_chars - total]
+            yield _truncation_note("character", max_chars)
+            return
+        total += len(part)
+        yield part
+
+def _pdf_pages(data, max_pages):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    for n, page in enumerate(reader.pages):
+        if n >= max_pages:
+            yield _truncation_note("page", max_pages)
+            return
+        try:
+            t = page.extract_text()
+            if t:
+                yield t + "\n"
+        except Exception:
+            continue
+
+def _docx_paragraphs(data):
+    import docx
+    doc = docx.Document(io.BytesIO(data))
+    for p in doc.paragraphs:
+        yield p.text + "\n"
+
+def extract_text(name, data, max_pages=EXTRACT_MAX_PAGES, max_chars=EXTRACT_MAX_CHARS):
+    """Text of one uploaded file (bytes). Runs in worker processes, so it must stay module-level."""
+    lower = name.lower()
+    try:
+        if lower.endswith(".txt"):
+            parts = [data[:max_chars * 4].decode("utf-8", errors="ignore")]
+        elif lower.endswith(".docx"):
+            parts = _docx_paragraphs(data)
+        elif lower.endswith(".pdf"):
+            parts = _pdf_pages(data, max_pages)
+        else:
+            return ""
+        return "".join(_cap(parts, max_chars)).strip()
+    except Exception as e:
+        return f"[Error reading file: {e}]"
+
+
+class ExtractionCache:
+    """In-process LRU of extracted text keyed by file content hash, bounded by total characters."""
+
+    def __init__(self, max_chars=EXTRACT_CACHE_MAX_CHARS):
+        self.max_chars = max_chars
+        self._entries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key, text):
+        if text.startswith("[Error reading file"):
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = text
+            self._chars += len(text)
+            while self._chars > self.max_chars and self._entries:
+                _, old = self._entries.popitem(last=False)
+                self._chars -= len(old)
+
+
+EXTRACTION_CACHE = ExtractionCache()
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def _get_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS, mp_context=multiprocessing.get_context(EXTRACT_START_METHOD))
+        return _POOL
+
+def _reset_pool():
+    global _POOL
+    with _POOL_LOCK:
+        _POOL = None
+
+def shutdown_extraction_pool():
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.shutdown(wait=True)
+            _POOL = None
+
 
 class InputHandler:
-    def __init__(self):
-        pass
+    def __init__(self, max_pages=EXTRACT_MAX_PAGES, max_chars=EXTRACT_MAX_CHARS, workers=EXTRACT_WORKERS):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.workers = workers
 
     def extract_from_text(self, typed_requirements):
         return {"typed_requirements": typed_requirements}
 
+    def _cache_key(self, name, data):
+        h = hashlib.sha256(data)
+        h.update(f"|{os.path.splitext(name.lower())[1]}|{self.max_pages}|{self.max_chars}".encode("utf-8"))
+        return h.hexdigest()
+
+    def _extract_many(self, jobs):
+        """jobs: list of (name, data). Parses PDF/DOCX in the process pool when there is more than one."""
+        heavy = [i for i, (name, _) in enumerate(jobs) if name.lower().endswith((".pdf", ".docx"))]
+        results = [None] * len(jobs)
+        if self.workers > 1 and len(heavy) > 1:
+            try:
+                pool = _get_pool()
+                futures = {i: pool.submit(extract_text, jobs[i][0], jobs[i][1], self.max_pages, self.max_chars) for i in heavy}
+                for i, fut in futures.items():
+                    results[i] = fut.result()
+            except BrokenProcessPool as e:
+                LOG.warning("Extraction pool failed (%s); falling back to in-process parsing", e)
+                _reset_pool()
+        for i, (name, data) in enumerate(jobs):
+            if results[i] is None:
+                results[i] = extract_text(name, data, self.max_pages, self.max_chars)
+        return results
+
     def extract_from_files(self, uploaded_files):
-        file_results = []
+        file_results, pending = [], []
         for file in uploaded_files:
-            try:
-                name = file.name
-                if name.lower().endswith(".txt"):
-                    content = file.getvalue().decode("utf-8", errors="ignore")
-                elif name.lower().endswith(".docx"):
-                    bio = io.BytesIO(file.getvalue())
-                    doc = docx.Document(bio)
-                    content = "\n".join([p.text for p in doc.paragraphs])
-                elif name.lower().endswith(".pdf"):
-                    bio = io.BytesIO(file.getvalue())
-                    reader = PyPDF2.PdfReader(bio)
-                    pages = []
-                    for page in reader.pages:
-                        try:
-                            t = page.extract_text()
-                            if t:
-                                pages.append(t)
-                        except Exception:
-                            continue
-                    content = "\n".join(pages)
-                else:
-                    content = ""
-            except Exception as e:
-                content = f"[Error reading file: {e}]"
+            name = file.name
+            data = file.getvalue()
+            key = self._cache_key(name, data)
+            content = EXTRACTION_CACHE.get(key)
+            if content is None:
+                pending.append((len(file_results), key, name, data))
             file_results.append({"file_name": name, "content": content})
+        if pending:
+            texts = self._extract_many([(name, data) for _, _, name, data in pending])
+            for (pos, key, _, _), text in zip(pending, texts):
+                EXTRACTION_CACHE.put(key, text)
+                file_results[pos]["content"] = text
         return {"uploaded_files": file_results}
 
     def extract_from_alm(self, alm_inputs):
@@ -0,0 +1,145 @@
+# backend/job_queue.py
+"""
+Bounded background job queue for long-running pipeline calls.
+Jobs run on a fixed-size thread pool; once running + queued jobs reach the
+configured limit, submit() raises QueueFullError so the API can answer 429.
+With a store (a session_store instance shared by the workers) every state change
+is also written there, so get() answers for jobs that run on another worker.
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+LOG = logging.getLogger("job_queue")
+LOG.setLevel(logging.INFO)
+
+JOB_MAX_WORKERS = int(os.environ.get("JOB_MAX_WORKERS", "2"))
+JOB_QUEUE_DEPTH = int(os.environ.get("JOB_QUEUE_DEPTH", "8"))
+JOB_TTL_SECONDS = int(os.environ.get("JOB_TTL_SECONDS", "3600"))
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _now():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+class JobQueue:
+    def __init__(self, max_workers=JOB_MAX_WORKERS, queue_depth=JOB_QUEUE_DEPTH, ttl_seconds=JOB_TTL_SECONDS, store=None):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.ttl_seconds = ttl_seconds
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._finished_at = {}
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, stages=(), **kwargs):
+        """
+        Queue fn(*args, progress=callback, **kwargs). The callback takes (stage, state)
+        with state in {"running", "done"}. Returns the job id.
+        """
+        with self._lock:
+            self._evict_expired()
+            if self._active >= self.max_workers + self.queue_depth:
+                raise QueueFullError(f"Job queue full ({self._active} active, limit {self.max_workers + self.queue_depth})")
+            self._active += 1
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "state": "queued",
+                "created_at": _now(),
+                "started_at": None,
+                "finished_at": None,
+                "stages": {s: {"state": "pending"} for s in stages},
+                "result": None,
+                "error": None,
+            }
+        self._publish(job_id)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _snapshot(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return dict(job, stages={k: dict(v) for k, v in job["stages"].items()})
+
+    def _publish(self, job_id):
+        """Copy the job's current state to the shared store; a store error never fails the job."""
+        if self.store is None:
+            return
+        snapshot = self._snapshot(job_id)
+        if snapshot is None:
+            return
+        try:
+            self.store.put(job_id, snapshot)
+        except Exception as e:
+            LOG.warning("Could not publish job %s: %s", job_id, e)
+
+    def _progress(self, job_id, stage, state):
+        with self._lock:
+            entry = self._jobs[job_id]["stages"].setdefault(stage, {"state": "pending"})
+            entry["state"] = state
+            entry["started_at" if state == "running" else "finished_at"] = _now()
+        self._publish(job_id)
+
+    def _run(self, job_id, fn, args, kwargs):
+        with self._lock:
+            self._jobs[job_id].update(state="running", started_at=_now())
+        self._publish(job_id)
+        try:
+            result = fn(*args, progress=lambda stage, state: self._progress(job_id, stage, state), **kwargs)
+            update = {"state": "succeeded", "result": result}
+        except Exception as e:
+            LOG.exception("Job %s failed", job_id)
+            update = {"state": "failed", "error": str(e)}
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(update, finished_at=_now())
+            for entry in job["stages"].values():
+                if entry["state"] == "running":
+                    entry["state"] = "failed" if update["state"] == "failed" else "done"
+            self._finished_at[job_id] = time.monotonic()
+            self._active -= 1
+        self._publish(job_id)
+
+    def _evict_expired(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        for job_id in [j for j, t in self._finished_at.items() if t < cutoff]:
+            self._finished_at.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+
+    def get(self, job_id):
+        """Job status with a 0..1 progress; jobs of other workers come from the store."""
+        snapshot = self._snapshot(job_id)
+        if snapshot is None and self.store is not None:
+            snapshot = self.store.get(job_id)
+        if snapshot is None:
+            return None
+        stages = snapshot["stages"]
+        done = sum(1 for s in stages.values() if s["state"] == "done")
+        snapshot["progress"] = round(done / len(stages), 2) if stages else (1.0 if snapshot["finished_at"] else 0.0)
+        return snapshot
+
+    def stats(self):
+        with self._lock:
+            states = [j["state"] for j in self._jobs.values()]
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "active": self._active,
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            "succeeded": states.count("succeeded"),
+            "failed": states.count("failed"),
+        }
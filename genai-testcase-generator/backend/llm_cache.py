@@ -0,0 +1,171 @@
+# backend/llm_cache.py
+"""
+Two-tier cache for LLM responses, keyed by sha256(model name + prompt).
+
+- memory: per-process LRU of the most recent responses
+- disk:   one JSON file per key under LLM_CACHE_DIR, shared by all worker processes.
+          Writes are atomic renames; entries expire after LLM_CACHE_TTL_SECONDS and
+          the oldest are evicted once the directory exceeds LLM_CACHE_MAX_BYTES.
+"""
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from utils import ensure_folder, atomic_write
+
+LOG = logging.getLogger("llm_cache")
+LOG.setLevel(logging.INFO)
+
+BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.join(BASE, "llm_cache"))
+LLM_CACHE_MEMORY_ENTRIES = int(os.environ.get("LLM_CACHE_MEMORY_ENTRIES", "256"))
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+SWEEP_EVERY_WRITES = 50
+
+
+def cache_key(model_name, prompt):
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(prompt.encode("utf-8"))
+    return h.hexdigest()
+
+
+class LLMCache:
+    def __init__(self, cache_dir=LLM_CACHE_DIR, memory_entries=LLM_CACHE_MEMORY_ENTRIES,
+                 ttl_seconds=LLM_CACHE_TTL_SECONDS, max_bytes=LLM_CACHE_MAX_BYTES, enabled=LLM_CACHE_ENABLED):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_sweep = 0
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "writes": 0, "evictions": 0}
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def _remember(self, key, created, text):
+        with self._lock:
+            self._memory[key] = (created, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, model_name, prompt):
+        if not self.enabled:
+            return None
+        key = cache_key(model_name, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return entry[1]
+            self._memory.pop(key, None)
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self._count("misses")
+            return None
+        if now - data.get("created", 0) > self.ttl_seconds:
+            self._remove(path)
+            self._count("misses")
+            return None
+        try:
+            os.utime(path)  # mark as recently used for size-based eviction
+        except OSError:
+            pass
+        self._remember(key, data["created"], data["text"])
+        self._count("disk_hits")
+        return data["text"]
+
+    def put(self, model_name, prompt, text):
+        if not self.enabled or not text:
+            return
+        key = cache_key(model_name, prompt)
+        created = time.time()
+        self._remember(key, created, text)
+        path = self._path(key)
+        try:
+            ensure_folder(os.path.dirname(path))
+            def _write(tmp):
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"created": created, "model": model_name, "text": text}, f, ensure_ascii=False)
+            atomic_write(path, _write)
+        except OSError as e:
+            LOG.warning("LLM cache write failed: %s", e)
+            return
+        with self._lock:
+            self.counters["writes"] += 1
+            self._writes_since_sweep += 1
+            sweep = self._writes_since_sweep >= SWEEP_EVERY_WRITES
+            if sweep:
+                self._writes_since_sweep = 0
+        if sweep:
+            self.sweep()
+
+    def note_bypass(self):
+        self._count("bypassed")
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False  # another worker got there first
+
+    def sweep(self):
+        """Drop expired entries, then least recently used ones until under max_bytes."""
+        entries, total, now = [], 0, time.time()
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        evicted = 0
+        entries.sort()
+        for mtime, size, path in entries:
+            if now - mtime <= self.ttl_seconds and total <= self.max_bytes:
+                break
+            if self._remove(path):
+                evicted += 1
+            total -= size
+        # anything newer than the TTL by mtime may still have an old "created"; get() handles those lazily
+        if evicted:
+            self._count("evictions", evicted)
+            LOG.info("LLM cache sweep evicted %d entries", evicted)
+        return evicted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        return stats
+
+
+LLM_CACHE = LLMCache()
@@ -1,13 +1,17 @@
 import os
 import shutil
+import pandas as pd
 import streamlit as st
 
 from components import create_session_folder, tabs_ui
 from input_handler import InputHandler
-from backend_api import generate_testcases_handler, run_backend
+from backend_api import stream_testcases_handler, session_cases_handler, run_backend
+from blob_store import start_upload_janitor
+from exporters import EXPORTS
 
 # 🔹 Start backend in background
 run_backend()
+start_upload_janitor()
 
 st.set_page_config(page_title="Healthcare Testcase Generator", page_icon="🧪", layout="centered")
 
@@ -30,7 +34,8 @@ st.session_state.setdefault('typed_requirements', [])
 st.session_state.setdefault('uploaded_files', [])
 st.session_state.setdefault('alm_inputs', {"Jira": {"tickets": []}, "Polarion": {"items": []}, "Azure DevOps": {"items": []}})
 st.session_state.setdefault('last_session_id', None)
-st.session_state.setdefault('last_preview_html', None)
+st.session_state.setdefault('results_page', 0)
+st.session_state.setdefault('results_query', None)
 st.session_state.setdefault('last_columns', None)
 st.session_state.setdefault('last_file_path', None)
 
@@ -60,26 +65,54 @@ with col1:
             st.session_state.uploaded_files,
             st.session_state.alm_inputs
         )
-        payload = {"username": st.session_state.username, "inputs": request_json}
+        payload = {"username": st.session_state.username, "inputs": request_json,
+                   # resubmissions only regenerate added/changed requirements
+                   "previous_session_id": st.session_state.last_session_id}
         try:
-            # 🔹 Call backend
-            data = generate_testcases_handler(payload)
+            # 🔹 Call backend (streamed: cases show up as the model emits them, review follows)
+            live_status = st.empty()
+            live_table = st.empty()
+            live_cases, data = [], None
+            live_status.info("⏳ Generating test cases...")
+            for event, info in stream_testcases_handler(payload):
+                if event == "reused":
+                    live_cases.extend(info["cases"])
+                    live_status.info(f"♻️ {info['count']} test case(s) reused, generating the rest...")
+                    live_table.dataframe(pd.DataFrame(live_cases), hide_index=True)
+                elif event == "testcase":
+                    live_cases.append(info["case"])
+                    live_status.info(f"⏳ Generated {info['index']} test case(s)...")
+                    live_table.dataframe(pd.DataFrame(live_cases), hide_index=True)
+                elif event == "generated":
+                    live_status.info(f"🔎 {info['count']} test case(s) generated, AI review in progress...")
+                elif event == "done":
+                    data = info
+                elif event == "error":
+                    raise RuntimeError(info["error"])
+            live_status.empty()
+            live_table.empty()
+            if data is None:
+                raise RuntimeError("Backend stream ended without a result")
 
             st.success("✅ Test cases generated and AI-reviewed.")
+            incremental = data.get("incremental")
+            if incremental:
+                st.info(f"♻️ {incremental['reused']} requirement(s) reused, {incremental['regenerated']} regenerated, "
+                        f"{incremental['removed']} removed.")
+            alm_fetch = data.get("alm_fetch")
+            if alm_fetch:
+                st.info(f"🔗 Fetched {alm_fetch['fetched']} of {alm_fetch['requested']} ALM work item(s).")
+                if alm_fetch["failed"] or alm_fetch["unsupported"]:
+                    st.warning("Some ALM references could not be fetched and were passed to the model as given.")
             sid = data.get("session_id")
             st.session_state.last_session_id = sid
-            st.session_state.last_preview_html = data.get("preview_html")
             st.session_state.last_columns = data.get("columns")
             st.session_state.last_file_path = data.get("file_path_reviewed")
-
-            # 🔹 Show preview (first 10 rows)
-            if st.session_state.last_preview_html:
-                st.subheader("Preview (first 10 rows)")
-                st.markdown(st.session_state.last_preview_html, unsafe_allow_html=True)
+            st.session_state.results_page = 0
 
             # 🔹 Download button
             reviewed_file_path = st.session_state.last_file_path
-            if reviewed_file_path and os.path.exists(reviewed_file_path):
+            if reviewed_file_path and EXPORTS.wait(reviewed_file_path):
                 with open(reviewed_file_path, "rb") as f:
                     st.download_button(
                         label="📥 Download Reviewed Excel",
@@ -99,12 +132,41 @@ with col2:
             shutil.rmtree(st.session_state.session_folder, ignore_errors=True)
         for k in [
             'session_folder','username','typed_requirements','uploaded_files',
-            'alm_inputs','username_set','last_session_id','last_preview_html','last_columns','last_file_path'
+            'alm_inputs','username_set','last_session_id','last_columns','last_file_path','results_page','results_query'
         ]:
             if k in st.session_state:
                 del st.session_state[k]
         st.success("✅ Session ended. Refresh the page to start a new session.")
         st.rerun()
 
+# 🔹 Browse results page by page (served from the session's results file)
+RESULTS_PAGE_SIZE = 25
+if st.session_state.last_session_id and st.session_state.last_columns:
+    st.subheader("Results")
+    columns = st.session_state.last_columns
+    f1, f2 = st.columns([2, 1])
+    text = f1.text_input("Search", key="results_text")
+    sort = f2.selectbox("Sort by", [""] + columns, key="results_sort")
+    query = (text, sort)
+    if query != st.session_state.results_query:
+        st.session_state.results_query = query
+        st.session_state.results_page = 0
+    try:
+        page = session_cases_handler(st.session_state.last_session_id, {
+            "offset": st.session_state.results_page * RESULTS_PAGE_SIZE, "limit": RESULTS_PAGE_SIZE,
+            "q": text, "sort": sort})
+        st.dataframe(pd.DataFrame(page["rows"], columns=page["columns"]), hide_index=True)
+        first = page["offset"] + 1 if page["rows"] else 0
+        p1, p2, p3 = st.columns([1, 2, 1])
+        if p1.button("◀ Previous", disabled=st.session_state.results_page == 0):
+            st.session_state.results_page -= 1
+            st.rerun()
+        p2.caption(f"Rows {first}-{page['offset'] + len(page['rows'])} of {page['total']}")
+        if p3.button("Next ▶", disabled=page["offset"] + len(page["rows"]) >= page["total"]):
+            st.session_state.results_page += 1
+            st.rerun()
+    except (LookupError, ValueError) as e:
+        st.warning(f"Results not available: {e}")
+
 st.markdown("---")
 st.info("AI review is performed in backend automatically. Admin portal coming later.")
@@ -0,0 +1,122 @@
+# backend/metrics.py
+"""
+Minimal in-process metrics with Prometheus text exposition (served at /metrics).
+
+timed_stage() wraps one pipeline stage: it reports progress, observes the
+stage duration histogram and adds the elapsed milliseconds to a per-request
+`timings` dict that the API returns. Counters owned by other modules (LLM cache,
+Vertex client) are exported through register_collector() callbacks at scrape time.
+Values are per process; with several gunicorn workers, scrape each worker or sum.
+"""
+import time
+import threading
+from contextlib import contextmanager
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+CHARS_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join('{}="{}"'.format(n, str(v).replace("\\", "\\\\").replace('"', '\\"')) for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames=(), buckets=SECONDS_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames + ('le',), key + ('+Inf',))} {series[-1]}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("tcgen_stage_seconds", "Duration of pipeline stages.", ("stage", "outcome"))
+LLM_PROMPT_CHARS = Histogram("tcgen_llm_prompt_chars", "Characters per prompt sent to Gemini.", ("model",), CHARS_BUCKETS)
+LLM_RESPONSE_CHARS = Histogram("tcgen_llm_response_chars", "Characters per Gemini response.", ("model",), CHARS_BUCKETS)
+REQUESTS = Counter("tcgen_requests_total", "Generation requests handled.", ("endpoint", "outcome"))
+
+_METRICS = [STAGE_SECONDS, LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS, REQUESTS]
+_COLLECTORS = []
+
+
+def register_collector(fn):
+    """fn() -> iterable of (name, type, help, value) sampled at scrape time."""
+    _COLLECTORS.append(fn)
+
+
+@contextmanager
+def timed_stage(stage, progress=None, timings=None):
+    """
+    Time one stage. progress(stage, "running"/"done") is called like report_progress;
+    timings (a dict) accumulates "<stage>_ms". Failed stages are observed with outcome="error".
+    """
+    if progress is not None:
+        progress(stage, "running")
+    t0 = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        elapsed = time.perf_counter() - t0
+        STAGE_SECONDS.observe(elapsed, stage=stage, outcome=outcome)
+        if timings is not None:
+            key = f"{stage}_ms"
+            timings[key] = round(timings.get(key, 0.0) + elapsed * 1000.0, 1)
+    if progress is not None:
+        progress(stage, "done")
+
+
+def render_metrics():
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    for collect in _COLLECTORS:
+        for name, kind, help_text, value in collect():
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,78 @@
+# backend/prompt_budget.py
+"""
+Token budgets for the sections of the generation and review prompts.
+
+Tokens are estimated locally (vertex_ai_client.estimate_tokens, ~4 chars/token).
+RAG chunks and few-shot rows are kept in priority order (best retrieval score
+first, few-shot rows in file order) until their section budget is used up; free
+text is cut at a paragraph boundary. Every fit_* helper returns a usage dict
+(budget, tokens, what was kept and dropped) that ends up in the run report.
+"""
+import os
+from vertex_ai_client import estimate_tokens
+
+PROMPT_RAG_TOKENS = int(os.environ.get("PROMPT_RAG_TOKENS", "2000"))
+PROMPT_FEW_SHOT_TOKENS = int(os.environ.get("PROMPT_FEW_SHOT_TOKENS", "1500"))
+PROMPT_USER_TOKENS = int(os.environ.get("PROMPT_USER_TOKENS", "12000"))
+REVIEW_RAG_TOKENS = int(os.environ.get("REVIEW_RAG_TOKENS", "300"))
+
+TRUNCATION_NOTE = "\n[... {tokens} tokens omitted to fit the prompt budget]"
+
+
+def fit_text(text, budget):
+    """Text cut to `budget` tokens, preferring whole paragraphs. Returns (text, usage)."""
+    total = estimate_tokens(text) if text else 0
+    usage = {"budget": budget, "tokens": total, "input_tokens": total, "truncated": False}
+    if total <= budget:
+        return text, usage
+    max_chars = budget * 4
+    cut = text.rfind("\n\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = text.rfind("\n", 0, max_chars)
+    if cut < max_chars // 2:
+        cut = max_chars
+    kept = text[:cut].rstrip()
+    usage.update(tokens=estimate_tokens(kept), truncated=True)
+    return kept + TRUNCATION_NOTE.format(tokens=total - usage["tokens"]), usage
+
+
+def fit_chunks(chunks, budget, render):
+    """
+    Keep retrieved chunks by priority (lowest score first, see RagIndex.search_chunks) while
+    they fit in `budget`; a chunk that does not fit is skipped so smaller, lower-ranked ones
+    can still be used.
+    Returns (rendered text of the kept chunks in rank order, usage).
+    """
+    ranked = sorted(chunks, key=lambda c: c.get("score", 0.0))
+    kept, dropped, used = [], [], 0
+    for c in ranked:
+        cost = estimate_tokens(render([c]))
+        if used + cost <= budget:
+            kept.append(c)
+            used += cost
+        else:
+            dropped.append(c.get("id"))
+    text = render(kept) if kept else ""
+    usage = {"budget": budget, "tokens": estimate_tokens(text) if text else 0,
+             "kept": [c.get("id") for c in kept], "dropped": dropped}
+    return text, usage
+
+
+def fit_rows(df, budget):
+    """
+    Few-shot examples: the first rows of `df` (file order = priority) whose rendered table
+    fits in `budget`. At least one row is kept, cut to the budget if needed. Returns (text, usage).
+    """
+    if df is None or len(df) == 0:
+        return "", {"budget": budget, "tokens": 0, "kept": 0, "dropped": 0}
+    n, text = 0, ""
+    for rows in range(1, len(df) + 1):
+        candidate = df.head(rows).to_string(index=False)
+        if estimate_tokens(candidate) > budget:
+            break
+        n, text = rows, candidate
+    if n == 0:
+        n = 1
+        text, _ = fit_text(df.head(1).to_string(index=False), budget)
+    usage = {"budget": budget, "tokens": estimate_tokens(text), "kept": n, "dropped": len(df) - n}
+    return text, usage
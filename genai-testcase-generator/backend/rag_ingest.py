@@ -0,0 +1,167 @@
+# backend/rag_ingest.py
+"""
+RAG ingestion: scan rag/ for supported documents, extract text units (paragraphs,
+JSON records, spreadsheet rows, PDF pages) and pack them into bounded-size chunks
+carrying their source metadata.
+"""
+import os
+import re
+import json
+import logging
+
+LOG = logging.getLogger("rag_ingest")
+LOG.setLevel(logging.INFO)
+
+SUPPORTED_EXTENSIONS = (".txt", ".json", ".xlsx", ".pdf", ".docx")
+CHUNK_MAX_CHARS = int(os.environ.get("RAG_CHUNK_CHARS", "1200"))
+CHUNK_OVERLAP_CHARS = int(os.environ.get("RAG_CHUNK_OVERLAP", "150"))
+
+PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n")
+
+
+def iter_corpus_files(rag_dir):
+    """Supported files under rag_dir (recursive), in a stable order."""
+    paths = []
+    for root, dirs, files in os.walk(rag_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in files:
+            if name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith((".", "~$")):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+# =========================
+# Text extraction: each reader yields (section, text) units
+# =========================
+
+def _read_txt(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        text = f.read()
+    for para in PARAGRAPH_SPLIT_RE.split(text):
+        if para.strip():
+            yield "", para.strip()
+
+def _format_value(value):
+    if isinstance(value, list):
+        return "; ".join(_format_value(v) for v in value)
+    if isinstance(value, dict):
+        return ", ".join(f"{k}: {_format_value(v)}" for k, v in value.items())
+    return str(value)
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = [{"key": k, "value": v} for k, v in data.items()]
+    if not isinstance(data, list):
+        data = [data]
+    for i, record in enumerate(data):
+        if isinstance(record, dict):
+            section = str(record.get("story_id") or record.get("id") or f"record {i + 1}")
+            yield section, "\n".join(f"{k}: {_format_value(v)}" for k, v in record.items())
+        else:
+            yield f"record {i + 1}", _format_value(record)
+
+def _read_xlsx(path):
+    import pandas as pd
+    sheets = pd.read_excel(path, sheet_name=None)
+    for sheet, df in sheets.items():
+        df = df.dropna(how="all")
+        for _, row in df.iterrows():
+            cells = [f"{col}: {val}" for col, val in row.items() if pd.notna(val) and str(val).strip()]
+            if cells:
+                yield str(sheet), " | ".join(cells)
+
+def _read_pdf(path):
+    import PyPDF2
+    reader = PyPDF2.PdfReader(path)
+    for n, page in enumerate(reader.pages, start=1):
+        try:
+            text = page.extract_text() or ""
+        except Exception:
+            continue
+        for para in PARAGRAPH_SPLIT_RE.split(text):
+            if para.strip():
+                yield f"page {n}", para.strip()
+
+def _read_docx(path):
+    import docx
+    doc = docx.Document(path)
+    section = ""
+    for p in doc.paragraphs:
+        text = p.text.strip()
+        if not text:
+            continue
+        if p.style is not None and p.style.name.lower().startswith("heading"):
+            section = text
+        yield section, text
+
+READERS = {".txt": _read_txt, ".json": _read_json, ".xlsx": _read_xlsx, ".pdf": _read_pdf, ".docx": _read_docx}
+
+
+# =========================
+# Chunking
+# =========================
+
+def _split_long(text, max_chars, overlap):
+    """Hard-wrap a single oversized unit at whitespace, with overlap between windows."""
+    pieces, start = [], 0
+    while start < len(text):
+        end = min(len(text), start + max_chars)
+        if end < len(text):
+            cut = text.rfind(" ", start + max_chars // 2, end)
+            end = cut if cut > start else end
+        pieces.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [p for p in pieces if p]
+
+def chunk_units(units, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP_CHARS):
+    """Greedily pack consecutive units of the same section into chunks of at most max_chars."""
+    chunks, buf, buf_section = [], [], None
+
+    def flush():
+        if buf:
+            chunks.append((buf_section, "\n\n".join(buf)))
+            buf.clear()
+
+    for section, text in units:
+        parts = _split_long(text, max_chars, overlap) if len(text) > max_chars else [text]
+        for part in parts:
+            size = sum(len(b) + 2 for b in buf)
+            if buf and (section != buf_section or size + len(part) > max_chars):
+                flush()
+            buf_section = section
+            buf.append(part)
+    flush()
+    return chunks
+
+def chunk_file(path, rag_dir, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP_CHARS):
+    source = os.path.relpath(path, rag_dir)
+    reader = READERS.get(os.path.splitext(path)[1].lower())
+    if reader is None:
+        return []
+    try:
+        packed = chunk_units(reader(path), max_chars, overlap)
+    except Exception as e:
+        LOG.warning("Skipping unreadable RAG file %s: %s", source, e)
+        return []
+    return [
+        {"id": f"{source}#{n}", "source": source, "section": section or "", "position": n, "text": text}
+        for n, (section, text) in enumerate(packed)
+    ]
+
+def load_chunks(rag_dir, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP_CHARS):
+    chunks = []
+    for path in iter_corpus_files(rag_dir):
+        chunks.extend(chunk_file(path, rag_dir, max_chars, overlap))
+    return chunks
+
+def format_chunks(chunks):
+    """Render retrieved chunks for a prompt, each tagged with where it came from."""
+    blocks = []
+    for c in chunks:
+        where = c["source"] + (f" — {c['section']}" if c.get("section") else "")
+        blocks.append(f"[{where}]\n{c['text']}")
+    return "\n\n".join(blocks)
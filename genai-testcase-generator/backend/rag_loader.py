@@ -1,11 +1,20 @@
 # backend/rag_loader.py
 import os
 import json
-import pandas as pd
+import glob
+import time
+import hashlib
+import argparse
+import threading
 from pathlib import Path
-from vertex_ai_client import get_embedding_model
+from vertex_ai_client import get_embedding_model, EMBEDDING_MODEL_NAME
+from utils import ensure_folder, atomic_write
+from rag_ingest import iter_corpus_files, load_chunks
+from metrics import timed_stage
+from bm25 import BM25Index, reciprocal_rank_fusion
+from ann_index import choose_index_type, build_index, read_index, write_index
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 import numpy as np
-import faiss
 import logging
 
 LOG = logging.getLogger("rag_loader")
@@ -13,9 +22,23 @@ LOG.setLevel(logging.INFO)
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 RAG_DIR = os.path.join(BASE, "rag")
-Path(RAG_DIR).mkdir(parents=True, exist_ok=True)
+
+# 🔹 Persistent embedding cache + prebuilt index (shared by all processes on the host)
+RAG_CACHE_DIR = os.environ.get("RAG_CACHE_DIR", os.path.join(BASE, "rag_cache"))
+# texts per get_embeddings call (chunks are <= RAG_CHUNK_CHARS, well inside one request's limits)
+EMBED_BATCH_SIZE = int(os.environ.get("RAG_EMBED_BATCH_SIZE", "32"))
+RAG_TOP_K = int(os.environ.get("RAG_TOP_K", "5"))
+# how long a walk of rag/ is trusted before queries look for changed files again
+RAG_SIGNATURE_TTL_SECONDS = float(os.environ.get("RAG_SIGNATURE_TTL_SECONDS", "10"))
+
+# 🔹 Retrieval: vector | lexical | hybrid (BM25 + vector, lexical-only when embedding the query is too slow)
+RAG_RETRIEVAL_MODE = os.environ.get("RAG_RETRIEVAL_MODE", "hybrid").lower()
+RAG_EMBED_DEADLINE_SECONDS = float(os.environ.get("RAG_EMBED_DEADLINE_SECONDS", "2.0"))
+RAG_FUSION_DEPTH = int(os.environ.get("RAG_FUSION_DEPTH", "20"))
+RAG_EMBED_WORKERS = int(os.environ.get("RAG_EMBED_WORKERS", "4"))
 
 def ensure_rag_files_local():
+    Path(RAG_DIR).mkdir(parents=True, exist_ok=True)
     txt_path = os.path.join(RAG_DIR, "healthcare_compliance.txt")
     json_path = os.path.join(RAG_DIR, "req_example.json")
     xlsx_path = os.path.join(RAG_DIR, "traceability_matrix_eg.xlsx")
@@ -33,6 +56,7 @@ def ensure_rag_files_local():
             json.dump(sample, f, indent=2)
 
     if not os.path.exists(xlsx_path):
+        import pandas as pd
         df = pd.DataFrame([{"ReqID":"R1","Requirement":"Authenticate users","Trace":"TC001"}])
         df.to_excel(xlsx_path, index=False)
 
@@ -46,25 +70,308 @@ def load_json(path):
         return json.load(f)
 
 def load_xlsx(path):
+    import pandas as pd
     return pd.read_excel(path).to_string(index=False)
 
+def content_hash(text, model_name=""):
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class EmbeddingStore:
+    """Content-addressed on-disk embedding cache: one .npy per (model, text) hash."""
+
+    def __init__(self, cache_dir=RAG_CACHE_DIR, model_name=EMBEDDING_MODEL_NAME):
+        self.model_name = model_name
+        self.dir = os.path.join(cache_dir, "embeddings", "".join(c if c.isalnum() or c in "-._" else "_" for c in model_name))
+        ensure_folder(self.dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.dir, key[:2], key + ".npy")
+
+    def get(self, key):
+        try:
+            return np.load(self._path(key)).astype("float32")
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LOG.warning("Discarding unreadable cached embedding %s: %s", key, e)
+            return None
+
+    def put(self, key, vec):
+        path = self._path(key)
+        ensure_folder(os.path.dirname(path))
+        def _write(tmp):
+            with open(tmp, "wb") as f:
+                np.save(f, np.asarray(vec, dtype="float32"))
+        atomic_write(path, _write)
+
+    def embed(self, texts, model, batch_size=EMBED_BATCH_SIZE):
+        keys = [content_hash(t, self.model_name) for t in texts]
+        vecs = [self.get(k) for k in keys]
+        missing = [i for i, v in enumerate(vecs) if v is None]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        for start in range(0, len(missing), max(1, batch_size)):
+            batch = missing[start:start + max(1, batch_size)]
+            embeds = model.get_embeddings([texts[i] for i in batch])
+            for i, e in zip(batch, embeds):
+                vecs[i] = np.asarray(e.values, dtype="float32")
+                self.put(keys[i], vecs[i])
+        return np.vstack(vecs).astype("float32")
+
+
+class RagIndex:
+    """
+    Chunk-level FAISS and BM25 indexes over every supported file in rag/. Built once
+    (embeddings from the cache, or the FAISS index loaded prebuilt from disk) and reused
+    until a file in rag/ changes (rag/ is re-checked at most every signature_ttl seconds);
+    queries only embed the query, and lexical retrieval needs no network at all. The FAISS index type follows the corpus size (see
+    ann_index) and is memory-mapped from RAG_CACHE_DIR, shared by all workers.
+    """
+
+    def __init__(self, rag_dir=RAG_DIR, cache_dir=RAG_CACHE_DIR, model=None, model_name=EMBEDDING_MODEL_NAME,
+                 signature_ttl=RAG_SIGNATURE_TTL_SECONDS):
+        self.rag_dir = rag_dir
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.signature_ttl = signature_ttl
+        self.store = EmbeddingStore(cache_dir, model_name)
+        self._model = model
+        self._lock = threading.Lock()
+        self._signature = None
+        self._checked = None  # (monotonic time, signature) of the last walk of rag/
+        self._vector_build = None  # background thread building the vector index for hybrid queries
+        self.chunks = []
+        self.lexical = None
+        self.index = None
+        self.index_type = None
+        self.corpus_key = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = get_embedding_model(self.model_name)
+        return self._model
+
+    def _dir_signature(self):
+        sig = []
+        for path in iter_corpus_files(self.rag_dir):
+            st = os.stat(path)
+            sig.append((os.path.relpath(path, self.rag_dir), st.st_mtime_ns, st.st_size))
+        sig = tuple(sig)
+        self._checked = (time.monotonic(), sig)
+        return sig
+
+    def _current_signature(self):
+        """_dir_signature, walking rag/ again only once the last walk is signature_ttl seconds old."""
+        checked = self._checked
+        if checked is not None and time.monotonic() - checked[0] < self.signature_ttl:
+            return checked[1]
+        return self._dir_signature()
+
+    def _index_path(self, corpus_key, kind):
+        return os.path.join(self.cache_dir, f"index_{corpus_key}_{kind}.faiss")
+
+    def _load_prebuilt(self, corpus_key, kind, expected):
+        path = self._index_path(corpus_key, kind)
+        if not os.path.exists(path):
+            return None
+        try:
+            index = read_index(path)
+        except Exception as e:
+            LOG.warning("Ignoring unreadable prebuilt index %s: %s", path, e)
+            return None
+        return index if index.ntotal == expected else None
+
+    def _save_prebuilt(self, corpus_key, kind, index):
+        """Persist the index and return it re-opened memory-mapped (shared with other workers)."""
+        path = self._index_path(corpus_key, kind)
+        atomic_write(path, lambda tmp: write_index(index, tmp))
+        # unlinking a file another worker still has mapped is safe; it keeps its mapping
+        for old in glob.glob(os.path.join(self.cache_dir, "index_*.faiss")):
+            if old != path:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return read_index(path)
+
+    def _is_fresh(self, signature, vector):
+        return signature == self._signature and (self.index is not None or not vector)
+
+    def _build(self, signature, force=False, vector=True):
+        if force or signature != self._signature:
+            chunks = load_chunks(self.rag_dir)
+            if not chunks:
+                raise RuntimeError(f"No indexable documents found in {self.rag_dir}")
+            texts = [c["text"] for c in chunks]
+            # the lexical index needs no embeddings, so it is usable before (or without) the vector index
+            self.chunks, self.lexical, self.index = chunks, BM25Index(texts), None
+            self.corpus_key = content_hash("\n".join(content_hash(t) for t in texts), self.model_name)
+            self._signature = signature
+        if not vector or self.index is not None:
+            return
+        texts = [c["text"] for c in self.chunks]
+        kind = choose_index_type(len(texts))
+        index = None if force else self._load_prebuilt(self.corpus_key, kind, len(texts))
+        if index is None:
+            vecs = self.store.embed(texts, self.model)
+            index = self._save_prebuilt(self.corpus_key, kind, build_index(vecs, kind))
+            LOG.info("Built %s RAG index: %d chunks from %d files (cache hits=%d misses=%d)",
+                     kind, len(texts), len(signature), self.store.hits, self.store.misses)
+        else:
+            LOG.info("Loaded prebuilt %s RAG index: %d chunks from %d files", kind, len(texts), len(signature))
+        self.index_type = kind
+        self.index = index
+
+    def ensure_fresh(self, vector=True):
+        """Reload chunks if rag/ changed; vector=False skips building the FAISS index (lexical only)."""
+        signature = self._current_signature()
+        if self._is_fresh(signature, vector):
+            return self
+        with self._lock:
+            if not self._is_fresh(signature, vector):
+                self._build(signature, vector=vector)
+        return self
+
+    def rebuild(self):
+        with self._lock:
+            self._build(self._dir_signature(), force=True)
+        return self
+
+    def build_vector_in_background(self):
+        """Start building the vector index off the request path, unless a build is already running."""
+        with self._lock:
+            if self._vector_build is not None and self._vector_build.is_alive():
+                return
+            self._vector_build = threading.Thread(target=warm_rag_index, args=(self,), name="rag-vector-build",
+                                                  daemon=True)
+            self._vector_build.start()
+
+    def _vector_search(self, query, depth):
+        """[(chunk index, L2 distance)] nearest first, from the index as it is (call ensure_fresh first)."""
+        chunks, index = self.chunks, self.index
+        if index is None or index.ntotal != len(chunks):
+            raise RuntimeError("RAG vector index is being rebuilt")
+        qemb = self.model.get_embeddings([query])[0].values
+        qvec = np.array([qemb]).astype("float32")
+        distances, indices = index.search(qvec, min(depth, len(chunks)))
+        return [(int(i), float(d)) for d, i in zip(distances[0], indices[0]) if 0 <= i < len(chunks)]
+
+    def _vector_search_within(self, query, depth, deadline):
+        """_vector_search bounded by `deadline` seconds; None when it is too slow or fails (it keeps running)."""
+        future = _embed_pool().submit(self._vector_search, query, depth)
+        try:
+            return future.result(timeout=deadline if deadline > 0 else None)
+        except FutureTimeout:
+            LOG.warning("Query embedding exceeded %.2fs; serving lexical results", deadline)
+        except Exception as e:
+            LOG.warning("Vector retrieval failed (%s); serving lexical results", e)
+        return None
+
+    def search_chunks(self, query, k=1, mode=None):
+        """
+        Top-k chunk dicts (id, source, section, position, text) best first, each with a
+        "score" (lower is better: L2 distance for vector results, the negated BM25 or fused
+        score otherwise) and the "retriever" that produced it. mode: vector | lexical |
+        hybrid (BM25 + vector fused by reciprocal rank; lexical only if the vector side
+        misses RAG_EMBED_DEADLINE_SECONDS). Defaults to RAG_RETRIEVAL_MODE. Only the query
+        embedding runs under the deadline: while the vector index is missing (cold start,
+        changed corpus) hybrid answers lexically and the index is built in the background.
+        """
+        mode = (mode or RAG_RETRIEVAL_MODE).lower()
+        if mode == "vector":
+            self.ensure_fresh()
+            return [dict(self.chunks[i], score=d, retriever="vector") for i, d in self._vector_search(query, k)]
+        self.ensure_fresh(vector=False)
+        chunks, lexical = self.chunks, self.lexical
+        depth = max(k, RAG_FUSION_DEPTH)
+        lexical_hits = lexical.search(query, depth)
+        vector_hits = None
+        if mode != "lexical":
+            if self.index is None:
+                self.build_vector_in_background()
+            else:
+                vector_hits = self._vector_search_within(query, depth, RAG_EMBED_DEADLINE_SECONDS)
+        if vector_hits is None:
+            retriever = "lexical" if mode == "lexical" else "lexical_fallback"
+            return [dict(chunks[i], score=-s, retriever=retriever) for i, s in lexical_hits[:k]]
+        fused = reciprocal_rank_fusion([[i for i, _ in vector_hits], [i for i, _ in lexical_hits]])
+        return [dict(chunks[i], score=-s, retriever="hybrid") for i, s in fused[:k]]
+
+    def search(self, query, k=1, mode=None):
+        return [c["text"] for c in self.search_chunks(query, k, mode)]
+
+
+_EMBED_POOL = None
+_EMBED_POOL_LOCK = threading.Lock()
+
+def _embed_pool():
+    """Threads for deadline-bounded query embeddings (a timed-out call finishes in the background)."""
+    global _EMBED_POOL
+    if _EMBED_POOL is None:
+        with _EMBED_POOL_LOCK:
+            if _EMBED_POOL is None:
+                _EMBED_POOL = ThreadPoolExecutor(max_workers=RAG_EMBED_WORKERS, thread_name_prefix="rag-embed")
+    return _EMBED_POOL
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+def get_rag_index():
+    global _INDEX
+    if _INDEX is None:
+        with _INDEX_LOCK:
+            if _INDEX is None:
+                _INDEX = RagIndex()
+    return _INDEX
+
+def warm_rag_index(index=None):
+    """Build/load the (shared) index ahead of the first request. Failures are logged, not raised."""
+    try:
+        (index or get_rag_index()).ensure_fresh()
+    except Exception as e:
+        LOG.warning("RAG index warm-up failed (will retry on first request): %s", e)
+
+def get_relevant_chunks(query, k=RAG_TOP_K, mode=None):
+    with timed_stage("rag_search"):
+        return get_rag_index().search_chunks(query, k, mode)
+
 def get_relevant_docs_local(query, k=1):
-    # load files
-    txt = load_text(os.path.join(RAG_DIR, "healthcare_compliance.txt"))
-    j = load_json(os.path.join(RAG_DIR, "req_example.json"))
-    json_text = " ".join([r.get("requirement","") + " " + " ".join(r.get("testcases",[])) for r in j])
-    xls = load_xlsx(os.path.join(RAG_DIR, "traceability_matrix_eg.xlsx"))
-    all_texts = [json_text, xls, txt]
-
-    # embeddings via vertex embedding model
-    model = get_embedding_model()
-    embeds = model.get_embeddings(all_texts)
-    vecs = np.array([e.values for e in embeds]).astype("float32")
-    dim = vecs.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(vecs)
-    qemb = model.get_embeddings([query])[0].values
-    qvec = np.array([qemb]).astype("float32")
-    distances, indices = index.search(qvec, k)
-    results = [all_texts[i] for i in indices[0] if 0 <= i < len(all_texts)]
-    return results
+    with timed_stage("rag_search"):
+        return get_rag_index().search(query, k)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the local RAG embedding cache and prebuilt index.")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild the index from rag/ (re-embeds only uncached documents)")
+    parser.add_argument("--clear-cache", action="store_true", help="delete cached embeddings and indexes first")
+    parser.add_argument("--query", help="run a retrieval against the index")
+    parser.add_argument("-k", type=int, default=RAG_TOP_K)
+    parser.add_argument("--mode", choices=("vector", "lexical", "hybrid"), default=RAG_RETRIEVAL_MODE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    if args.clear_cache:
+        import shutil
+        shutil.rmtree(RAG_CACHE_DIR, ignore_errors=True)
+        LOG.info("Cleared %s", RAG_CACHE_DIR)
+    ensure_rag_files_local()
+    rag = get_rag_index()
+    if args.rebuild or args.clear_cache:
+        rag.rebuild()
+    if args.query:
+        for c in rag.search_chunks(args.query, args.k, args.mode):
+            print("-" * 60)
+            print(f"{c['id']}  score={c['score']:.4f}  ({c['retriever']})")
+            print(c["text"][:500])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# backend/results_store.py
+"""
+Paged queries over a session's (or bulk run's) reviewed test cases, read straight from
+the results file instead of loading every row.
+
+Results are stored as Parquet (RESULTS_FORMAT, written by the export writers in
+EXPORT_BATCH_ROWS row groups). A query only reads the columns it filters or sorts on,
+one row group at a time, keeping just the matching row numbers and sort keys; the
+page itself is then read from the row groups that hold it, projected to the requested
+columns. Without pyarrow the results are JSON Lines and the same query runs line by line.
+
+    query_results(path, offset=0, limit=50, columns=["summary"], text="login", sort="summary", descending=False)
+"""
+import os
+import json
+import bisect
+import logging
+
+LOG = logging.getLogger("results_store")
+LOG.setLevel(logging.INFO)
+
+try:
+    import pyarrow.parquet as pq
+    RESULTS_FORMAT = "parquet"
+except ImportError:
+    pq = None
+    RESULTS_FORMAT = "jsonl"
+
+RESULTS_DEFAULT_LIMIT = int(os.environ.get("RESULTS_DEFAULT_LIMIT", "50"))
+RESULTS_MAX_LIMIT = int(os.environ.get("RESULTS_MAX_LIMIT", "500"))
+PRIORITY_RANK = {"critical": 0, "highest": 0, "high": 1, "medium": 2, "low": 3, "lowest": 4}
+
+
+class ParquetResults:
+    def __init__(self, path):
+        self.file = pq.ParquetFile(path)
+        self.columns = self.file.schema_arrow.names
+        self.num_rows = self.file.metadata.num_rows
+        self.group_rows = [self.file.metadata.row_group(g).num_rows for g in range(self.file.num_row_groups)]
+        self.group_starts = [sum(self.group_rows[:g]) for g in range(len(self.group_rows))]
+
+    def scan(self, columns):
+        """(first row number, {column: values}) per row group, reading only `columns`."""
+        for g, start in enumerate(self.group_starts):
+            table = self.file.read_row_group(g, columns=columns)
+            yield start, {c: table.column(c).to_pylist() for c in columns}
+
+    def fetch(self, rows, columns):
+        """Rows by number (in the given order), reading only the row groups that hold them."""
+        wanted = {}
+        for pos, row in enumerate(rows):
+            g = bisect.bisect_right(self.group_starts, row) - 1
+            wanted.setdefault(g, []).append((pos, row - self.group_starts[g]))
+        out = [None] * len(rows)
+        for g, items in wanted.items():
+            table = self.file.read_row_group(g, columns=columns).take([local for _, local in items])
+            for (pos, _), record in zip(items, table.to_pylist()):
+                out[pos] = record
+        return out
+
+
+class JsonlResults:
+    def __init__(self, path):
+        self.path = path
+        self.offsets = []
+        with open(path, "rb") as f:
+            pos = 0
+            for line in f:
+                if line.strip():
+                    self.offsets.append(pos)
+                pos += len(line)
+        self.num_rows = len(self.offsets)
+        self.columns = list(self._read(0).keys()) if self.offsets else []
+
+    def _read(self, row, f=None):
+        if f is None:
+            with open(self.path, "rb") as f:
+                return self._read(row, f)
+        f.seek(self.offsets[row])
+        return json.loads(f.readline())
+
+    def scan(self, columns):
+        with open(self.path, "rb") as f:
+            for row, line in enumerate(line for line in f if line.strip()):
+                record = json.loads(line)
+                yield row, {c: [record.get(c)] for c in columns}
+
+    def fetch(self, rows, columns):
+        with open(self.path, "rb") as f:
+            return [{c: r.get(c) for c in columns} for r in (self._read(row, f) for row in rows)]
+
+
+def open_results(path):
+    return ParquetResults(path) if path.endswith(".parquet") else JsonlResults(path)
+
+
+def _column(name, columns):
+    """Exact or case-insensitive column name; ValueError when it does not exist."""
+    if name in columns:
+        return name
+    match = next((c for c in columns if c.lower() == str(name).lower()), None)
+    if match is None:
+        raise ValueError(f"Unknown column {name!r} (columns: {', '.join(columns)})")
+    return match
+
+
+def _sort_key(value, column):
+    text = "" if value is None else str(value)
+    if column.lower() == "priority":
+        return (PRIORITY_RANK.get(text.strip().lower(), len(PRIORITY_RANK)), text.lower())
+    return (0, text.lower())
+
+
+def query_results(path, offset=0, limit=RESULTS_DEFAULT_LIMIT, columns=None, text=None, sort=None, descending=False):
+    """
+    One page of result rows: {"total": rows matching the filter, "offset", "limit", "columns",
+    "rows": [dict]}. text is a case-insensitive substring of any column, sort orders by one
+    column (a Priority column by rank). Unknown columns raise ValueError.
+    """
+    results = open_results(path)
+    offset = max(0, int(offset))
+    limit = max(0, min(RESULTS_MAX_LIMIT, int(limit)))
+    projected = [_column(c, results.columns) for c in columns] if columns else results.columns
+    sort_col = _column(sort, results.columns) if sort else None
+
+    if not (text or sort_col):
+        rows = list(range(offset, min(offset + limit, results.num_rows)))
+        total = results.num_rows
+    else:
+        scan_cols = list(dict.fromkeys((results.columns if text else []) + ([sort_col] if sort_col else [])))
+        needle = (text or "").lower()
+        matched, keys = [], []
+        for start, values in results.scan(scan_cols):
+            n = len(values[scan_cols[0]])
+            for i in range(n):
+                if needle and not any(needle in str(values[c][i] or "").lower() for c in results.columns):
+                    continue
+                matched.append(start + i)
+                if sort_col:
+                    keys.append(_sort_key(values[sort_col][i], sort_col))
+        if sort_col:
+            order = sorted(range(len(matched)), key=lambda j: keys[j], reverse=descending)
+            matched = [matched[j] for j in order]
+        total = len(matched)
+        rows = matched[offset:offset + limit]
+    return {"total": total, "offset": offset, "limit": limit, "columns": projected,
+            "rows": results.fetch(rows, projected) if rows else []}
@@ -2,11 +2,17 @@
 import json
 import logging
 from vertex_ai_client import generate_with_gemini
+from prompt_budget import fit_text, REVIEW_RAG_TOKENS
+from stream_parser import salvage_json_array
+from dedup import ID_COLUMNS
 
 LOG = logging.getLogger("reviewer")
 LOG.setLevel(logging.INFO)
 
-def build_review_prompt(test_cases_list, columns, rag_text="", few_shot_text=""):
+def build_review_prompt(test_cases_list, columns, rag_text="", few_shot_text="", budget_usage=None):
+    rag_text, usage = fit_text(rag_text, REVIEW_RAG_TOKENS)
+    if budget_usage is not None:
+        budget_usage["review_rag"] = usage
     cases_json = json.dumps(test_cases_list, indent=2, ensure_ascii=False)
     cols = ", ".join([f'"{c}"' for c in columns])
     prompt = f"""
@@ -14,10 +20,10 @@ You are an expert QA reviewer for healthcare systems. You will receive a JSON ar
 Each test case has keys: {cols}.
 
 Tasks (perform all):
-1. Remove exact duplicates.
+1. Merge test cases that cover the same scenario (exact duplicates were already removed).
 2. Identify missing negative or security scenarios and add up to 3 suggested test cases (if applicable).
 3. Ensure fields are non-empty where possible (fill brief suggestions if empty).
-4. Check alignment to compliance items in the following context (if provided): {rag_text[:1000]}
+4. Check alignment to compliance items in the following context (if provided): {rag_text}
 5. Produce a cleaned JSON array of objects using the same keys. For any added test case, generate a TestCaseID (prefix REV-XXXX).
 
 Input test cases:
@@ -30,11 +36,29 @@ Return only valid JSON array (no commentary).
 """
     return prompt
 
-def ai_review_testcases(test_cases_list, columns, rag_text="", few_shot_text=""):
-    prompt = build_review_prompt(test_cases_list, columns, rag_text, few_shot_text)
+def merge_partial_review(original_cases, reviewed_cases, columns):
+    """
+    A reply cut off mid-array covers only the first cases: keep what was reviewed and append
+    the original cases after the last original ID the reviewer returned.
+    """
+    id_col = next((c for c in columns if str(c).strip().lower() in ID_COLUMNS), None)
+    if id_col is None:
+        return reviewed_cases + original_cases[len(reviewed_cases):]
+    seen = {str(r.get(id_col, "")) for r in reviewed_cases if isinstance(r, dict)}
+    last = max((i for i, c in enumerate(original_cases) if str(c.get(id_col, "")) in seen), default=-1)
+    return reviewed_cases + original_cases[last + 1:]
+
+def ai_review_testcases(test_cases_list, columns, rag_text="", few_shot_text="", use_cache=True, report=None):
+    """report: optional run report; gets prompt_budget["review_rag"] and, if the reply had to be salvaged, salvage["review"]."""
+    budget_usage = report.setdefault("prompt_budget", {}) if report is not None else None
+    prompt = build_review_prompt(test_cases_list, columns, rag_text, few_shot_text, budget_usage)
     LOG.info("Sending review prompt to Vertex AI (length=%d)", len(prompt))
     try:
-        raw = generate_with_gemini(prompt)
+        raw = generate_with_gemini(prompt, use_cache=use_cache)
+    except Exception:
+        LOG.exception("AI reviewer failed, returning original cases")
+        return test_cases_list
+    try:
         text = raw.strip()
         if text.startswith("```"):
             parts = text.split("```")
@@ -50,7 +74,16 @@ def ai_review_testcases(test_cases_list, columns, rag_text="", few_shot_text="")
         if not isinstance(result, list):
             raise RuntimeError("Reviewer returned non-list")
         return result
-    except Exception as e:
-        LOG.exception("AI reviewer failed, returning original cases")
-        # fallback: ensure minimal normalization
+    except Exception:
+        pass
+    # truncated or partly malformed reply: keep every complete reviewed case
+    recovered, info = salvage_json_array(raw)
+    if not recovered:
+        LOG.error("AI reviewer output could not be parsed, returning original cases")
         return test_cases_list
+    merged = merge_partial_review(test_cases_list, recovered, columns)
+    info["kept_unreviewed"] = len(merged) - len(recovered)
+    if report is not None:
+        report.setdefault("salvage", {})["review"] = info
+    LOG.warning("Salvaged AI review output: %s", info)
+    return merged
@@ -0,0 +1,201 @@
+# backend/session_store.py
+"""
+Session registry for generated outputs (download paths, columns, prompt).
+
+Two backends share one interface: an in-process LRU ("memory") and a SQLite file
+("sqlite") that every gunicorn worker on the host can read, so a download request
+can land on any worker. Both expire entries after SESSION_TTL_SECONDS, keep at most
+SESSION_MAX_ENTRIES, and delete the session's output folder when it is evicted.
+The job queue reuses the same classes (table "jobs") for async job status.
+"""
+import os
+import json
+import time
+import shutil
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+LOG = logging.getLogger("session_store")
+LOG.setLevel(logging.INFO)
+
+SESSION_STORE = os.environ.get("SESSION_STORE", "sqlite").lower()
+SESSION_TTL_SECONDS = int(os.environ.get("SESSION_TTL_SECONDS", str(24 * 3600)))
+SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", "1000"))
+SESSION_DB_FILE = os.environ.get("SESSION_DB_FILE", "")
+
+
+def remove_output_dir(session):
+    """Default eviction hook: delete the folder holding the session's generated files."""
+    out_dir = session.get("out_dir")
+    if out_dir and os.path.isdir(out_dir):
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+
+class MemorySessionStore:
+    """Per-process store; fine for a single worker or the Streamlit-embedded backend."""
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES, on_evict=remove_output_dir):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # session_id -> (expires_at, session)
+        self._lock = threading.Lock()
+
+    def put(self, session_id, session):
+        with self._lock:
+            self._entries[session_id] = (time.time() + self.ttl_seconds, session)
+            self._entries.move_to_end(session_id)
+            evicted = self._collect()
+        self._evict(evicted)
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._entries[session_id]
+                evicted = [entry[1]]
+            else:
+                return entry[1]
+        self._evict(evicted)
+        return None
+
+    def delete(self, session_id):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry:
+            self._evict([entry[1]])
+
+    def sweep(self):
+        with self._lock:
+            evicted = self._collect()
+        self._evict(evicted)
+        return len(evicted)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _collect(self):
+        # entries are in insertion order, so expired ones and the overflow sit at the front
+        now, evicted = time.time(), []
+        while self._entries:
+            session_id, (expires_at, session) = next(iter(self._entries.items()))
+            if expires_at >= now and len(self._entries) <= self.max_entries:
+                break
+            del self._entries[session_id]
+            evicted.append(session)
+        return evicted
+
+    def _evict(self, sessions):
+        if self.on_evict is None:
+            return
+        for session in sessions:
+            try:
+                self.on_evict(session)
+            except Exception as e:
+                LOG.warning("Session eviction hook failed: %s", e)
+
+
+class SQLiteSessionStore(MemorySessionStore):
+    """
+    Shared store in a SQLite file (WAL mode). Eviction runs inside an IMMEDIATE
+    transaction, so when several workers sweep at once each session is cleaned up
+    by exactly one of them.
+    """
+
+    def __init__(self, path, ttl_seconds=SESSION_TTL_SECONDS, max_entries=SESSION_MAX_ENTRIES, on_evict=remove_output_dir,
+                 table="sessions"):
+        self.path = path
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                " session_id TEXT PRIMARY KEY, created_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_created ON {table}(created_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def put(self, session_id, session):
+        now = time.time()
+        self._conn().execute(
+            f"INSERT OR REPLACE INTO {self.table} (session_id, created_at, expires_at, data) VALUES (?, ?, ?, ?)",
+            (session_id, now, now + self.ttl_seconds, json.dumps(session, default=str)),
+        )
+        self.sweep()
+
+    def get(self, session_id):
+        row = self._conn().execute(
+            f"SELECT expires_at, data FROM {self.table} WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[0] < time.time():
+            self.sweep()
+            return None
+        return json.loads(row[1])
+
+    def delete(self, session_id):
+        evicted = self._take("WHERE session_id = ?", (session_id,))
+        self._evict(evicted)
+
+    def sweep(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"SELECT session_id, data FROM {self.table} WHERE expires_at < ? "
+                f"UNION SELECT session_id, data FROM {self.table} WHERE session_id IN ("
+                f" SELECT session_id FROM {self.table} ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (time.time(), self.max_entries),
+            ).fetchall()
+            conn.executemany(f"DELETE FROM {self.table} WHERE session_id = ?", [(r[0],) for r in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._evict([json.loads(r[1]) for r in rows])
+        return len(rows)
+
+    def _take(self, where, params):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(f"SELECT data FROM {self.table} {where}", params).fetchall()
+            conn.execute(f"DELETE FROM {self.table} {where}", params)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [json.loads(r[0]) for r in rows]
+
+    def __len__(self):
+        return self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+def create_session_store(base_folder, kind=SESSION_STORE, table="sessions", **kwargs):
+    """
+    Backend picked by SESSION_STORE ("memory" or "sqlite"); the SQLite file defaults to
+    <base_folder>/sessions.db. kwargs (ttl_seconds, max_entries, on_evict) go to the store.
+    """
+    if kind == "memory":
+        return MemorySessionStore(**kwargs)
+    if kind == "sqlite":
+        return SQLiteSessionStore(SESSION_DB_FILE or os.path.join(base_folder, "sessions.db"), table=table, **kwargs)
+    raise ValueError(f"Unknown SESSION_STORE '{kind}' (expected 'memory' or 'sqlite')")
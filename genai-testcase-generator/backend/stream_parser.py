@@ -0,0 +1,109 @@
+# backend/stream_parser.py
+"""
+Incremental parser for a JSON array of objects arriving in arbitrary text chunks
+(e.g. a streamed model response, possibly wrapped in ``` fences). Each top-level
+object is decoded as soon as its closing brace arrives.
+"""
+import re
+import json
+
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+ARRAY_START_RE = re.compile(r"\[\s*\{")
+
+
+class JsonArrayStreamParser:
+    def __init__(self):
+        self._buf = []          # characters of the object currently being read
+        self._started = False   # saw the opening '[' of the array
+        self._finished = False  # saw the closing ']' of the array
+        self._depth = 0         # nesting depth inside the current top-level object
+        self._in_string = False
+        self._escape = False
+        self.errors = []        # raw text of top-level objects that failed to decode
+        self.repaired = 0       # objects decoded only after removing trailing commas
+
+    @property
+    def finished(self):
+        return self._finished
+
+    @property
+    def pending(self):
+        """Text of a top-level object that has started but not closed yet."""
+        return "".join(self._buf)
+
+    def feed(self, chunk):
+        """Consume more text; returns the list of objects completed by this chunk."""
+        out = []
+        for ch in chunk:
+            if self._finished:
+                break
+            if not self._started:
+                if ch == "[":
+                    self._started = True
+                continue
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                elif ch == "]":
+                    self._finished = True
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    text = "".join(self._buf)
+                    self._buf = []
+                    try:
+                        out.append(json.loads(text))
+                    except ValueError:
+                        try:
+                            out.append(json.loads(TRAILING_COMMA_RE.sub(r"\1", text)))
+                            self.repaired += 1
+                        except ValueError:
+                            self.errors.append(text)
+        return out
+
+
+def iter_json_objects(chunks):
+    """Yield each complete top-level object from an iterable of text chunks."""
+    parser = JsonArrayStreamParser()
+    for chunk in chunks:
+        for obj in parser.feed(chunk):
+            yield obj
+
+
+def salvage_json_array(text):
+    """
+    Recover every complete top-level object from a possibly truncated or partly malformed
+    JSON array; code fences and prose around it are ignored, and bare objects without the
+    enclosing brackets are accepted. Returns (objects, info) where info reports whether the
+    array was closed ("complete"), how many objects were recovered/repaired/dropped and the
+    length of the unfinished object at the end ("truncated_chars").
+    """
+    m = ARRAY_START_RE.search(text)
+    if m:
+        text = text[m.start():]
+    elif "{" in text:
+        text = "[" + text[text.index("{"):]
+    parser = JsonArrayStreamParser()
+    objects = parser.feed(text)
+    info = {
+        "complete": parser.finished,
+        "recovered": len(objects),
+        "repaired": parser.repaired,
+        "dropped": len(parser.errors),
+        "truncated_chars": len(parser.pending),
+    }
+    return objects, info
@@ -1,5 +1,6 @@
 # backend/utils.py
 import os
+import threading
 from pathlib import Path
 
 def ensure_folder(path):
@@ -10,3 +11,13 @@ def read_local_file_safe(path):
         return ""
     with open(path, "r", encoding="utf-8", errors="ignore") as f:
         return f.read()
+
+def atomic_write(path, write_fn):
+    # write to a private temp file then rename, so concurrent workers never see partial files
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write_fn(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -1,21 +1,36 @@
 # backend/vertex_ai_client.py
 import os
+import time
 import logging
-import vertexai
-from vertexai.generative_models import GenerativeModel
-from vertexai.language_models import TextEmbeddingModel
+import threading
+from llm_cache import LLM_CACHE
+from metrics import LLM_PROMPT_CHARS, LLM_RESPONSE_CHARS
+from rate_limit import TokenBucket, AdaptiveConcurrency, CircuitBreaker, CircuitOpenError, backoff_delay
 
 LOG = logging.getLogger("vertex_ai_client")
 LOG.setLevel(logging.INFO)
 
 PROJECT_ID = os.environ.get("PROJECT_ID", None)
 LOCATION = os.environ.get("LOCATION", "us-central1")
+EMBEDDING_MODEL_NAME = os.environ.get("EMBEDDING_MODEL_NAME", "gemini-embedding-001")
+
+# 🔹 Flow control for Gemini calls (shared by every thread in the process)
+VERTEX_RPM = int(os.environ.get("VERTEX_RPM", "60"))
+VERTEX_TPM = int(os.environ.get("VERTEX_TPM", "250000"))
+VERTEX_MAX_CONCURRENCY = int(os.environ.get("VERTEX_MAX_CONCURRENCY", "8"))
+VERTEX_MAX_RETRIES = int(os.environ.get("VERTEX_MAX_RETRIES", "4"))
+VERTEX_BACKOFF_BASE = float(os.environ.get("VERTEX_BACKOFF_BASE", "1.0"))
+VERTEX_BACKOFF_MAX = float(os.environ.get("VERTEX_BACKOFF_MAX", "30"))
+VERTEX_BREAKER_FAILURES = int(os.environ.get("VERTEX_BREAKER_FAILURES", "5"))
+VERTEX_BREAKER_RESET_SECONDS = float(os.environ.get("VERTEX_BREAKER_RESET_SECONDS", "30"))
+RETRYABLE_CODES = (429, 500, 502, 503, 504)
 
 def init_vertex_with_credentials():
     """
     Initialize vertexai SDK. If GOOGLE_APPLICATION_CREDENTIALS is set or ADC available,
     vertexai.init will use them. PROJECT_ID can be provided via env.
     """
+    import vertexai  # the SDK takes seconds to import, so it is loaded on first use
     try:
         if PROJECT_ID:
             vertexai.init(project=PROJECT_ID, location=LOCATION)
@@ -27,19 +42,246 @@ def init_vertex_with_credentials():
         LOG.exception("vertexai.init failed: %s", e)
         raise
 
-def generate_with_gemini(prompt, model_name="gemini-2.5-flash"):
+_VERTEX_INITIALIZED = False
+_VERTEX_INIT_LOCK = threading.Lock()
+
+def ensure_vertex_initialized():
+    """Run init_vertex_with_credentials once per process; a failure is logged and ADC defaults apply."""
+    global _VERTEX_INITIALIZED
+    with _VERTEX_INIT_LOCK:
+        if _VERTEX_INITIALIZED:
+            return
+        _VERTEX_INITIALIZED = True
+        try:
+            init_vertex_with_credentials()
+        except Exception as e:
+            LOG.warning("Vertex AI init warning: %s", e)
+
+def _default_model_factory(model_name):
+    ensure_vertex_initialized()
+    from vertexai.generative_models import GenerativeModel
+    return GenerativeModel(model_name)
+
+def _default_embedding_factory(model_name):
+    ensure_vertex_initialized()
+    from vertexai.language_models import TextEmbeddingModel
+    return TextEmbeddingModel.from_pretrained(model_name)
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose; good enough for rate budgeting
+    return max(1, len(text) // 4)
+
+def is_retryable(exc):
+    code = getattr(exc, "code", None)
+    if callable(code):  # grpc errors expose code() returning a StatusCode
+        code = None
+    return code in RETRYABLE_CODES or isinstance(exc, (TimeoutError, ConnectionError))
+
+
+class VertexClientManager:
+    """
+    Holds long-lived model instances and funnels every generate call through a
+    requests/tokens-per-minute budget, an adaptive concurrency limit, retries with
+    jittered exponential backoff and a circuit breaker.
+    """
+
+    def __init__(self, model_factory=None, embedding_factory=None, rpm=VERTEX_RPM, tpm=VERTEX_TPM,
+                 max_concurrency=VERTEX_MAX_CONCURRENCY, max_retries=VERTEX_MAX_RETRIES,
+                 backoff_base=VERTEX_BACKOFF_BASE, backoff_max=VERTEX_BACKOFF_MAX,
+                 breaker_failures=VERTEX_BREAKER_FAILURES, breaker_reset_seconds=VERTEX_BREAKER_RESET_SECONDS,
+                 sleep=time.sleep):
+        self.model_factory = model_factory or _default_model_factory
+        self.embedding_factory = embedding_factory or _default_embedding_factory
+        self.requests = TokenBucket(rpm, sleep=sleep)
+        self.tokens = TokenBucket(tpm, sleep=sleep)
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._sleep = sleep
+        self._models = {}
+        self._embedding_models = {}
+        self._lock = threading.Lock()
+        self.counters = {"calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0,
+                         "rejected_open": 0, "rate_wait_seconds": 0.0}
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def model(self, model_name):
+        with self._lock:
+            if model_name not in self._models:
+                self._models[model_name] = self.model_factory(model_name)
+            return self._models[model_name]
+
+    def embedding_model(self, model_name=EMBEDDING_MODEL_NAME):
+        with self._lock:
+            if model_name not in self._embedding_models:
+                self._embedding_models[model_name] = self.embedding_factory(model_name)
+            return self._embedding_models[model_name]
+
+    def _admit(self, prompt):
+        try:
+            self.breaker.allow()
+        except CircuitOpenError:
+            self._count("rejected_open")
+            raise
+        waited = self.requests.acquire(1) + self.tokens.acquire(estimate_tokens(prompt))
+        if waited:
+            self._count("rate_wait_seconds", waited)
+
+    def _retry_delay(self, exc, attempt):
+        """Record a failed attempt; returns the backoff delay, or None if the error should propagate."""
+        retryable = is_retryable(exc)
+        if retryable:
+            self.breaker.record_failure()
+            if getattr(exc, "code", None) == 429:
+                self._count("throttled")
+                self.concurrency.on_throttle()
+        else:
+            # the upstream answered; a bad request says nothing about its health
+            self.breaker.record_success()
+        if not retryable or attempt >= self.max_retries:
+            self._count("failures")
+            return None
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        LOG.warning("Vertex AI call failed (%s); retry %d/%d in %.2fs", exc, attempt + 1, self.max_retries, delay)
+        self._count("retries")
+        return delay
+
+    def _record_success(self, text):
+        self.breaker.record_success()
+        self.concurrency.on_success()
+        self.tokens.consume(estimate_tokens(text or ""))
+
+    def generate(self, prompt, model_name="gemini-2.5-flash"):
+        self._count("calls")
+        model = self.model(model_name)
+        attempt = 0
+        while True:
+            self._admit(prompt)
+            self.concurrency.acquire()
+            settled = False
+            try:
+                self._count("attempts")
+                text = model.generate_content(prompt).text
+            except Exception as e:
+                settled = True
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                settled = True
+                self._record_success(text)
+                return text
+            finally:
+                self.concurrency.release()
+                if not settled:  # interrupted (BaseException): no outcome to report
+                    self.breaker.release_trial()
+            attempt += 1
+            self._sleep(delay)
+
+    def stream(self, prompt, model_name="gemini-2.5-flash"):
+        """Yield response text chunks as they arrive. Retries only happen before the first chunk."""
+        self._count("calls")
+        model = self.model(model_name)
+        attempt = 0
+        while True:
+            self._admit(prompt)
+            self.concurrency.acquire()
+            parts, settled = [], False
+            try:
+                self._count("attempts")
+                for chunk in model.generate_content(prompt, stream=True):
+                    try:
+                        text = chunk.text
+                    except ValueError:  # chunk without text parts (e.g. finish reason only)
+                        text = ""
+                    if text:
+                        parts.append(text)
+                        yield text
+            except Exception as e:
+                settled = True
+                if parts:
+                    # cut off mid-answer: too late to retry, but it still counts against the upstream
+                    self.breaker.record_failure()
+                    self._count("failures")
+                    raise
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                settled = True
+                self._record_success("".join(parts))
+                return
+            finally:
+                self.concurrency.release()
+                if not settled:
+                    # abandoned by the consumer (client disconnect, GeneratorExit)
+                    if parts:
+                        self.breaker.record_success()  # the upstream was answering
+                    else:
+                        self.breaker.release_trial()
+            attempt += 1
+            self._sleep(delay)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["rate_wait_seconds"] = round(stats["rate_wait_seconds"], 3)
+        stats["concurrency_limit"] = self.concurrency.limit
+        stats["in_flight"] = self.concurrency.in_flight
+        stats["breaker_state"] = self.breaker.state
+        stats["breaker_trips"] = self.breaker.trips
+        return stats
+
+
+CLIENTS = VertexClientManager()
+
+def generate_with_gemini(prompt, model_name="gemini-2.5-flash", use_cache=True):
+    """use_cache=False skips the cache lookup (the fresh response still refreshes the cache)."""
+    if use_cache:
+        cached = LLM_CACHE.get(model_name, prompt)
+        if cached is not None:
+            return cached
+    else:
+        LLM_CACHE.note_bypass()
     try:
-        model = GenerativeModel(model_name)
-        response = model.generate_content(prompt)
-        text = response.text
+        LLM_PROMPT_CHARS.observe(len(prompt), model=model_name)
+        text = CLIENTS.generate(prompt, model_name)
+        LLM_RESPONSE_CHARS.observe(len(text), model=model_name)
+        LLM_CACHE.put(model_name, prompt, text)
         return text
     except Exception as e:
         LOG.exception("Vertex AI generate failed: %s", e)
         raise RuntimeError(f"Vertex AI generation failed: {e}")
 
-def get_embedding_model():
+def stream_with_gemini(prompt, model_name="gemini-2.5-flash", use_cache=True):
+    """Streaming variant of generate_with_gemini: yields text chunks; a cache hit is yielded whole."""
+    if use_cache:
+        cached = LLM_CACHE.get(model_name, prompt)
+        if cached is not None:
+            yield cached
+            return
+    else:
+        LLM_CACHE.note_bypass()
+    parts = []
+    LLM_PROMPT_CHARS.observe(len(prompt), model=model_name)
+    try:
+        for text in CLIENTS.stream(prompt, model_name):
+            parts.append(text)
+            yield text
+    except Exception as e:
+        LOG.exception("Vertex AI streaming generate failed: %s", e)
+        raise RuntimeError(f"Vertex AI generation failed: {e}")
+    LLM_RESPONSE_CHARS.observe(sum(len(p) for p in parts), model=model_name)
+    LLM_CACHE.put(model_name, prompt, "".join(parts))
+
+def get_embedding_model(model_name=EMBEDDING_MODEL_NAME):
     try:
-        return TextEmbeddingModel.from_pretrained("gemini-embedding-001")
+        return CLIENTS.embedding_model(model_name)
     except Exception as e:
         LOG.exception("Failed to load embedding model: %s", e)
         raise
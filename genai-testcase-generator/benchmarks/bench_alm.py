@@ -0,0 +1,103 @@
+# benchmarks/bench_alm.py
+"""
+ALM connectors: fetching the work items referenced on the ALM inputs tab from a local
+stub of the Jira, Azure DevOps and Polarion APIs (fake_alm.FakeAlmServer).
+
+    python benchmarks/bench_alm.py --items 300 --latency 0.02
+    python benchmarks/bench_alm.py --items 1000 --latency 0.05 --page-limit 20 --edited 0.05
+
+Each run fetches --items references per ALM (Jira ticket URLs, Polarion ids, Azure DevOps
+work item URLs). "one request per item" is the straightforward loop: one GET per work
+item and a new connection each time. The pooled runs go through AlmFetcher: keep-alive
+connections and concurrent requests, first one item per request, then bulk queries
+(paged by the server at --page-limit). The last two runs repeat the bulk fetch with the
+conditional cache warm, before and after --edited of the items change.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+SCRATCH = tempfile.mkdtemp(prefix="bench_alm_")
+logging.disable(logging.WARNING)
+
+from fake_alm import FakeAlmServer, ADO_ORG, ADO_PROJECT, ADO_FIRST_ID, POLARION_PROJECT, JIRA_PROJECT
+
+
+def alm_inputs(server, items):
+    return {
+        "Jira": {"tickets": [f"{server.url}/browse/{JIRA_PROJECT}-{n}" for n in range(1, items + 1)]},
+        "Polarion": {"items": [f"{POLARION_PROJECT}-{n}" for n in range(1, items + 1)]},
+        "Azure DevOps": {"items": [f"{server.ado_url}/{ADO_PROJECT}/_workitems/edit/{ADO_FIRST_ID + n}"
+                                   for n in range(1, items + 1)]},
+    }
+
+
+def one_request_per_item(server, items):
+    """Sequential GETs without a session: a new connection per work item."""
+    import requests
+    fetched = 0
+    for n in range(1, items + 1):
+        for url, params in (
+                (f"{server.url}/rest/api/2/search", {"jql": f"key in ({JIRA_PROJECT}-{n})"}),
+                (f"{server.ado_url}/{ADO_PROJECT}/_apis/wit/workitems", {"ids": str(ADO_FIRST_ID + n)}),
+                (f"{server.url}/polarion/rest/v1/projects/{POLARION_PROJECT}/workitems",
+                 {"query": f"id:({POLARION_PROJECT}-{n})"})):
+            requests.get(url, params=params, timeout=15).raise_for_status()
+            fetched += 1
+    return fetched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=300, help="work items per ALM")
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency per request (seconds)")
+    parser.add_argument("--page-limit", type=int, default=25, help="largest page the server returns")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--edited", type=float, default=0.1, help="share of items edited before the last run")
+    args = parser.parse_args()
+
+    from alm_connectors import AlmFetcher, AlmHttp, JiraConnector, PolarionConnector, AzureDevOpsConnector
+    server = FakeAlmServer(items=args.items, latency=args.latency, page_limit=args.page_limit).start()
+    connectors = [JiraConnector(server.url), PolarionConnector(server.url, POLARION_PROJECT),
+                  AzureDevOpsConnector(server.ado_url, ADO_PROJECT)]
+    inputs = alm_inputs(server, args.items)
+    total = 3 * args.items
+
+    def report(label, seconds, fetched, info=None):
+        c = server.counters
+        extra = f"  not_modified={c['not_modified']:4d}" if info else ""
+        print(f"{label:<34} wall={seconds:7.2f}s  items={fetched:4d}/{total}  requests={c['requests']:5d}  "
+              f"connections={c['connections']:4d}{extra}")
+        server.reset_counters()
+
+    try:
+        t0 = time.perf_counter()
+        fetched = one_request_per_item(server, args.items)
+        report("one request per item", time.perf_counter() - t0, fetched)
+
+        def pooled(label, batch_size, cache):
+            http = AlmHttp(pool_size=args.workers, cache_dir=os.path.join(SCRATCH, cache))
+            fetcher = AlmFetcher(connectors, http=http, workers=args.workers, batch_size=batch_size)
+            t0 = time.perf_counter()
+            items, unresolved, info = fetcher.fetch(inputs)
+            assert not unresolved, unresolved
+            report(label, time.perf_counter() - t0, len(items), info)
+
+        pooled(f"pooled, 1 item/request, {args.workers} workers", 1, "single")
+        pooled("pooled, bulk queries", 100, "bulk")
+        pooled("bulk again (cache warm)", 100, "bulk")
+        server.touch(range(1, int(args.items * args.edited) + 1))
+        pooled(f"bulk again, {args.edited:.0%} edited", 100, "bulk")
+    finally:
+        server.stop()
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
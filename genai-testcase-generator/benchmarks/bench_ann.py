@@ -0,0 +1,150 @@
+# benchmarks/bench_ann.py
+"""
+Build time, index size, query latency, recall@k and per-worker memory of the RAG
+index types (flat, ivf, ivfpq, hnsw) on synthetic clustered embeddings.
+
+    python benchmarks/bench_ann.py --sizes 10000 100000 --workers 4
+    python benchmarks/bench_ann.py --sizes 1000000 --types ivf ivfpq --dim 256   # needs ~2 GB free RAM
+    python benchmarks/bench_ann.py --sizes 100000 --types ivf --nprobe 4 32      # recall/latency trade-off
+
+Each index is written to disk, then --workers spawned processes open it the way the
+backend does (memory-mapped, read-only) and run the queries at the same time. Memory
+per worker is reported as private RSS (RssAnon), file-backed RSS (RssFile, the shared
+page cache) and PSS (file pages split between the processes mapping them). One extra
+worker opens the index without mmap for comparison. Linux only for the memory columns.
+"""
+import os
+import sys
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import multiprocessing as mp
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+logging.disable(logging.WARNING)
+
+import ann_index
+
+
+def synthetic_embeddings(n, dim, seed, clusters=1000):
+    """
+    Unit-length vectors around `clusters` random centers, like sentence embeddings of a
+    topical corpus. The same seed gives the same centers (queries come from the corpus
+    distribution) while a different n gives different points.
+    """
+    centers = np.random.default_rng(seed).standard_normal((clusters, dim)).astype("float32")
+    rng = np.random.default_rng((seed, n))
+    vecs = np.empty((n, dim), dtype="float32")
+    for start in range(0, n, 100000):
+        stop = min(n, start + 100000)
+        vecs[start:stop] = centers[rng.integers(0, clusters, stop - start)] + 0.35 * rng.standard_normal((stop - start, dim))
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def memory_mb():
+    out = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon", "RssFile")):
+                    out[line.split(":")[0]] = int(line.split()[1]) / 1024
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    out["Pss"] = int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return out
+
+
+def worker(path, queries_path, truth_path, k, nprobe, ef_search, mmap, barrier, results):
+    queries, truth = np.load(queries_path), np.load(truth_path)
+    before = memory_mb()
+    index = ann_index.tune_index(ann_index.read_index(path, mmap=mmap), nprobe, ef_search)
+    latencies, found = [], 0
+    for q, t in zip(queries, truth):
+        t0 = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        found += len(set(ids[0]) & set(t))
+    barrier.wait()  # all workers hold the index now
+    after = memory_mb()
+    results.put({
+        "mmap": mmap,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "recall": found / float(len(queries) * k),
+        "rss_anon_mb": after.get("RssAnon", 0) - before.get("RssAnon", 0),
+        "rss_file_mb": after.get("RssFile", 0) - before.get("RssFile", 0),
+        "pss_mb": after.get("Pss", 0) - before.get("Pss", 0),
+    })
+    barrier.wait()
+
+
+def run_workers(path, queries_path, truth_path, args, nprobe, ef_search):
+    ctx = mp.get_context("spawn")
+    n = args.workers + 1
+    barrier, results = ctx.Barrier(n), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(path, queries_path, truth_path, args.k, nprobe, ef_search, i < args.workers, barrier, results))
+             for i in range(n)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return [r for r in out if r["mmap"]], [r for r in out if not r["mmap"]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--types", nargs="+", choices=ann_index.INDEX_TYPES, default=list(ann_index.INDEX_TYPES))
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4, help="concurrent memory-mapped workers per index")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[ann_index.RAG_IVF_NPROBE])
+    parser.add_argument("--ef-search", type=int, default=ann_index.RAG_HNSW_EF_SEARCH)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import faiss
+    scratch = tempfile.mkdtemp(prefix="bench_ann_")
+    print(f"{'n':>8} {'type':<6} {'nprobe':>6} {'build_s':>8} {'size_mb':>8} {'p50_ms':>7} {'p95_ms':>7} {'recall':>6} "
+          f"{'anon_mb':>8} {'file_mb':>8} {'pss_mb':>7} {'no_mmap_anon_mb':>15}")
+    try:
+        for n in args.sizes:
+            vecs = synthetic_embeddings(n, args.dim, args.seed)
+            queries = synthetic_embeddings(args.queries, args.dim, args.seed)
+            exact = faiss.IndexFlatL2(args.dim)
+            exact.add(vecs)
+            _, truth = exact.search(queries, args.k)
+            del exact
+            queries_path, truth_path = os.path.join(scratch, "queries.npy"), os.path.join(scratch, "truth.npy")
+            np.save(queries_path, queries)
+            np.save(truth_path, truth)
+            for kind in args.types:
+                t0 = time.perf_counter()
+                index = ann_index.build_index(vecs, kind)
+                build_s = time.perf_counter() - t0
+                path = os.path.join(scratch, f"index_{n}_{kind}.faiss")
+                ann_index.write_index(index, path)
+                del index
+                for nprobe in (args.nprobe if kind in ("ivf", "ivfpq") else args.nprobe[:1]):
+                    mapped, private = run_workers(path, queries_path, truth_path, args, nprobe, args.ef_search)
+                    avg = {key: float(np.mean([r[key] for r in mapped])) for key in mapped[0] if key != "mmap"}
+                    print(f"{n:>8} {kind:<6} {nprobe if kind in ('ivf', 'ivfpq') else '-':>6} {build_s:>8.2f} "
+                          f"{os.path.getsize(path) / 2**20:>8.1f} {avg['p50_ms']:>7.3f} {avg['p95_ms']:>7.3f} {avg['recall']:>6.3f} "
+                          f"{avg['rss_anon_mb']:>8.1f} {avg['rss_file_mb']:>8.1f} {avg['pss_mb']:>7.1f} {private[0]['rss_anon_mb']:>15.1f}")
+                os.remove(path)
+            del vecs
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_dedup.py
+"""
+Local dedup time and review-prompt size on synthetic test cases.
+
+    python benchmarks/bench_dedup.py --sizes 1000 5000 10000 --dup-rate 0.3
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from dedup import dedup_testcases
+from reviewer import build_review_prompt
+
+COLUMNS = ["TestCaseID", "Description", "Requirement", "ExpectedResult", "Priority", "Notes"]
+SUBJECTS = ["patient record", "appointment slot", "lab result", "prescription", "audit log", "PHI export",
+            "consent form", "billing claim", "discharge summary", "user session"]
+ACTIONS = ["create", "update", "delete", "view", "export", "encrypt", "approve", "cancel", "sign", "archive"]
+CONDITIONS = ["with valid data", "with a missing mandatory field", "as an unauthorized role", "after session timeout",
+              "with an invalid date format", "under peak load", "with special characters", "twice concurrently"]
+ROLES = ["nurse", "physician", "administrator", "patient", "auditor", "pharmacist", "lab technician"]
+
+
+def make_case(rng, n):
+    subject, action, cond, role = rng.choice(SUBJECTS), rng.choice(ACTIONS), rng.choice(CONDITIONS), rng.choice(ROLES)
+    return {
+        "TestCaseID": f"TC{n:05d}",
+        "Description": f"Verify a {role} can {action} a {subject} {cond} (variant {n})",
+        "Requirement": f"The system must allow the {role} to {action} the {subject} and record it in the audit trail",
+        "ExpectedResult": f"The {subject} is {action}d {cond} and an audit entry is written for case {n}",
+        "Priority": rng.choice(["High", "Medium", "Low"]),
+        "Notes": "",
+    }
+
+
+def perturb(rng, case, n):
+    dup = dict(case, TestCaseID=f"TC{n:05d}")
+    if rng.random() < 0.5:
+        return dup  # exact duplicate apart from the ID
+    words = dup["ExpectedResult"].split()
+    words[rng.randrange(len(words))] = rng.choice(["successfully", "correctly", "properly"])
+    dup["ExpectedResult"] = " ".join(words)
+    return dup
+
+
+def synthetic_cases(size, dup_rate, seed=7):
+    rng = random.Random(seed)
+    cases = []
+    for n in range(size):
+        if cases and rng.random() < dup_rate:
+            cases.append(perturb(rng, rng.choice(cases), n))
+        else:
+            cases.append(make_case(rng, n))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 10000])
+    parser.add_argument("--dup-rate", type=float, default=0.3)
+    parser.add_argument("--threshold", type=float, default=0.85)
+    args = parser.parse_args()
+
+    print(f"{'cases':>7} {'kept':>7} {'exact':>6} {'near':>6} {'dedup_ms':>9} {'prompt_before':>14} {'prompt_after':>13}")
+    for size in args.sizes:
+        cases = synthetic_cases(size, args.dup_rate)
+        t0 = time.perf_counter()
+        unique, report = dedup_testcases(cases, COLUMNS, threshold=args.threshold)
+        elapsed = (time.perf_counter() - t0) * 1000
+        before = len(build_review_prompt(cases, COLUMNS))
+        after = len(build_review_prompt(unique, COLUMNS))
+        print(f"{size:>7} {report['kept']:>7} {report['exact_duplicates']:>6} {report['near_duplicates']:>6} "
+              f"{elapsed:>9.1f} {before:>14,} {after:>13,}")
+
+
+if __name__ == "__main__":
+    main()
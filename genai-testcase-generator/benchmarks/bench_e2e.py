@@ -0,0 +1,199 @@
+# benchmarks/bench_e2e.py
+"""
+Offline end-to-end benchmark: the full generation pipeline against simulated Vertex
+AI models (no network, no credentials).
+
+    python benchmarks/bench_e2e.py --mode pipeline --requests 40 --concurrency 4 --latency 0.5
+    python benchmarks/bench_e2e.py --mode route --requests 40 --concurrency 8 --error-rate 0.1 --out e2e.json
+    python benchmarks/bench_e2e.py --mode route --compare e2e.json   # deltas against an earlier run
+
+"pipeline" calls GeneratorService.generate_full_pipeline directly; "route" posts to the
+Flask /generate_testcases route (which also writes the output files). Reports
+throughput plus p50/p95/p99 latency per request and per stage (rag, generation,
+parse, dedup, review, write_files) and saves them as JSON.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+# keep fake embeddings, cached responses and output files out of the real folders
+SCRATCH = tempfile.mkdtemp(prefix="bench_e2e_")
+for var, sub in (("RAG_CACHE_DIR", "rag_cache"), ("LLM_CACHE_DIR", "llm_cache"), ("TEMP_FOLDER", "uploads")):
+    os.environ.setdefault(var, os.path.join(SCRATCH, sub))
+os.environ.setdefault("SESSION_STORE", "memory")
+os.environ.setdefault("VERTEX_BACKOFF_BASE", "0.05")
+logging.disable(logging.WARNING)
+
+from fake_vertex import install_fake_vertex
+
+PERCENTILES = (50, 95, 99)
+
+
+def summarize(samples):
+    if not samples:
+        return None
+    values = np.asarray(samples) * 1000.0
+    out = {f"p{p}_ms": round(float(np.percentile(values, p)), 1) for p in PERCENTILES}
+    out.update(count=len(samples), mean_ms=round(float(values.mean()), 1))
+    return out
+
+
+class StageRecorder:
+    """progress(stage, state) callback that records how long each stage took."""
+
+    def __init__(self):
+        self.durations = {}
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def callback(self):
+        def progress(stage, state):
+            now = time.perf_counter()
+            with self._lock:
+                if state == "running":
+                    self._started[(threading.get_ident(), stage)] = now
+                else:
+                    t0 = self._started.pop((threading.get_ident(), stage), None)
+                    if t0 is not None:
+                        self.durations.setdefault(stage, []).append(now - t0)
+        return progress
+
+
+def payload_for(i, args):
+    reqs = [f"Requirement {i}.{n}: patients can manage appointment type {n} securely" for n in range(args.requirements)]
+    return {"username": f"bench{i % 8}", "alm_tool": "jira", "use_cache": False,
+            "inputs": {"typed_requirements": reqs, "uploaded_files": [], "alm_inputs": {}}}
+
+
+def make_pipeline_call(recorder):
+    from generator import GeneratorService
+    service = GeneratorService()
+
+    def call(payload):
+        inputs = payload["inputs"]
+        service.generate_full_pipeline(typed_requirements=inputs["typed_requirements"], alm_tool=payload["alm_tool"],
+                                       progress=recorder.callback(), use_cache=False)
+    return call
+
+
+def make_route_call(recorder):
+    import backend_api
+    handler = backend_api.generate_testcases_handler
+
+    # the route does not expose stage callbacks, so wrap the handler it calls
+    def timed_handler(payload, progress=None):
+        return handler(payload, progress=recorder.callback())
+    backend_api.generate_testcases_handler = timed_handler
+    client = backend_api.app.test_client()
+
+    def call(payload):
+        resp = client.post("/generate_testcases", json=payload)
+        if resp.status_code != 200:
+            raise RuntimeError(resp.get_json().get("error", resp.status_code))
+    return call
+
+
+def run(args):
+    model, embedder = install_fake_vertex(latency=args.latency, error_rate=args.error_rate, num_cases=args.cases,
+                                          pad_chars=args.pad_chars, embed_latency=args.embed_latency, seed=args.seed)
+    recorder = StageRecorder()
+    call = make_pipeline_call(recorder) if args.mode == "pipeline" else make_route_call(recorder)
+    call(payload_for(-1, args))  # warm-up: builds the RAG index and loads the few-shot files
+    recorder.durations.clear()
+
+    latencies, failures = [], 0
+
+    def one(i):
+        t0 = time.perf_counter()
+        try:
+            call(payload_for(i, args))
+            return time.perf_counter() - t0, None
+        except Exception as e:
+            return time.perf_counter() - t0, str(e)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for elapsed, error in pool.map(one, range(args.requests)):
+            if error:
+                failures += 1
+            else:
+                latencies.append(elapsed)
+    wall = time.perf_counter() - t0
+
+    import vertex_ai_client
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "config": vars(args),
+        "wall_seconds": round(wall, 2),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "failures": failures,
+        "request": summarize(latencies),
+        "stages": {stage: summarize(v) for stage, v in recorder.durations.items()},
+        "model_calls": model.calls,
+        "model_errors": model.errors,
+        "vertex": vertex_ai_client.CLIENTS.stats(),
+    }
+
+
+def print_report(result, baseline=None):
+    def row(name, stats, base):
+        if not stats:
+            return
+        line = f"{name:<12}" + "".join(f"{k}={stats[k]:>9.1f} " for k in ("p50_ms", "p95_ms", "p99_ms"))
+        if base:
+            line += " Δp50={:+.1f}% Δp95={:+.1f}%".format(
+                *(100.0 * (stats[k] - base[k]) / base[k] if base[k] else 0.0 for k in ("p50_ms", "p95_ms")))
+        print(line)
+
+    print(f"mode={result['config']['mode']} requests={result['config']['requests']} "
+          f"concurrency={result['config']['concurrency']} failures={result['failures']} "
+          f"throughput={result['throughput_rps']:.2f} req/s")
+    row("request", result["request"], baseline and baseline.get("request"))
+    for stage, stats in result["stages"].items():
+        row(stage, stats, baseline and baseline.get("stages", {}).get(stage))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=("pipeline", "route"), default="pipeline")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per Gemini call")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="simulated seconds per embedding call")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of Gemini calls answered with 429")
+    parser.add_argument("--cases", type=int, default=12, help="test cases per model response")
+    parser.add_argument("--pad-chars", type=int, default=0, help="extra characters per generated field")
+    parser.add_argument("--requirements", type=int, default=3, help="typed requirements per request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write the results JSON here")
+    parser.add_argument("--compare", help="results JSON of an earlier run to diff against")
+    args = parser.parse_args()
+
+    try:
+        result = run(args)
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"saved {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_export.py
+"""
+Export time, peak Python memory and file size per format on synthetic reviewed
+test cases, against the previous writers (DataFrame.to_excel, json.dump indent=2).
+
+    python benchmarks/bench_export.py --rows 50000
+    python benchmarks/bench_export.py --rows 50000 --formats xlsx csv jira_import --memory
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from exporters import write_export, frame_rows, WRITERS, ALM_LAYOUTS
+
+COLUMNS = ["summary", "description", "customfield_requirement", "steps", "actions", "expectedResults", "acceptanceCriteria"]
+SUBJECTS = ["patient record", "appointment slot", "lab result", "prescription", "audit log", "consent form"]
+ROLES = ["nurse", "physician", "administrator", "patient", "auditor"]
+
+
+def make_frame(rows, seed):
+    import pandas as pd
+    rng = random.Random(seed)
+    cases = []
+    for n in range(rows):
+        subject, role = rng.choice(SUBJECTS), rng.choice(ROLES)
+        cases.append({
+            "summary": f"Verify the {role} can update the {subject} (case {n})",
+            "description": f"As a {role}, open the {subject}, change a field and save it; the change is audited.",
+            "customfield_requirement": f"REQ-{n % 500:04d}",
+            "steps": "1. Log in\n2. Open the record\n3. Edit a field\n4. Save",
+            "actions": f"Edit the {subject} as {role}",
+            "expectedResults": f"The {subject} is saved and an audit entry is written",
+            "acceptanceCriteria": "PHI stays encrypted at rest and in transit",
+        })
+    return pd.DataFrame(cases, columns=COLUMNS)
+
+
+def dump_indented(raw, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(raw, f, indent=2, ensure_ascii=False)
+
+
+def measure(fn, trace_memory):
+    """(seconds, peak traced bytes or None); tracing slows the writers down, so it is opt-in."""
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--formats", nargs="+", default=list(WRITERS) + list(ALM_LAYOUTS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="also report peak Python memory (slower)")
+    args = parser.parse_args()
+
+    df = make_frame(args.rows, args.seed)
+    raw = df.to_dict(orient="records")
+    scratch = tempfile.mkdtemp(prefix="bench_export_")
+    runs = [
+        ("baseline to_excel", os.path.join(scratch, "baseline.xlsx"), lambda p: df.to_excel(p, index=False)),
+        ("baseline json indent=2", os.path.join(scratch, "baseline.json"), lambda p: dump_indented(raw, p)),
+    ]
+    for fmt in args.formats:
+        ext = ALM_LAYOUTS[fmt][0] if fmt in ALM_LAYOUTS else fmt
+        runs.append((fmt, os.path.join(scratch, f"out_{fmt}.{ext}"),
+                     lambda p, fmt=fmt: write_export(p, fmt, COLUMNS, frame_rows(df))))
+
+    print(f"rows={args.rows}")
+    try:
+        for name, path, fn in runs:
+            try:
+                elapsed, peak = measure(lambda: fn(path), args.memory)
+            except Exception as e:
+                print(f"{name:<24} skipped: {e}")
+                continue
+            mem = f"  peak_mem={peak / 2**20:7.1f} MiB" if peak is not None else ""
+            print(f"{name:<24} {elapsed:7.2f}s  size={os.path.getsize(path) / 2**20:6.1f} MiB{mem}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
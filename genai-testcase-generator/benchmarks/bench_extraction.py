@@ -0,0 +1,131 @@
+# benchmarks/bench_extraction.py
+"""
+Throughput (files/sec) and peak RSS of InputHandler.extract_from_files over a
+folder of generated PDFs and DOCX files.
+
+    python benchmarks/bench_extraction.py --files 40 --pages 30
+    python benchmarks/bench_extraction.py --dir path/to/specs
+
+Each mode runs in its own subprocess so peak RSS is measured independently:
+- serial: workers=1, empty cache
+- pool:   process pool, empty cache
+- cached: process pool, then the same files submitted again (cache hits only)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+LOREM = ("The system shall validate patient demographics, encrypt PHI at rest and in transit, "
+         "record an audit trail entry for every access and lock accounts after repeated failures. ")
+
+
+class LocalFile:
+    """Mimics Streamlit's UploadedFile (name + getvalue())."""
+
+    def __init__(self, path):
+        self.name = os.path.basename(path)
+        self.path = path
+
+    def getvalue(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def write_pdf(path, pages, lines_per_page=40):
+    """Minimal multi-page text PDF (Helvetica), no third-party writer needed."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for p in range(pages):
+        lines = [f"Requirement {p + 1}.{n + 1}: {LOREM[:90]}" for n in range(lines_per_page)]
+        text = "BT /F1 9 Tf 40 800 Td 12 TL " + " ".join(f"({l}) '" for l in lines) + " ET"
+        objects.append(f"<< /Length {len(text)} >>\nstream\n{text}\nendstream")
+        content_id = len(objects)
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>"
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for i, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def write_docx(path, paragraphs):
+    import docx
+    doc = docx.Document()
+    for n in range(paragraphs):
+        doc.add_paragraph(f"Requirement {n + 1}: {LOREM * 2}")
+    doc.save(path)
+
+
+def generate_corpus(folder, files, pages):
+    for i in range(files):
+        if i % 2 == 0:
+            write_pdf(os.path.join(folder, f"spec_{i:03d}.pdf"), pages)
+        else:
+            write_docx(os.path.join(folder, f"spec_{i:03d}.docx"), pages * 20)
+
+
+def run_mode(mode, folder):
+    from input_handler import InputHandler, EXTRACT_WORKERS, shutdown_extraction_pool
+    files = [LocalFile(os.path.join(folder, n)) for n in sorted(os.listdir(folder)) if n.endswith((".pdf", ".docx"))]
+    handler = InputHandler(workers=1 if mode == "serial" else EXTRACT_WORKERS)
+    if handler.workers > 1:
+        # the pool is long-lived in the app, so keep worker start-up out of the timing
+        from input_handler import _get_pool
+        list(_get_pool().map(abs, range(handler.workers)))
+    t0 = time.perf_counter()
+    result = handler.extract_from_files(files)
+    elapsed = time.perf_counter() - t0
+    if mode == "cached":
+        t0 = time.perf_counter()
+        result = handler.extract_from_files(files)
+        elapsed = time.perf_counter() - t0
+    chars = sum(len(f["content"]) for f in result["uploaded_files"])
+    shutdown_extraction_pool()  # reap workers so RUSAGE_CHILDREN includes them
+    rss_self = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps({"mode": mode, "files": len(files), "seconds": elapsed, "chars": chars,
+                      "peak_rss_mb": rss_self / 1024, "peak_child_rss_mb": rss_children / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dir", help="existing folder of PDF/DOCX files (default: generate one)")
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=max(2, os.cpu_count() or 1), help="process pool size (EXTRACT_WORKERS)")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        return run_mode(args.mode, args.dir)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = args.dir or tmp
+        if not args.dir:
+            generate_corpus(folder, args.files, args.pages)
+        for mode in ("serial", "pool", "cached"):
+            env = dict(os.environ, EXTRACT_WORKERS=str(args.workers))
+            out = subprocess.run([sys.executable, __file__, "--mode", mode, "--dir", folder],
+                                 capture_output=True, text=True, check=True, env=env).stdout.strip().splitlines()[-1]
+            r = json.loads(out)
+            rate = r["files"] / r["seconds"] if r["seconds"] else float("inf")
+            print(f"{mode:<7} files={r['files']:<4} {r['seconds']:7.2f}s  {rate:8.1f} files/s  "
+                  f"chars={r['chars']:<10,} peak_rss={r['peak_rss_mb']:.0f} MB  peak_child_rss={r['peak_child_rss_mb']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
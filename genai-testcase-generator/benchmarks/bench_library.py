@@ -0,0 +1,135 @@
+# benchmarks/bench_library.py
+"""
+Case library: indexing and search cost as sessions accumulate, and how many model calls
+reuse-first generation saves when requirement types recur.
+
+    python benchmarks/bench_library.py --sessions 500 --requests 40 --recurring 0.6
+    python benchmarks/bench_library.py --sessions 2000 --embed-latency 0.05   # slower embedding model
+
+Sessions are synthetic: each covers a few requirements drawn from actor/action/object
+templates, with a handful of cases per requirement. "sync" is what another worker pays
+to pick up one new session (it reads only the appended lines). The reuse part runs the
+generation pipeline against simulated Vertex models twice over the same requests, with
+reuse_first off and on; a request requirement recurs when it is a reformatted copy of
+one already in the library.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+SCRATCH = tempfile.mkdtemp(prefix="bench_library_")
+for var, sub in (("RAG_CACHE_DIR", "rag_cache"), ("LLM_CACHE_DIR", "llm_cache"), ("TEMP_FOLDER", "uploads")):
+    os.environ.setdefault(var, os.path.join(SCRATCH, sub))
+os.environ.setdefault("SESSION_STORE", "memory")
+logging.disable(logging.WARNING)
+
+from fake_vertex import install_fake_vertex
+
+ACTORS = ["Patients", "Doctors", "Nurses", "Pharmacists", "Lab technicians", "Billing staff", "Administrators", "Auditors"]
+ACTIONS = ["must be able to view", "must not edit", "must be notified about", "must export", "must sign off",
+           "must search", "must archive", "must be audited when accessing"]
+OBJECTS = ["appointment slots", "lab results", "prescriptions", "insurance claims", "PHI records",
+           "discharge summaries", "allergy lists", "encryption keys"]
+
+
+def requirement(rng):
+    return f"{rng.choice(ACTORS)} {rng.choice(ACTIONS)} {rng.choice(OBJECTS)}"
+
+
+def percentiles(samples_ms):
+    samples_ms = sorted(samples_ms)
+    p95 = samples_ms[min(len(samples_ms) - 1, int(round(0.95 * (len(samples_ms) - 1))))]
+    return f"p50={statistics.median(samples_ms):8.2f} ms  p95={p95:8.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--reqs-per-session", type=int, default=4)
+    parser.add_argument("--cases-per-req", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=40, help="generation requests for the reuse comparison")
+    parser.add_argument("--recurring", type=float, default=0.6, help="share of request requirements already in the library")
+    parser.add_argument("--embed-latency", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    model, embedder = install_fake_vertex(num_cases=args.cases_per_req, embed_latency=args.embed_latency)
+    from case_library import CaseLibrary, SEARCH_MODES
+    from generator import GeneratorService
+    import case_library
+
+    rng = random.Random(args.seed)
+    columns = ["summary", "description", "steps", "expectedResults"]
+    library = case_library.get_case_library()
+    seen = []
+    try:
+        t0 = time.perf_counter()
+        for s in range(args.sessions):
+            reqs = [requirement(rng) for _ in range(args.reqs_per_session)]
+            seen.extend(reqs)
+            groups, texts = {}, {}
+            for n, r in enumerate(reqs):
+                fp = f"s{s}r{n}"
+                texts[fp] = "Typed Requirement:\n" + r
+                groups[fp] = [{c: f"{c}: {r} scenario {k}" for c in columns} for k in range(args.cases_per_req)]
+            library.add_session(f"session_{s}", "jira", columns, [c for g in groups.values() for c in g], groups, texts)
+        add_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        library.warm()
+        embed_s = time.perf_counter() - t0
+        print(f"sessions={args.sessions} entries={library.stats()['entries']}  add={add_s / args.sessions * 1000:.2f} ms/session  "
+              f"embed_all={embed_s:.2f}s  ({embedder.texts_embedded} texts)")
+
+        other = CaseLibrary(model=embedder)
+        t0 = time.perf_counter()
+        other.sync()
+        full_ms = (time.perf_counter() - t0) * 1000
+        library.add_session("session_new", "jira", columns, [{c: "new case" for c in columns}])
+        t0 = time.perf_counter()
+        other.sync()
+        print(f"another worker: full load={full_ms:.1f} ms  sync one new session={(time.perf_counter() - t0) * 1000:.2f} ms")
+
+        queries = [requirement(rng) for _ in range(args.queries)]
+        for mode in SEARCH_MODES:
+            latencies = []
+            for q in queries:
+                t0 = time.perf_counter()
+                library.search(q, 10, mode=mode)
+                latencies.append((time.perf_counter() - t0) * 1000)
+            print(f"search {mode:<8} {percentiles(latencies)}")
+
+        requests = []
+        for _ in range(args.requests):
+            reqs = []
+            for _ in range(3):
+                if rng.random() < args.recurring:
+                    reqs.append(rng.choice(seen).lower() + ".")  # reformatted copy of a known requirement
+                else:
+                    reqs.append(f"{requirement(rng)} within {rng.randint(2, 99)} minutes of discharge")
+            requests.append(reqs)
+        service = GeneratorService()
+        service.load_format = lambda alm_tool, report=None, query=None: ("", columns)
+        for reuse_first in (False, True):
+            calls, reused, t0 = model.calls, 0, time.perf_counter()
+            for reqs in requests:
+                report = {}
+                service.generate_full_pipeline(typed_requirements=reqs, report=report, reuse_first=reuse_first,
+                                                sharded=False, use_cache=False)
+                reused += (report.get("library") or {}).get("reused", 0)
+            print(f"reuse_first={str(reuse_first):<5} model_calls={model.calls - calls:4d}  requirements_reused={reused:4d}/{3 * len(requests)}  "
+                  f"wall={time.perf_counter() - t0:.2f}s")
+    finally:
+        shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
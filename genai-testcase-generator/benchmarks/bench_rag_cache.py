@@ -0,0 +1,84 @@
+# benchmarks/bench_rag_cache.py
+"""
+Cold vs warm RAG retrieval latency using a local fake embedding model.
+
+    python benchmarks/bench_rag_cache.py --latency 0.2 --queries 20
+
+- uncached: re-chunk and embed the whole corpus + the query on every request
+- cold:     empty embedding cache, first query in a fresh process
+- warm:     cache populated, fresh process (prebuilt index loaded from disk)
+- hot:      same process, index already in memory (only the query is embedded)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+import numpy as np
+import faiss
+from fake_vertex import FakeEmbeddingModel
+from rag_loader import RagIndex, RAG_DIR
+from rag_ingest import load_chunks
+
+QUERIES = [
+    "Patient demographics must be validated",
+    "Encrypt PHI at rest and in transit",
+    "Audit trail for record access",
+    "Role-based access control for clinicians",
+    "Appointment reminder notifications",
+]
+
+
+def uncached_search(model, rag_dir, query, k):
+    texts = [c["text"] for c in load_chunks(rag_dir)]
+    vecs = np.array([e.values for e in model.get_embeddings(texts)]).astype("float32")
+    index = faiss.IndexFlatL2(vecs.shape[1])
+    index.add(vecs)
+    qvec = np.array([model.get_embeddings([query])[0].values]).astype("float32")
+    index.search(qvec, k)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+def summarize(name, samples, calls):
+    print(f"{name:<10} n={len(samples):<4} p50={statistics.median(samples):8.2f} ms  "
+          f"max={max(samples):8.2f} ms  embed_calls={calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rag-dir", default=RAG_DIR)
+    parser.add_argument("--latency", type=float, default=0.1, help="simulated seconds per embedding call")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    queries = [QUERIES[i % len(QUERIES)] for i in range(args.queries)]
+    with tempfile.TemporaryDirectory() as cache_dir:
+        model = FakeEmbeddingModel(latency=args.latency)
+        samples = [timed(lambda q=q: uncached_search(model, args.rag_dir, q, args.k)) for q in queries]
+        summarize("uncached", samples, model.calls)
+
+        model = FakeEmbeddingModel(latency=args.latency)
+        cold = RagIndex(args.rag_dir, cache_dir, model=model, model_name="fake")
+        summarize("cold", [timed(lambda: cold.search(queries[0], args.k))], model.calls)
+
+        model = FakeEmbeddingModel(latency=args.latency)
+        warm = RagIndex(args.rag_dir, cache_dir, model=model, model_name="fake")
+        summarize("warm", [timed(lambda: warm.search(queries[0], args.k))], model.calls)
+
+        model.calls = 0
+        samples = [timed(lambda q=q: warm.search(q, args.k)) for q in queries]
+        summarize("hot", samples, model.calls)
+
+
+if __name__ == "__main__":
+    main()
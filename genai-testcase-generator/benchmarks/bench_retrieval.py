@@ -0,0 +1,98 @@
+# benchmarks/bench_retrieval.py
+"""
+Retrieval quality and latency of the vector, lexical (BM25) and hybrid (RRF) retrievers
+on a fixed query set over rag/, plus the hybrid fast path when embedding the query
+is slower than RAG_EMBED_DEADLINE_SECONDS.
+
+    python benchmarks/bench_retrieval.py --embed-latency 0.15 -k 3
+    python benchmarks/bench_retrieval.py --vertex          # real embeddings (needs credentials)
+
+A chunk is relevant when it contains one of the query's marker strings. Quality is
+hit@k and MRR@k. The default fake embedder is a hashing trick (lexical-ish), so its
+vector quality only indicates plumbing; use --vertex for a meaningful comparison.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+logging.disable(logging.WARNING)
+
+import rag_loader
+from fake_vertex import FakeEmbeddingModel
+from rag_loader import RagIndex, RAG_DIR, EMBEDDING_MODEL_NAME
+
+# (query, markers of the relevant chunks)
+QUERIES = [
+    ("Check medication allergies before a prescription is approved", ["HC-104"]),
+    ("Prevent a doctor from being booked twice for the same slot", ["HC-109", "REQ-009"]),
+    ("Every read or delete of patient records is logged", ["HC-107"]),
+    ("HL7 FHIR interoperability for data exchange", ["HC-110"]),
+    ("ICD-10 and CPT codes required on insurance claims", ["HC-105", "REQ-005"]),
+    ("Lab results attached to the right encounter", ["HC-108"]),
+    ("Electronic signatures and audit trails under Part 11", ["21 CFR Part 11"]),
+    ("Risk analysis and risk controls for medical devices", ["ISO 14971"]),
+    ("Software safety classification A B C lifecycle", ["IEC 62304"]),
+    ("Unique patient identifier across the system", ["HC-102"]),
+    ("Hide patient health data from unauthorized users", ["HC-106"]),
+    ("Null diagnosis values in EHR records", ["HC-103"]),
+]
+
+
+def quality(results, markers):
+    """(hit, reciprocal rank) of the first relevant chunk in results."""
+    for rank, c in enumerate(results, start=1):
+        if any(m.lower() in c["text"].lower() for m in markers):
+            return 1, 1.0 / rank
+    return 0, 0.0
+
+
+def run_mode(index, mode, k):
+    latencies, hits, rr, retrievers = [], [], [], {}
+    for query, markers in QUERIES:
+        t0 = time.perf_counter()
+        results = index.search_chunks(query, k, mode)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        hit, r = quality(results, markers)
+        hits.append(hit)
+        rr.append(r)
+        for c in results[:1]:
+            retrievers[c["retriever"]] = retrievers.get(c["retriever"], 0) + 1
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))]
+    print(f"{mode:<18} hit@{k}={sum(hits) / len(hits):5.2f}  MRR@{k}={sum(rr) / len(rr):5.2f}  "
+          f"p50={statistics.median(latencies):8.2f} ms  p95={p95:8.2f} ms  served_by={retrievers}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rag-dir", default=RAG_DIR)
+    parser.add_argument("--embed-latency", type=float, default=0.15, help="simulated seconds per fake embedding call")
+    parser.add_argument("--slow-latency", type=float, default=3.0, help="embedding latency for the deadline scenario")
+    parser.add_argument("--deadline", type=float, default=0.5, help="RAG_EMBED_DEADLINE_SECONDS for the run")
+    parser.add_argument("--vertex", action="store_true", help="use the real Vertex embedding model")
+    parser.add_argument("-k", type=int, default=3)
+    args = parser.parse_args()
+
+    rag_loader.RAG_EMBED_DEADLINE_SECONDS = args.deadline
+    with tempfile.TemporaryDirectory(prefix="bench_retrieval_") as cache_dir:
+        model = None if args.vertex else FakeEmbeddingModel(latency=args.embed_latency)
+        index = RagIndex(args.rag_dir, cache_dir, model=model, model_name=EMBEDDING_MODEL_NAME if args.vertex else "fake")
+        index.ensure_fresh()  # embed the corpus once, outside the measurements
+        print(f"queries={len(QUERIES)} chunks={len(index.chunks)} k={args.k} deadline={args.deadline}s")
+        for mode in ("vector", "lexical", "hybrid"):
+            run_mode(index, mode, args.k)
+
+        if not args.vertex:
+            # same corpus, but every query embedding now misses the deadline
+            index._model = FakeEmbeddingModel(latency=args.slow_latency)
+            print(f"-- query embedding takes {args.slow_latency}s --")
+            run_mode(index, "hybrid", args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost of the backend, measured in fresh interpreter processes:
+import time of backend_api, the one-time startup(), the first lightweight request
+(/status) and the first /generate_testcases against fake Vertex models (which pulls
+in the lazily imported dependencies).
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+BACKEND = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend"))
+BENCHMARKS = os.path.abspath(os.path.dirname(__file__))
+HEAVY_MODULES = ("vertexai", "pandas", "faiss", "docx", "PyPDF2")
+
+CHILD = r"""
+import sys, time, json, logging
+t0 = time.perf_counter()
+sys.path[:0] = [{backend!r}, {benchmarks!r}]
+logging.disable(logging.WARNING)
+from fake_vertex import install_fake_vertex
+install_fake_vertex()
+t_fake = time.perf_counter()
+import backend_api
+t_import = time.perf_counter()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+backend_api.startup(warm=False)
+t_startup = time.perf_counter()
+client = backend_api.app.test_client()
+assert client.get("/status").status_code == 200
+t_status = time.perf_counter()
+payload = {{"username": "bench", "use_cache": False, "inputs": {{"typed_requirements": ["Patients can book appointments"]}}}}
+assert client.post("/generate_testcases", json=payload).status_code == 200
+t_generate = time.perf_counter()
+print(json.dumps({{
+    "import_s": t_import - t_fake,
+    "startup_s": t_startup - t_import,
+    "first_status_s": t_status - t_startup,
+    "first_generate_s": t_generate - t_status,
+    "time_to_first_request_s": t_status - t0,
+    "heavy_loaded_at_import": loaded,
+}}))
+"""
+
+
+def run_child(scratch):
+    env = dict(os.environ, TEMP_FOLDER=os.path.join(scratch, "uploads"), RAG_CACHE_DIR=os.path.join(scratch, "rag_cache"),
+               LLM_CACHE_DIR=os.path.join(scratch, "llm_cache"), SESSION_STORE="memory")
+    out = subprocess.run([sys.executable, "-c", CHILD.format(backend=BACKEND, benchmarks=BENCHMARKS, heavy=HEAVY_MODULES)],
+                         env=env, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_startup_") as scratch:
+        results = [run_child(scratch) for _ in range(args.runs)]
+    for key in ("import_s", "startup_s", "first_status_s", "time_to_first_request_s", "first_generate_s"):
+        print(f"{key:<26} median={statistics.median(r[key] for r in results):7.3f}s")
+    print(f"heavy modules loaded by import: {results[0]['heavy_loaded_at_import'] or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
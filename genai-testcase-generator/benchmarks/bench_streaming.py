@@ -0,0 +1,64 @@
+# benchmarks/bench_streaming.py
+"""
+Time-to-first-test-case: blocking generate + whole-text parse vs streamed
+generation + incremental JSON parsing, against a fake streaming Gemini model.
+
+    python benchmarks/bench_streaming.py --latency 20 --cases 15 --runs 3
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+logging.disable(logging.WARNING)
+
+from fake_vertex import FakeGenerativeModel
+from vertex_ai_client import VertexClientManager
+from stream_parser import JsonArrayStreamParser
+from generator import GeneratorService
+
+PROMPT = 'Return strictly valid JSON array where each object has keys: "TestCaseID", "Description", "ExpectedResult", "Priority".'
+
+
+def blocking_run(manager, parse):
+    t0 = time.perf_counter()
+    cases, _ = parse(manager.generate(PROMPT, "fake-gemini"))
+    first = last = time.perf_counter() - t0
+    return first, last, len(cases)
+
+
+def streaming_run(manager):
+    t0 = time.perf_counter()
+    parser, first, count = JsonArrayStreamParser(), None, 0
+    for text in manager.stream(PROMPT, "fake-gemini"):
+        for _ in parser.feed(text):
+            count += 1
+            if first is None:
+                first = time.perf_counter() - t0
+    return first, time.perf_counter() - t0, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=5.0, help="simulated seconds for the full response")
+    parser.add_argument("--cases", type=int, default=15)
+    parser.add_argument("--chunk-chars", type=int, default=64)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    fake = FakeGenerativeModel(latency=args.latency, num_cases=args.cases, chunk_chars=args.chunk_chars)
+    manager = VertexClientManager(model_factory=lambda name: fake, rpm=10_000, tpm=100_000_000)
+    parse = GeneratorService().parse_generator_output_safe
+
+    for name, run in (("blocking", lambda: blocking_run(manager, parse)), ("streaming", lambda: streaming_run(manager))):
+        results = [run() for _ in range(args.runs)]
+        ttfc = statistics.median(r[0] for r in results)
+        total = statistics.median(r[1] for r in results)
+        print(f"{name:<10} cases={results[0][2]:<3} time_to_first_case={ttfc:7.3f}s  time_to_all_cases={total:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
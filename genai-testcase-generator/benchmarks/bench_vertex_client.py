@@ -0,0 +1,74 @@
+# benchmarks/bench_vertex_client.py
+"""
+Drive VertexClientManager against a fake Gemini model that injects latency and 429s.
+
+    python benchmarks/bench_vertex_client.py --requests 200 --threads 16 --error-rate 0.2
+
+Reports throughput, retries, throttling, the adaptive concurrency limit and circuit
+breaker trips. A second phase with --outage-requests sends calls while the fake
+upstream fails every request, to show the breaker failing fast.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+from fake_vertex import FakeGenerativeModel
+from vertex_ai_client import VertexClientManager
+from rate_limit import CircuitOpenError
+
+
+def run_phase(manager, n_requests, threads):
+    outcomes = {"ok": 0, "failed": 0, "circuit_open": 0}
+
+    def call(i):
+        try:
+            manager.generate(f"prompt {i}", "fake-gemini")
+            return "ok"
+        except CircuitOpenError:
+            return "circuit_open"
+        except Exception:
+            return "failed"
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for result in pool.map(call, range(n_requests)):
+            outcomes[result] += 1
+    return outcomes, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--rpm", type=int, default=6000)
+    parser.add_argument("--tpm", type=int, default=10_000_000)
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--outage-requests", type=int, default=50)
+    args = parser.parse_args()
+    logging.getLogger("vertex_ai_client").setLevel(logging.ERROR)
+
+    fake = FakeGenerativeModel(latency=args.latency, error_rate=args.error_rate)
+    manager = VertexClientManager(model_factory=lambda name: fake, rpm=args.rpm, tpm=args.tpm,
+                                  max_concurrency=args.max_concurrency, backoff_base=0.05, backoff_max=1.0,
+                                  breaker_failures=20, breaker_reset_seconds=2.0)
+    outcomes, elapsed = run_phase(manager, args.requests, args.threads)
+    print(f"load:   {outcomes}  {elapsed:.2f}s  {outcomes['ok'] / elapsed:.1f} ok/s  upstream_calls={fake.calls}")
+    print(f"        {manager.stats()}")
+
+    if args.outage_requests:
+        fake.error_rate = 1.0
+        calls_before = fake.calls
+        outcomes, elapsed = run_phase(manager, args.outage_requests, args.threads)
+        print(f"outage: {outcomes}  {elapsed:.2f}s  upstream_calls={fake.calls - calls_before}")
+        print(f"        {manager.stats()}")
+
+
+if __name__ == "__main__":
+    main()
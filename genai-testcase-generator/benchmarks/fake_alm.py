@@ -0,0 +1,160 @@
+# benchmarks/fake_alm.py
+"""
+Local stand-in for the Jira, Azure DevOps and Polarion REST APIs used by alm_connectors.
+Serves generated work items over keep-alive HTTP/1.1 with a fixed per-request latency,
+server-side page size limits, and ETag / Last-Modified validators (304 when unchanged).
+Like Jira, the JQL search answers 400 when it names an unknown issue key, unless the
+query is sent with validateQuery=warn/false (then the unknown keys are only reported).
+Used by bench_alm.py, tests/test_alm_connectors.py and for offline development.
+
+    server = FakeAlmServer(items=300, latency=0.02).start()
+    os.environ["JIRA_BASE_URL"] = server.url
+"""
+import json
+import time
+import socket
+import hashlib
+import threading
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+ADO_ORG, ADO_PROJECT = "acme", "Health"
+POLARION_PROJECT = "HEALTH"
+JIRA_PROJECT = "HC"
+ADO_FIRST_ID = 1000
+
+
+class FakeAlmServer:
+    def __init__(self, items=300, latency=0.02, page_limit=25, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.page_limit = page_limit
+        self.updated = {n: 1_700_000_000 for n in range(1, items + 1)}
+        self.counters = {"requests": 0, "connections": 0, "not_modified": 0}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler())
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.ado_url = f"{self.url}/{ADO_ORG}"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, name="fake-alm", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def touch(self, numbers):
+        """Mark work items as edited, so responses containing them change."""
+        with self._lock:
+            for n in numbers:
+                self.updated[n] = self.updated[n] + 60
+
+    def reset_counters(self):
+        with self._lock:
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    # ---- work items ----
+
+    def _text(self, n):
+        return (f"<p>Version {self.updated[n]}: clinicians must be able to review record {n} "
+                f"and every change must be written to the audit trail.</p>")
+
+    def jira_issue(self, n):
+        return {"key": f"{JIRA_PROJECT}-{n}", "fields": {"summary": f"Review patient record {n}",
+                                                          "description": self._text(n)}}
+
+    def ado_item(self, n):
+        return {"id": ADO_FIRST_ID + n, "fields": {
+            "System.Title": f"Sign off discharge summary {n}", "System.Description": self._text(n),
+            "Microsoft.VSTS.Common.AcceptanceCriteria": f"<ul><li>Summary {n} is locked after sign-off</li></ul>"}}
+
+    def polarion_item(self, n):
+        return {"type": "workitems", "id": f"{POLARION_PROJECT}/{POLARION_PROJECT}-{n}",
+                "attributes": {"title": f"Encrypt lab result {n}",
+                               "description": {"type": "text/html", "value": self._text(n)}}}
+
+    def _number(self, token, prefix=None, offset=0):
+        try:
+            n = int(token.rsplit("-", 1)[-1]) - offset if prefix is None or token.startswith(prefix) else None
+        except ValueError:
+            return None
+        return n if n in self.updated else None
+
+    # ---- endpoints ----
+
+    def route(self, path, query):
+        """(body, item numbers it covers) for a GET, (status, error body) for a bad request, or None for 404."""
+        q = {k: v[0] for k, v in parse_qs(query).items()}
+        if path == "/rest/api/2/search":
+            keys = [k.strip() for k in q.get("jql", "").partition("(")[2].rstrip(")").split(",") if k.strip()]
+            unknown = [k for k in keys if not self._number(k, f"{JIRA_PROJECT}-")]
+            messages = [f"An issue with key '{k}' does not exist for field 'key'." for k in unknown]
+            if unknown and q.get("validateQuery", "strict") not in ("warn", "false"):
+                return 400, {"errorMessages": messages, "errors": {}}
+            numbers = sorted(n for n in (self._number(k, f"{JIRA_PROJECT}-") for k in keys) if n)
+            start, size = int(q.get("startAt", 0)), min(int(q.get("maxResults", 50)), self.page_limit)
+            page = numbers[start:start + size]
+            return {"startAt": start, "maxResults": size, "total": len(numbers),
+                    "issues": [self.jira_issue(n) for n in page], "warningMessages": messages}, page
+        if path == f"/{ADO_ORG}/{ADO_PROJECT}/_apis/wit/workitems":
+            numbers = [self._number(i, offset=ADO_FIRST_ID) for i in q.get("ids", "").split(",") if i]
+            return {"count": len(numbers), "value": [self.ado_item(n) if n else None for n in numbers]}, [n for n in numbers if n]
+        if path == f"/polarion/rest/v1/projects/{POLARION_PROJECT}/workitems":
+            ids = q.get("query", "").partition("(")[2].rstrip(")").split()
+            numbers = sorted(n for n in (self._number(i, f"{POLARION_PROJECT}-") for i in ids) if n)
+            size, number = min(int(q.get("page[size]", 100)), self.page_limit), int(q.get("page[number]", 1))
+            page = numbers[(number - 1) * size:number * size]
+            links = {"next": f"{path}?page[number]={number + 1}"} if number * size < len(numbers) else {}
+            return {"data": [self.polarion_item(n) for n in page], "links": links, "meta": {"totalCount": len(numbers)}}, page
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def setup(self):
+                super().setup()
+                # headers and body go out as separate writes; without this, delayed ACKs stall keep-alive
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server.count("connections")
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                server.count("requests")
+                time.sleep(server.latency)
+                parsed = urlparse(self.path)
+                routed = server.route(unquote(parsed.path), parsed.query)
+                if routed is None:
+                    return self._send(404, b'{"error": "not found"}')
+                if isinstance(routed[0], int):
+                    return self._send(routed[0], json.dumps(routed[1]).encode("utf-8"))
+                body, numbers = routed
+                data = json.dumps(body).encode("utf-8")
+                etag = '"' + hashlib.sha1(data).hexdigest() + '"'
+                modified = formatdate(max((server.updated[n] for n in numbers), default=0), usegmt=True)
+                if self.headers.get("If-None-Match") == etag:
+                    server.count("not_modified")
+                    return self._send(304, b"", etag, modified)
+                self._send(200, data, etag, modified)
+
+            def _send(self, status, data, etag=None, modified=None):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                if etag:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", modified)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
@@ -0,0 +1,139 @@
+# benchmarks/fake_vertex.py
+"""
+Local, network-free stand-ins for the Vertex AI models used by the backend.
+Used by the benchmarks in this folder and the tests, and for offline development.
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+KEYS_RE = re.compile(r"keys:\s*((?:\"[^\"]+\"(?:,\s*)?)+)")
+DEFAULT_KEYS = ["TestCaseID", "Description", "Requirement", "ExpectedResult", "Priority", "Notes"]
+
+
+class FakeEmbedding:
+    def __init__(self, values):
+        self.values = values
+
+
+class FakeEmbeddingModel:
+    """
+    Deterministic hashing-trick embedder with the same get_embeddings() shape as
+    TextEmbeddingModel. Texts sharing words end up close in L2 space, so retrieval
+    results are meaningful enough for benchmarks.
+    """
+
+    def __init__(self, dim=256, latency=0.0):
+        self.dim = dim
+        self.latency = latency
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype="float32")
+        for tok in TOKEN_RE.findall(text.lower()):
+            h = int.from_bytes(hashlib.md5(tok.encode("utf-8")).digest()[:8], "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    def get_embeddings(self, texts):
+        self.calls += 1
+        self.texts_embedded += len(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        return [FakeEmbedding(self._embed(t)) for t in texts]
+
+
+class FakeRateLimitError(Exception):
+    """Mimics google.api_core.exceptions.TooManyRequests (code 429)."""
+    code = 429
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Stand-in for GenerativeModel: answers generate_content() with a JSON array of
+    test cases using the keys requested in the prompt, after `latency` seconds.
+    A fraction `error_rate` of calls raise FakeRateLimitError instead. With stream=True
+    the text arrives in `chunk_chars` pieces with the latency spread across them.
+    `pad_chars` adds filler to every text field to simulate larger outputs.
+    """
+
+    def __init__(self, model_name="fake-gemini", latency=0.0, error_rate=0.0, num_cases=10, seed=0, chunk_chars=64, pad_chars=0):
+        self.model_name = model_name
+        self.chunk_chars = chunk_chars
+        self.pad_chars = pad_chars
+        self.latency = latency
+        self.error_rate = error_rate
+        self.num_cases = num_cases
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def build_cases(self, prompt):
+        m = KEYS_RE.search(prompt)
+        keys = re.findall(r'"([^"]+)"', m.group(1)) if m else DEFAULT_KEYS
+        digest = hashlib.md5(prompt.encode("utf-8")).hexdigest()[:6]
+        pad = (" lorem" * (self.pad_chars // 6 + 1))[:self.pad_chars]
+        cases = []
+        for n in range(1, self.num_cases + 1):
+            case = {k: f"{k} for scenario {n} ({digest}){pad}" for k in keys}
+            for k in keys:
+                if k.lower() in ("testcaseid", "id"):
+                    case[k] = f"TC{n:03d}"
+                elif k.lower() == "priority":
+                    case[k] = ("High", "Medium", "Low")[n % 3]
+            cases.append(case)
+        return cases
+
+    def generate_content(self, prompt, stream=False):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        text = json.dumps(self.build_cases(prompt), ensure_ascii=False)
+        if stream:
+            return self._stream(text, fail)
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise FakeRateLimitError("429 Resource exhausted (simulated)")
+        return FakeResponse(text)
+
+    def _stream(self, text, fail):
+        if fail:
+            time.sleep(self.latency * 0.1)
+            raise FakeRateLimitError("429 Resource exhausted (simulated)")
+        pieces = [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+        for piece in pieces:
+            if self.latency:
+                time.sleep(self.latency / len(pieces))
+            yield FakeResponse(piece)
+
+
+def install_fake_vertex(latency=0.0, error_rate=0.0, num_cases=10, pad_chars=0, embed_latency=0.0, seed=0, **manager_kwargs):
+    """
+    Route every Gemini/embedding call of the backend to fakes by replacing
+    vertex_ai_client.CLIENTS. Call before importing modules that start warm-up
+    threads (backend_api). Returns (generative_model, embedding_model).
+    """
+    import vertex_ai_client
+    model = FakeGenerativeModel(latency=latency, error_rate=error_rate, num_cases=num_cases, seed=seed, pad_chars=pad_chars)
+    embedder = FakeEmbeddingModel(latency=embed_latency)
+    manager_kwargs.setdefault("rpm", 1_000_000)
+    manager_kwargs.setdefault("tpm", 1_000_000_000)
+    vertex_ai_client.CLIENTS = vertex_ai_client.VertexClientManager(
+        model_factory=lambda name: model, embedding_factory=lambda name: embedder, **manager_kwargs)
+    return model, embedder
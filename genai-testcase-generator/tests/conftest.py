@@ -0,0 +1,25 @@
+# tests/conftest.py
+"""
+Shared setup for the backend tests: backend/ and benchmarks/ (the fake Vertex models and
+ALM server) are importable, and every cache, upload and library folder points into a
+scratch directory, set before any backend module reads its environment.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+import shutil
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path[:0] = [os.path.join(ROOT, "backend"), os.path.join(ROOT, "benchmarks")]
+
+SCRATCH = tempfile.mkdtemp(prefix="tcgen_tests_")
+for var, sub in (("TEMP_FOLDER", "uploads"), ("RAG_CACHE_DIR", "rag_cache"), ("LLM_CACHE_DIR", "llm_cache"),
+                 ("ALM_CACHE_DIR", "alm_cache")):
+    os.environ[var] = os.path.join(SCRATCH, sub)
+os.environ["SESSION_STORE"] = "memory"
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
@@ -0,0 +1,149 @@
+# tests/test_alm_connectors.py
+import math
+import pytest
+import requests
+import alm_connectors
+from alm_connectors import (AlmFetcher, AlmHttp, JiraConnector, PolarionConnector, AzureDevOpsConnector,
+                            ADO_MAX_IDS, alm_references)
+from fake_alm import FakeAlmServer, ADO_PROJECT, ADO_FIRST_ID, POLARION_PROJECT, JIRA_PROJECT
+
+ITEMS = 320
+PAGE_LIMIT = 25
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = FakeAlmServer(items=ITEMS, latency=0.002, page_limit=PAGE_LIMIT).start()
+    yield server
+    server.stop()
+
+
+class RecordingHttp(AlmHttp):
+    """AlmHttp that remembers the query parameters of every request."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def get_json(self, url, params=None, headers=None, auth=None, tally=None):
+        self.calls.append((url, dict(params or {})))
+        return super().get_json(url, params, headers, auth, tally)
+
+
+def fetcher(server, tmp_path, batch_size=100, http=None):
+    connectors = [JiraConnector(server.url), PolarionConnector(server.url, POLARION_PROJECT),
+                  AzureDevOpsConnector(server.ado_url, ADO_PROJECT)]
+    http = http or RecordingHttp(pool_size=4, cache_dir=str(tmp_path / "alm_cache"))
+    return AlmFetcher(connectors, http=http, workers=4, batch_size=batch_size)
+
+
+def jira(numbers, server):
+    return {"Jira": {"tickets": [f"{server.url}/browse/{JIRA_PROJECT}-{n}" for n in numbers]}}
+
+
+def pages(batch_size):
+    """Requests a paged bulk query of all ITEMS needs: one per server page of every batch."""
+    sizes = [min(batch_size, ITEMS - start) for start in range(0, ITEMS, batch_size)]
+    return sum(math.ceil(s / PAGE_LIMIT) for s in sizes)
+
+
+def test_alm_references_shapes():
+    refs = alm_references({"Jira": {"tickets": ["A-1", " "]}, "Polarion": {"items": []}, "Azure DevOps": "7"})
+    assert refs == [("Jira", "tickets", "A-1"), ("Azure DevOps", None, "7")]
+
+
+def test_jira_follows_start_at_paging(server, tmp_path):
+    f = fetcher(server, tmp_path)
+    items, unresolved, info = f.fetch(jira(range(1, ITEMS + 1), server))
+    assert [i["id"] for i in items] == [f"{JIRA_PROJECT}-{n}" for n in range(1, ITEMS + 1)]
+    assert unresolved == {}
+    assert info["http_requests"] == pages(100)
+    starts = sorted({c[1]["startAt"] for c in f.http.calls})
+    assert starts == [0, 25, 50, 75]
+    assert items[0]["title"] == "Review patient record 1" and "<p>" not in items[0]["text"]
+
+
+def test_polarion_follows_next_links(server, tmp_path):
+    f = fetcher(server, tmp_path)
+    refs = [f"{POLARION_PROJECT}-{n}" for n in range(1, ITEMS + 1)]
+    items, unresolved, info = f.fetch({"Polarion": {"items": refs}})
+    assert [i["id"] for i in items] == refs
+    assert unresolved == {}
+    assert info["http_requests"] == pages(100)
+    assert max(c[1]["page[number]"] for c in f.http.calls) == 4
+
+
+def test_ado_batches_stay_within_api_limit(server, tmp_path):
+    f = fetcher(server, tmp_path, batch_size=1000)
+    refs = [str(ADO_FIRST_ID + n) for n in range(1, ITEMS + 1)]
+    items, unresolved, info = f.fetch({"Azure DevOps": {"items": refs}})
+    assert len(items) == ITEMS and unresolved == {}
+    batches = [len(c[1]["ids"].split(",")) for c in f.http.calls]
+    assert max(batches) <= ADO_MAX_IDS
+    assert sum(batches) == ITEMS
+    assert "locked after sign-off" in alm_connectors.item_text(items[0])
+
+
+def test_revalidation_reuses_cached_body_and_sees_edits(tmp_path):
+    server = FakeAlmServer(items=60, latency=0, page_limit=PAGE_LIMIT).start()
+    try:
+        inputs = jira(range(1, 61), server)
+        first, _, info = fetcher(server, tmp_path).fetch(inputs)
+        assert info["not_modified"] == 0
+
+        again, _, info = fetcher(server, tmp_path).fetch(inputs)  # new process, same cache folder
+        assert info["not_modified"] == info["http_requests"] > 0
+        assert again == first
+
+        server.touch([5])
+        edited, _, info = fetcher(server, tmp_path).fetch(inputs)
+        assert 0 < info["not_modified"] < info["http_requests"]
+        assert edited[4]["text"] != first[4]["text"]
+        assert edited[5:] == first[5:]
+    finally:
+        server.stop()
+
+
+def test_unknown_ids_land_in_unresolved(server, tmp_path):
+    inputs = {"Jira": {"tickets": [f"{server.url}/browse/{JIRA_PROJECT}-3", f"{JIRA_PROJECT}-9999",
+                                   "https://other.atlassian.net/browse/X-1"]},
+              "Polarion": {"items": [f"{POLARION_PROJECT}-4", f"{POLARION_PROJECT}-9999"]},
+              "Azure DevOps": {"items": [str(ADO_FIRST_ID + 5), "99999"]}}
+    items, unresolved, info = fetcher(server, tmp_path).fetch(inputs)
+    assert [i["id"] for i in items] == [f"{JIRA_PROJECT}-3", f"{POLARION_PROJECT}-4", str(ADO_FIRST_ID + 5)]
+    assert unresolved == {"Jira": {"tickets": [f"{JIRA_PROJECT}-9999", "https://other.atlassian.net/browse/X-1"]},
+                          "Polarion": {"items": [f"{POLARION_PROJECT}-9999"]},
+                          "Azure DevOps": {"items": ["99999"]}}
+    assert info == {"requested": 7, "fetched": 3, "failed": 3, "unsupported": 1, "http_requests": 3,
+                    "not_modified": 0, "errors": []}
+
+
+def test_unknown_jira_key_does_not_fail_its_batch(server, tmp_path):
+    keys = [f"{JIRA_PROJECT}-{n}" for n in range(1, 40)] + [f"{JIRA_PROJECT}-9999"]
+    strict = requests.get(f"{server.url}/rest/api/2/search", params={"jql": f"key in ({','.join(keys)})"})
+    assert strict.status_code == 400  # the stub validates like Jira does
+
+    items, unresolved, info = fetcher(server, tmp_path).fetch({"Jira": {"tickets": keys}})
+    assert len(items) == 39 and info["errors"] == []
+    assert unresolved == {"Jira": {"tickets": [f"{JIRA_PROJECT}-9999"]}}
+
+
+def test_generation_prompt_gets_fetched_text(server, tmp_path, monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    prompts = []
+    real = generator.generate_with_gemini
+    monkeypatch.setattr(generator, "generate_with_gemini", lambda p, *a, **k: prompts.append(p) or real(p, *a, **k))
+    monkeypatch.setattr(alm_connectors, "_FETCHER", fetcher(server, tmp_path))
+
+    url = f"{server.url}/browse/{JIRA_PROJECT}-7"
+    report = {}
+    _, reviewed, _, _ = generator.GeneratorService().generate_full_pipeline(
+        alm_inputs={"Jira": {"tickets": [url, f"{JIRA_PROJECT}-9999"]}}, report=report, sharded=False, use_cache=False)
+    assert len(reviewed) > 0
+    prompt = prompts[0]
+    assert "Review patient record 7" in prompt and "audit trail" in prompt
+    assert url not in prompt  # fetched, so not passed on as a bare reference
+    assert f"{JIRA_PROJECT}-9999" in prompt  # not fetched, passed on as given
+    assert report["alm_fetch"]["fetched"] == 1
@@ -0,0 +1,52 @@
+# tests/test_ann_index.py
+import numpy as np
+import pytest
+import ann_index
+
+faiss = pytest.importorskip("faiss")
+
+
+def vectors(n, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+
+
+def test_choose_index_type_by_size():
+    assert ann_index.choose_index_type(100, "auto") == "flat"
+    assert ann_index.choose_index_type(ann_index.RAG_IVF_MIN_VECTORS, "auto") == "ivf"
+    assert ann_index.choose_index_type(ann_index.RAG_PQ_MIN_VECTORS, "auto") == "ivfpq"
+    assert ann_index.choose_index_type(100, "ivf") == "flat"  # too few points to train
+    assert ann_index.choose_index_type(100, "hnsw") == "hnsw"
+    assert ann_index.choose_index_type(100, "bogus") == "flat"
+
+
+def test_pq_m_divides_dim():
+    for dim in (32, 100, 256, 768):
+        assert dim % ann_index.pq_m(dim) == 0
+    assert ann_index.pq_m(256, m=30) == 32
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf", "hnsw"])
+def test_saved_index_opens_memory_mapped_with_same_results(kind, tmp_path):
+    vecs = vectors(2000)
+    built = ann_index.build_index(vecs, kind)
+    path = str(tmp_path / f"{kind}.faiss")
+    ann_index.write_index(built, path)
+
+    loaded = ann_index.read_index(path, mmap=True)
+    _, expected = built.search(vecs[:10], 5)
+    _, got = loaded.search(vecs[:10], 5)
+    assert (got == expected).all()
+    assert loaded.ntotal == 2000
+
+
+def test_read_index_maps_flat_storage(monkeypatch, tmp_path):
+    if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        pytest.skip("faiss build cannot memory-map flat storage")
+    path = str(tmp_path / "flat.faiss")
+    ann_index.write_index(ann_index.build_index(vectors(50), "flat"), path)
+    seen = []
+    real = faiss.read_index
+    monkeypatch.setattr(faiss, "read_index", lambda p, flags=0: seen.append(flags) or real(p, flags))
+    ann_index.read_index(path, mmap=True)
+    assert seen[0] & faiss.IO_FLAG_MMAP_IFC == faiss.IO_FLAG_MMAP_IFC
+    assert seen[0] & faiss.IO_FLAG_READ_ONLY
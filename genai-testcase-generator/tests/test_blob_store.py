@@ -0,0 +1,47 @@
+# tests/test_blob_store.py
+import os
+import time
+from blob_store import BlobStore
+
+
+def session(store, name):
+    return os.path.join(store.root, f"user_session_{name}")
+
+
+def age(path, seconds):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path))
+    assert store.add_files(session(store, "a"), [("spec.pdf", b"same"), ("copy.pdf", b"same")]) == 1
+    assert store.add_files(session(store, "b"), [("spec.pdf", b"same")]) == 0
+    assert store.add_files(session(store, "a"), [("spec.pdf", b"same")]) == 0  # unchanged manifest entry
+    digest = store.read_manifest(session(store, "a"))["spec.pdf"]["digest"]
+    assert store.refcounts() == {digest: 3}
+    with store.open(digest) as f:
+        assert f.read() == b"same"
+
+
+def test_janitor_removes_expired_sessions_then_their_blobs(tmp_path):
+    store = BlobStore(str(tmp_path))
+    store.add_files(session(store, "old"), [("a.txt", b"old data")])
+    store.add_files(session(store, "new"), [("b.txt", b"new data")])
+    age(os.path.join(session(store, "old"), "manifest.json"), 3600)
+    stats = store.collect(session_ttl=60, quota_bytes=10**9, grace_seconds=3600)
+    assert stats["sessions_removed"] == 1 and stats["blobs_removed"] == 0  # blob still in its grace period
+
+    stats = store.collect(session_ttl=60, quota_bytes=10**9, grace_seconds=0)
+    assert stats["blobs_removed"] == 1 and stats["bytes_freed"] == len(b"old data")
+    assert [os.path.basename(f) for f in store.session_folders()] == ["user_session_new"]
+
+
+def test_janitor_drops_least_recent_sessions_over_quota(tmp_path):
+    store = BlobStore(str(tmp_path))
+    for n in range(3):
+        store.add_files(session(store, str(n)), [("f.bin", bytes([n]) * 100)])
+        age(os.path.join(session(store, str(n)), "manifest.json"), 300 - n * 100)
+    stats = store.collect(session_ttl=3600, quota_bytes=150, grace_seconds=3600)
+    assert stats["sessions_removed"] == 2 and stats["blobs_removed"] == 2
+    assert [os.path.basename(f) for f in store.session_folders()] == ["user_session_2"]
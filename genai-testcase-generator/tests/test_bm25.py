@@ -0,0 +1,33 @@
+# tests/test_bm25.py
+import pytest
+from bm25 import BM25Index, reciprocal_rank_fusion, tokenize, RRF_K
+
+DOCS = ["Accounts lock after three failed login attempts.",
+        "Every record access is written to the audit trail.",
+        "The audit trail audit log keeps audit entries for seven years.",
+        "Clinicians export discharge summaries as PDF."]
+
+
+def test_tokenize_drops_stopwords_and_single_letters():
+    assert tokenize("The user MUST log-in to a PDF x") == ["user", "log", "pdf"]
+
+
+def test_search_ranks_by_bm25_and_skips_unrelated_docs():
+    index = BM25Index(DOCS)
+    hits = index.search("audit trail", k=5)
+    assert [doc for doc, _ in hits] == [2, 1]
+    assert hits[0][1] > hits[1][1] > 0
+    assert index.search("failed login", k=1)[0][0] == 0
+    assert index.search("nothing matches here") == []
+
+
+def test_add_continues_doc_numbering():
+    index = BM25Index(DOCS[:2])
+    index.add(DOCS[2:])
+    assert index.n_docs == 4 and index.search("discharge pdf")[0][0] == 3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]])
+    assert [doc for doc, _ in fused] == [1, 3, 2]
+    assert fused[0][1] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 2))
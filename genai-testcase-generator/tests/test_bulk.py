@@ -0,0 +1,120 @@
+# tests/test_bulk.py
+import json
+import threading
+import pandas as pd
+import pytest
+from bulk import (BulkRunner, BulkConflictError, write_input, run_lock, is_running, read_status, parse_jsonl,
+                  normalize_record, SOURCE_COLUMN)
+
+COLUMNS = ["summary", "steps"]
+
+
+class FakeGenerator:
+    def __init__(self, fail=(), gate=None):
+        self.fail = set(fail)
+        self.gate = gate
+        self.seen = []
+
+    def generate_full_pipeline(self, typed_requirements=None, alm_inputs=None, alm_tool="jira", use_cache=True):
+        if self.gate is not None:
+            self.gate.wait(5)
+        text = typed_requirements[0]
+        self.seen.append(text)
+        if text in self.fail:
+            raise RuntimeError("model error")
+        df = pd.DataFrame([{"summary": f"Verify {text}", "steps": "1. do it"}], columns=COLUMNS)
+        return [], df, COLUMNS, ""
+
+
+RECORDS = [{"id": "A", "text": "login"}, {"id": "B", "text": "logout"}, {"id": "C", "text": "audit"}]
+
+
+def test_parse_jsonl_reports_bad_line():
+    assert parse_jsonl('{"id": 1}\n\n{"id": 2}\n') == [{"id": 1}, {"id": 2}]
+    with pytest.raises(ValueError, match="line 2"):
+        parse_jsonl('{"id": 1}\nnot json')
+
+
+def test_normalize_record_accepts_aliases():
+    item = normalize_record({"key": "X-1", "requirement": "r", "alm_tool": "Azure"}, 1)
+    assert item == {"id": "X-1", "alm_tool": "azure", "typed_requirements": ["r"], "alm_inputs": {}}
+    assert normalize_record({}, 7)["id"] == "item-7"
+
+
+def test_run_then_resume_retries_only_failures(tmp_path):
+    bulk_dir = str(tmp_path / "run")
+    write_input(bulk_dir, RECORDS)
+    status = BulkRunner(FakeGenerator(fail={"logout"}), bulk_dir, concurrency=2).run()
+    assert (status["completed"], status["failed"], status["state"]) == (2, 1, "finished")
+
+    generator = FakeGenerator()
+    status = BulkRunner(generator, bulk_dir, concurrency=2).run()
+    assert generator.seen == ["logout"]
+    assert (status["completed"], status["failed"], status["resumed"]) == (3, 0, 2)
+    with open(tmp_path / "run" / "bulk_jira.json", encoding="utf-8") as f:
+        cases = json.load(f)
+    assert [c[SOURCE_COLUMN] for c in cases] == ["A", "B", "C"]
+    assert read_status(bulk_dir)["outputs"]
+
+
+def test_same_records_resume_different_records_conflict(tmp_path):
+    bulk_dir = str(tmp_path / "run")
+    write_input(bulk_dir, RECORDS)
+    write_input(bulk_dir, [dict(r) for r in RECORDS])  # the same records again: a resume
+    with pytest.raises(BulkConflictError):
+        write_input(bulk_dir, [{"id": "A", "text": "login with SSO"}] + RECORDS[1:])
+
+
+def test_run_lock_is_exclusive(tmp_path):
+    bulk_dir = str(tmp_path / "run")
+    assert not is_running(bulk_dir)
+    with run_lock(bulk_dir):
+        assert is_running(bulk_dir)
+        with pytest.raises(BulkConflictError):
+            with run_lock(bulk_dir):
+                pass
+    assert not is_running(bulk_dir)
+
+
+def test_second_run_of_a_running_folder_is_refused(tmp_path):
+    bulk_dir = str(tmp_path / "run")
+    write_input(bulk_dir, RECORDS)
+    gate = threading.Event()
+    first = threading.Thread(target=BulkRunner(FakeGenerator(gate=gate), bulk_dir, concurrency=1).run)
+    first.start()
+    try:
+        for _ in range(100):
+            if is_running(bulk_dir):
+                break
+            threading.Event().wait(0.01)
+        with pytest.raises(BulkConflictError):
+            BulkRunner(FakeGenerator(), bulk_dir).run()
+    finally:
+        gate.set()
+        first.join(10)
+    assert read_status(bulk_dir)["completed"] == 3
+
+
+def test_bulk_api_rejects_changed_records_and_parallel_runs(monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=2)
+    import backend_api
+    backend_api.startup(warm=False)
+    gate = threading.Event()
+    monkeypatch.setattr(backend_api, "GENERATOR", FakeGenerator(gate=gate))
+    client = backend_api.app.test_client()
+
+    resp = client.post("/bulk_generate", json={"bulk_id": "api-run", "records": RECORDS})
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+    assert client.post("/bulk_generate", json={"bulk_id": "api-run"}).status_code == 409  # still running
+    gate.set()
+    for _ in range(500):
+        if client.get(f"/jobs/{job_id}").get_json()["state"] == "succeeded":
+            break
+        threading.Event().wait(0.01)
+
+    changed = [{"id": "A", "text": "login with SSO"}] + RECORDS[1:]
+    assert client.post("/bulk_generate", json={"bulk_id": "api-run", "records": changed}).status_code == 409
+    resp = client.post("/bulk_generate", json={"bulk_id": "api-run", "records": RECORDS})
+    assert resp.status_code == 202  # same records: resume
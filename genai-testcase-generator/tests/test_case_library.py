@@ -0,0 +1,137 @@
+# tests/test_case_library.py
+import json
+import pandas as pd
+import pytest
+import case_library
+from case_library import CaseLibrary, OUTPUT_NAME_RE
+from fake_vertex import FakeEmbeddingModel
+from incremental import make_unit, CASE_GROUPS_FILE
+
+COLUMNS = ["summary", "expectedResults"]
+LOCKOUT = make_unit("requirement", "Accounts lock after three failed login attempts",
+                    "Typed Requirement:\nAccounts lock after three failed login attempts")
+LOCKOUT_CASES = [{"summary": "Verify the account locks after three failed logins", "expectedResults": "Locked"}]
+AUDIT_CASES = [{"summary": "Verify every record access is written to the audit trail", "expectedResults": "Logged"}]
+
+
+def library(tmp_path, model=None):
+    return CaseLibrary(library_dir=str(tmp_path / "library"), uploads_dir=str(tmp_path / "uploads"),
+                       cache_dir=str(tmp_path / "cache"), model=model or FakeEmbeddingModel(dim=64))
+
+
+def add_lockout(lib, source="s1", alm_tool="jira"):
+    return lib.add_session(source, alm_tool, COLUMNS, LOCKOUT_CASES + AUDIT_CASES,
+                           {LOCKOUT["fingerprint"]: LOCKOUT_CASES}, {LOCKOUT["fingerprint"]: LOCKOUT["text"]})
+
+
+def test_output_name_pattern():
+    m = OUTPUT_NAME_RE.search("testcases_reviewed_azure_20260101_120000.xlsx")
+    assert m.groups() == ("reviewed", "azure")
+    assert OUTPUT_NAME_RE.search("testcases_reviewed_azure.xlsx") is None
+
+
+@pytest.mark.parametrize("mode", ["hybrid", "vector", "lexical"])
+def test_search_ranks_matching_case_first_and_filters(tmp_path, mode):
+    lib = library(tmp_path)
+    assert add_lockout(lib) == 3
+    add_lockout(lib, source="s2", alm_tool="azure")
+    hits = lib.search("audit trail record access", k=2, alm_tool="jira", mode=mode)
+    assert hits[0]["case"] == AUDIT_CASES[0] and hits[0]["retriever"] == mode
+    assert {h["source"] for h in hits} == {"s1"} and all(h["kind"] == "case" for h in hits)
+    assert [h["kind"] for h in lib.search("failed login", kind="requirement", mode=mode)] == ["requirement"] * 2
+
+
+def test_other_workers_see_appends_and_sources_are_added_once(tmp_path):
+    first, second = library(tmp_path), library(tmp_path)
+    add_lockout(first)
+    assert second.stats() == {"entries": 0, "sessions": 0, "case": 0, "requirement": 0}
+    assert second.search("audit trail")[0]["case"] == AUDIT_CASES[0]
+    assert add_lockout(second) == 0
+    assert second.stats() == {"entries": 3, "sessions": 1, "case": 2, "requirement": 1}
+
+
+def test_only_new_entries_are_embedded(tmp_path):
+    model = FakeEmbeddingModel(dim=64)
+    lib = library(tmp_path, model)
+    add_lockout(lib)
+    lib.search("audit", mode="vector")
+    embedded = model.texts_embedded
+    add_lockout(lib, source="s2", alm_tool="azure")  # same texts: served by the embedding cache
+    lib.add_session("s3", "jira", COLUMNS, [{"summary": "Verify consent is captured", "expectedResults": "Stored"}])
+    lib.search("audit", mode="vector")
+    assert model.texts_embedded - embedded == 1 + 1  # the one new text, then the query
+
+
+def test_embedding_failure_falls_back_to_lexical(tmp_path):
+    class Down:
+        def get_embeddings(self, texts):
+            raise ConnectionError("down")
+    lib = library(tmp_path, Down())
+    add_lockout(lib)
+    hits = lib.search("audit trail")
+    assert hits[0]["case"] == AUDIT_CASES[0]
+    assert hits[0]["retriever"] == "lexical_fallback" and hits[0]["similarity"] is None
+
+
+def test_match_requirement_needs_threshold_and_same_format(tmp_path):
+    lib = library(tmp_path)
+    assert lib.match_requirement(LOCKOUT["text"], "jira", COLUMNS) == (None, None)
+    add_lockout(lib)
+    cases, similarity = lib.match_requirement(LOCKOUT["text"], "jira", COLUMNS)
+    assert cases == LOCKOUT_CASES and similarity == pytest.approx(1.0)
+    cases[0]["summary"] = "edited"  # callers get copies
+    assert lib.match_requirement(LOCKOUT["text"], "jira", COLUMNS)[0] == LOCKOUT_CASES
+    assert lib.match_requirement("Consent is captured before data sharing", "jira", COLUMNS)[0] is None
+    assert lib.match_requirement(LOCKOUT["text"], "jira", COLUMNS + ["steps"]) == (None, None)
+    assert lib.match_requirement(LOCKOUT["text"], "azure", COLUMNS) == (None, None)
+
+
+def test_backfill_reads_groups_then_reviewed_then_raw_outputs(tmp_path):
+    uploads = tmp_path / "uploads"
+    (uploads / "grouped").mkdir(parents=True)
+    (uploads / "grouped" / CASE_GROUPS_FILE).write_text(json.dumps(
+        {"alm_tool": "jira", "columns": COLUMNS, "groups": {LOCKOUT["fingerprint"]: LOCKOUT_CASES},
+         "texts": {LOCKOUT["fingerprint"]: LOCKOUT["text"]}}))
+    (uploads / "reviewed").mkdir()
+    pd.DataFrame(AUDIT_CASES).to_excel(uploads / "reviewed" / "testcases_reviewed_azure_20260101_120000.xlsx",
+                                       index=False)
+    (uploads / "reviewed" / "testcases_raw_azure_20260101_120000.json").write_text(json.dumps(LOCKOUT_CASES))
+    (uploads / "raw").mkdir()
+    (uploads / "raw" / "testcases_raw_polarion_20260101_120000.json").write_text(json.dumps(AUDIT_CASES))
+    (uploads / "empty").mkdir()
+
+    lib = library(tmp_path)
+    assert lib.backfill() == 4
+    by_source = {}
+    for e in lib.entries:
+        by_source.setdefault(e["source"], []).append((e["kind"], e["alm_tool"]))
+    assert by_source == {"grouped": [("case", "jira"), ("requirement", "jira")],
+                         "reviewed": [("case", "azure")], "raw": [("case", "polarion")]}
+    assert lib.backfill() == 0
+
+
+def test_reuse_first_skips_the_model_for_library_matches(tmp_path, monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    lib = library(tmp_path)
+    monkeypatch.setattr(generator, "get_case_library", lambda: lib)
+    prompts = []
+    real = generator.generate_with_gemini
+    monkeypatch.setattr(generator, "generate_with_gemini", lambda p, *a, **k: prompts.append(p) or real(p, *a, **k))
+    service = generator.GeneratorService()
+    _, _, columns, _ = service.generate_full_pipeline(typed_requirements=["x"], sharded=False, use_cache=False,
+                                                      reuse_first=False)
+    cases = [dict.fromkeys(columns, "") | {columns[0]: "Verify the account locks"}]
+    lib.add_session("s1", "jira", columns, cases, {LOCKOUT["fingerprint"]: cases},
+                    {LOCKOUT["fingerprint"]: LOCKOUT["text"]})
+
+    prompts.clear()
+    report = {}
+    raw, reviewed, _, _ = service.generate_full_pipeline(typed_requirements=[LOCKOUT["text"].split("\n")[1]],
+                                                         sharded=False, use_cache=False, reuse_first=True,
+                                                         report=report)
+    assert prompts == [] and raw == []
+    assert reviewed.fillna("").to_dict("records") == cases
+    assert report["library"] == {"checked": 1, "reused": 1, "generated": 0,
+                                 "threshold": case_library.CASE_LIBRARY_THRESHOLD}
@@ -0,0 +1,41 @@
+# tests/test_dedup.py
+from dedup import dedup_testcases, find_duplicates, normalize_text, case_text
+
+COLUMNS = ["TestCaseID", "Description", "ExpectedResult"]
+
+
+def case(n, description, expected="Record is rejected"):
+    return {"TestCaseID": f"TC{n:03d}", "Description": description, "ExpectedResult": expected}
+
+
+BASE = ("Leave the date of birth blank on the patient registration form, fill in every other "
+        "mandatory demographic field with valid values and press save")
+
+
+def test_case_text_ignores_id_columns():
+    assert case_text(case(1, "A"), COLUMNS) == "A Record is rejected"
+    assert normalize_text("  Save,  the RECORD! ") == "save the record"
+
+
+def test_exact_duplicates_differ_only_in_id_case_and_punctuation():
+    cases = [case(1, BASE), case(2, BASE.upper() + "!"), case(3, "Enter an invalid DOB format")]
+    unique, report = dedup_testcases(cases, COLUMNS)
+    assert [c["TestCaseID"] for c in unique] == ["TC001", "TC003"]
+    assert report["exact_duplicates"] == 1 and report["near_duplicates"] == 0
+    assert report["merged"] == [{"kept": 0, "dropped": 1, "kind": "exact", "similarity": 1.0}]
+
+
+def test_near_duplicate_is_merged_into_first_occurrence():
+    cases = [case(1, BASE), case(2, "Check audit log entries after a record is viewed"),
+             case(3, BASE + " button")]
+    kept, merges = find_duplicates(cases, COLUMNS, threshold=0.8)
+    assert kept == [0, 1]
+    assert merges[0]["kept"] == 0 and merges[0]["dropped"] == 2 and merges[0]["kind"] == "near"
+    assert merges[0]["similarity"] >= 0.8
+
+
+def test_distinct_cases_and_threshold_one_keep_everything():
+    cases = [case(1, BASE), case(2, BASE + " button"), case(3, "Export the discharge summary as PDF")]
+    assert find_duplicates(cases, COLUMNS, threshold=1.0)[0] == [0, 1, 2]
+    unique, report = dedup_testcases(cases[::2], COLUMNS)
+    assert len(unique) == 2 and report["merged"] == []
@@ -0,0 +1,87 @@
+# tests/test_exporters.py
+import csv
+import json
+import threading
+import pytest
+import exporters
+from exporters import ExportManager, write_export, alm_rows, cell
+
+COLUMNS = ["Summary", "Steps"]
+ROWS = [{"Summary": "Login", "Steps": ["open", "sign in"]}, {"Summary": "Logout", "Steps": None}]
+
+
+def test_cell_flattens_lists_and_blanks():
+    assert cell(None) == "" and cell(float("nan")) == ""
+    assert cell(["a", "b"]) == '["a", "b"]' and cell(3) == 3
+
+
+def test_csv_and_jsonl_writers(tmp_path):
+    path = write_export(str(tmp_path / "out.csv"), "csv", COLUMNS, iter(ROWS))
+    with open(path, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["Steps"] == '["open", "sign in"]' and rows[1]["Steps"] == ""
+
+    path = write_export(str(tmp_path / "out.jsonl"), "jsonl", COLUMNS, iter(ROWS))
+    with open(path, encoding="utf-8") as f:
+        assert [json.loads(line)["Summary"] for line in f] == ["Login", "Logout"]
+
+
+def test_export_state_is_visible_to_other_workers(tmp_path, monkeypatch):
+    path = str(tmp_path / "cases.csv")
+    gate = threading.Event()
+    real = exporters.write_export
+    monkeypatch.setattr(exporters, "write_export", lambda *a: gate.wait(5) and real(*a))
+    monkeypatch.setattr(exporters, "EXPORT_POLL_SECONDS", 0.01)
+
+    writer, other = ExportManager(workers=1), ExportManager(workers=1)
+    writer.submit(path, "csv", COLUMNS, ROWS)
+    assert other.state(path) == "pending"
+    assert other.wait(path, timeout=0.05) is False  # still being written elsewhere
+
+    threading.Timer(0.05, gate.set).start()
+    assert other.wait(path, timeout=5) is True
+    assert other.state(path) == "ready"
+
+
+def test_failed_export_is_visible_to_other_workers(tmp_path):
+    path = str(tmp_path / "cases.xlsx")
+    ExportManager(workers=1).submit(path, "xlsx", COLUMNS, [{"Summary": object()}])  # not a cell value
+    other = ExportManager(workers=1)
+    assert other.wait(path, timeout=5) is False
+    assert other.state(path) == "failed"
+
+
+def test_alm_layout_renames_columns():
+    columns, rows = alm_rows(exporters.ALM_LAYOUTS["jira_import"][1], COLUMNS, ROWS)
+    rows = list(rows)
+    assert columns[:2] == ["Summary", "Issue Type"] and len(rows) == 2
+    assert rows[0]["Summary"] == "Login" and rows[0]["Issue Type"] == "Test"
+    assert rows[0]["Test Steps"] == ["open", "sign in"] and rows[0]["Expected Result"] == ""
+
+
+def test_xlsx_json_and_alm_exports_read_back(tmp_path):
+    import pandas as pd
+    df = pd.read_excel(write_export(str(tmp_path / "out.xlsx"), "xlsx", COLUMNS, iter(ROWS))).fillna("")
+    assert df.columns.tolist() == COLUMNS and df["Steps"].tolist() == ['["open", "sign in"]', ""]
+
+    with open(write_export(str(tmp_path / "out.json"), "json", None, iter(ROWS)), encoding="utf-8") as f:
+        assert json.load(f) == ROWS
+
+    path = write_export(str(tmp_path / "import.csv"), "azure_import", COLUMNS, iter(ROWS))
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[1]["Title"] == "Logout" and rows[1]["Work Item Type"] == "Test Case"
+
+
+def test_parquet_is_written_in_row_groups(tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.setattr(exporters, "EXPORT_BATCH_ROWS", 2)
+    rows = ({"Summary": f"case {n}", "Steps": None} for n in range(5))
+    meta = pq.ParquetFile(write_export(str(tmp_path / "out.parquet"), "parquet", COLUMNS, rows))
+    assert meta.metadata.num_rows == 5 and meta.num_row_groups == 3
+    assert meta.read().column("Steps").to_pylist() == [""] * 5
+
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="Unknown export format"):
+        write_export(str(tmp_path / "out.txt"), "txt", COLUMNS, ROWS)
@@ -0,0 +1,65 @@
+# tests/test_few_shot.py
+import os
+import pandas as pd
+from few_shot import FewShotRegistry, example_files
+from fake_vertex import FakeEmbeddingModel
+
+TOPICS = ["login lockout after failed attempts", "audit trail of record access", "patient consent capture",
+          "discharge summary export", "allergy alert on prescription", "lab result notification"]
+
+
+def write_pool(folder, tool="jira"):
+    pd.DataFrame({"summary": [f"Verify {t}" for t in TOPICS[:4]], "steps": ["Step 1"] * 4}).to_excel(
+        os.path.join(folder, f"{tool}_testcase_eg.xlsx"), index=False)
+    pd.DataFrame({"summary": [f"Verify {t}" for t in TOPICS[4:]], "extra": ["x", "y"]}).to_csv(
+        os.path.join(folder, f"{tool}_also.csv"), index=False)
+
+
+def registry(folder, tmp_path, model=None, k=2):
+    return FewShotRegistry(str(folder), str(tmp_path / "cache"), model=model or FakeEmbeddingModel(), model_name="fake",
+                           top_k=k)
+
+
+def test_primary_file_first_and_its_columns_win(tmp_path):
+    write_pool(str(tmp_path))
+    (tmp_path / "~$jira_lock.csv").write_text("lock")
+    assert [os.path.basename(p) for p in example_files(str(tmp_path), "jira")] == ["jira_testcase_eg.xlsx",
+                                                                                    "jira_also.csv"]
+    pool = registry(tmp_path, tmp_path).pool("jira")
+    assert pool.columns == ["summary", "steps"] and len(pool.df) == 6
+
+
+def test_selects_most_similar_examples(tmp_path):
+    write_pool(str(tmp_path))
+    df, info = registry(tmp_path, tmp_path).select("jira", "prescription allergy alert")
+    assert info == {"pool": 6, "selected": 2, "method": "similarity"}
+    assert df.iloc[0]["summary"] == "Verify allergy alert on prescription"
+
+
+def test_small_pool_or_no_query_uses_file_order_without_embedding(tmp_path):
+    write_pool(str(tmp_path))
+    model = FakeEmbeddingModel()
+    reg = registry(tmp_path, tmp_path, model=model, k=10)
+    df, info = reg.select("jira", "anything")
+    assert info["method"] == "all" and len(df) == 6 and model.calls == 0
+    assert reg.select("polarion", "x") == (None, {"pool": 0, "selected": 0, "method": "none"})
+
+
+def test_pool_reloads_only_when_files_change(tmp_path):
+    write_pool(str(tmp_path))
+    reg = registry(tmp_path, tmp_path)
+    reg.pool("jira")
+    reg.pool("jira")
+    assert reg.loads == 1
+    pd.DataFrame({"summary": ["Verify new case"]}).to_csv(tmp_path / "jira_new.csv", index=False)
+    assert len(reg.pool("jira").df) == 7 and reg.loads == 2
+
+
+def test_embedding_failure_falls_back_to_file_order(tmp_path):
+    class Broken(FakeEmbeddingModel):
+        def get_embeddings(self, texts):
+            raise ConnectionError("down")
+
+    write_pool(str(tmp_path))
+    df, info = registry(tmp_path, tmp_path, model=Broken()).select("jira", "consent")
+    assert info["method"] == "file_order" and df["summary"].tolist() == ["Verify " + t for t in TOPICS[:2]]
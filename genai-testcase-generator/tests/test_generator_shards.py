@@ -0,0 +1,50 @@
+# tests/test_generator_shards.py
+import threading
+import pytest
+from generator import GeneratorService
+
+
+def test_build_units_one_per_requirement_section_and_alm_input():
+    content = "\n\n".join(f"Paragraph {i} " + "x" * 60 for i in range(6))
+    units = GeneratorService().build_units(
+        ["Login locks after 3 tries", "  "], [{"file_name": "spec.docx", "content": content}],
+        {"Jira": {"tickets": ["HC-1"]}}, max_chars=150)
+    kinds = [u["kind"] for u in units]
+    assert kinds[0] == "requirement" and kinds[-1] == "alm_inputs" and kinds.count("section") == 3
+    assert "spec.docx (section 1/3)" in units[1]["text"]
+    assert len({u["fingerprint"] for u in units}) == len(units)
+
+
+def test_should_shard_modes():
+    service = GeneratorService()
+    assert not service.should_shard("on", ["only one"], "x")
+    assert service.should_shard("on", ["a", "b"], "short")
+    assert not service.should_shard("off", ["a", "b"], "x" * 100_000)
+    assert not service.should_shard("auto", ["a", "b"], "short")
+    assert service.should_shard("auto", ["a", "b"], "x" * 100_000)
+
+
+def test_generate_sharded_keeps_shard_order_and_survives_a_failed_shard(monkeypatch):
+    service = GeneratorService()
+    release_first = threading.Event()
+
+    def shard(text, *args, **kwargs):
+        if text == "s1":
+            release_first.wait(5)  # finishes last
+        if text == "s2":
+            raise RuntimeError("model error")
+        if text == "s3":
+            release_first.set()
+        return [{"Description": text}], f"raw {text}"
+
+    monkeypatch.setattr(service, "_generate_shard", shard)
+    parsed, used = service.generate_sharded(["s1", "s2", "s3"], [], "", "", parallelism=3)
+    assert [c["Description"] for c in parsed] == ["s1", "s3"]
+    assert used == "raw s1\n\nraw s3"
+
+
+def test_generate_sharded_fails_when_every_shard_fails(monkeypatch):
+    service = GeneratorService()
+    monkeypatch.setattr(service, "_generate_shard", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("down")))
+    with pytest.raises(RuntimeError, match="All 2 generation shards failed"):
+        service.generate_sharded(["a", "b"], [], "", "")
@@ -0,0 +1,142 @@
+# tests/test_incremental.py
+import json
+from incremental import (fingerprint, make_unit, plan_units, assemble, continue_numbering, attribute_cases,
+                         save_case_groups, load_case_groups, matching_groups, record_fingerprints)
+
+COLUMNS = ["TestCaseID", "Description"]
+
+
+def unit(text):
+    return make_unit("requirement", text, "Typed Requirement:\n" + text)
+
+
+def test_fingerprint_ignores_case_whitespace_and_punctuation_but_not_kind():
+    assert fingerprint("requirement", "Login  locks, after 3 tries.") == fingerprint("requirement", "login locks after 3 TRIES")
+    assert fingerprint("requirement", "x") != fingerprint("section", "x")
+
+
+def test_plan_reuses_unchanged_regenerates_changed_and_counts_removed():
+    a, b, b2, c = unit("Login locks"), unit("Audit trail"), unit("Audit trail for exports"), unit("Consent")
+    previous = {a["fingerprint"]: [{"TestCaseID": "TC001"}], b["fingerprint"]: [{"TestCaseID": "TC002"}],
+                c["fingerprint"]: []}
+    reused, changed, summary = plan_units([a, b2, a], previous)
+    assert list(reused) == [a["fingerprint"]] and changed == [b2]
+    assert summary == {"requirements": 2, "reused": 1, "regenerated": 1, "removed": 2, "reused_cases": 1}
+
+
+def test_assemble_keeps_requirement_order():
+    a, b = unit("Login locks"), unit("Audit trail")
+    cases, fps = assemble([b, a], {a["fingerprint"]: ["a1"]}, {b["fingerprint"]: ["b1", "b2"]})
+    assert cases == ["b1", "b2", "a1"] and fps == [b["fingerprint"]] * 2 + [a["fingerprint"]]
+
+
+def test_new_cases_are_numbered_after_reused_ones():
+    new = continue_numbering([{"TestCaseID": "TC004"}, {"TestCaseID": "TC002"}], [{}, {}], "TestCaseID")
+    assert [c["TestCaseID"] for c in new] == ["TC005", "TC006"]
+    assert continue_numbering([], [{"x": 1}], None) == [{"x": 1}]
+
+
+def test_cases_are_attributed_to_the_closest_unit():
+    units = [unit("Account lockout after failed login attempts"), unit("Audit trail of patient record access")]
+    cases = [{"Description": "Verify the audit trail records each access"}, {"Description": "Lock account on failed login"}]
+    assert attribute_cases(cases, units, COLUMNS) == [units[1]["fingerprint"], units[0]["fingerprint"]]
+
+
+def test_saved_groups_round_trip_and_format_check(tmp_path):
+    a, b = unit("Login locks"), unit("Audit trail")
+    report = {}
+    record_fingerprints(report, [a, b], [a["fingerprint"]])
+    path = str(tmp_path / "case_groups.json")
+    save_case_groups(path, "jira", COLUMNS, [{"TestCaseID": "TC001"}], report["fingerprints"])
+    saved = load_case_groups(path)
+    assert saved["groups"] == {a["fingerprint"]: [{"TestCaseID": "TC001"}], b["fingerprint"]: []}
+    assert matching_groups(saved, "jira", COLUMNS) == saved["groups"]
+    assert matching_groups(saved, "azure", COLUMNS) is None
+    assert load_case_groups(str(tmp_path / "missing.json")) is None
+
+
+REQUIREMENTS = ["Accounts lock after three failed login attempts", "Every record access is written to the audit trail",
+                "Consent is captured before data sharing"]
+
+
+def scripted_model(prompts):
+    """One case per known requirement the prompt asks for, worded so attribution finds its requirement."""
+    def generate(prompt, *args, **kwargs):
+        prompts.append(prompt)
+        cases = [{"summary": f"Verify {r.lower()}", "expectedResults": "works"} for r in REQUIREMENTS if r in prompt]
+        return json.dumps(cases)
+    return generate
+
+
+def test_resubmission_only_generates_changed_requirements(tmp_path, monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    import reviewer
+    prompts = []
+    monkeypatch.setattr(generator, "generate_with_gemini", scripted_model(prompts))
+    monkeypatch.setattr(reviewer, "generate_with_gemini", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("off")))
+    service = generator.GeneratorService()
+    path = str(tmp_path / "case_groups.json")
+
+    def run(requirements, previous=None):
+        report = {}
+        raw, reviewed, columns, _ = service.generate_full_pipeline(
+            typed_requirements=requirements, sharded=False, use_cache=False, report=report,
+            previous=previous, reuse_first=False)
+        save_case_groups(path, "jira", columns, reviewed.fillna("").to_dict("records"), report["fingerprints"])
+        return raw, reviewed, report
+
+    _, first, _ = run(REQUIREMENTS[:2])
+    assert len(first) == 2 and len(prompts) == 1
+
+    prompts.clear()
+    _, again, report = run([REQUIREMENTS[0].upper() + "!", REQUIREMENTS[1]], load_case_groups(path))
+    assert prompts == []  # nothing changed: no model call
+    assert report["incremental"]["reused"] == 2
+    assert again["summary"].tolist() == first["summary"].tolist()
+
+    raw, reviewed, report = run([REQUIREMENTS[0], REQUIREMENTS[2]], load_case_groups(path))
+    assert len(prompts) == 1 and REQUIREMENTS[2] in prompts[0] and REQUIREMENTS[0] not in prompts[0]
+    assert {k: report["incremental"][k] for k in ("reused", "regenerated", "removed", "reused_cases")} == \
+        {"reused": 1, "regenerated": 1, "removed": 1, "reused_cases": 1}
+    assert len(raw) == 1
+    assert reviewed["summary"].tolist() == [first["summary"][0], f"Verify {REQUIREMENTS[2].lower()}"]
+
+
+def test_streamed_resubmission_sends_reused_cases_first(tmp_path, monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    import reviewer
+    prompts = []
+    generate = scripted_model(prompts)
+    monkeypatch.setattr(generator, "stream_with_gemini", lambda p, *a, **k: iter([generate(p)]))
+    monkeypatch.setattr(reviewer, "generate_with_gemini", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("off")))
+    service = generator.GeneratorService()
+    path = str(tmp_path / "case_groups.json")
+
+    def run(requirements, previous=None):
+        report, events = {}, []
+        for event, data in service.stream_full_pipeline(typed_requirements=requirements, use_cache=False,
+                                                        report=report, previous=previous):
+            events.append((event, data, len(prompts)))
+        _, reviewed, columns, _ = events[-1][1]
+        save_case_groups(path, "jira", columns, reviewed.fillna("").to_dict("records"), report["fingerprints"])
+        return events, reviewed, report
+
+    _, first, _ = run(REQUIREMENTS[:2])
+    prompts.clear()
+    events, reviewed, report = run([REQUIREMENTS[0], REQUIREMENTS[2]], load_case_groups(path))
+    assert [e for e, _, _ in events] == ["columns", "reused", "testcase", "generated", "result"]
+    _, reused, calls = events[1]
+    assert calls == 0 and [c["summary"] for c in reused] == [first["summary"][0]]  # sent before the model call
+    assert events[2][1]["summary"] == f"Verify {REQUIREMENTS[2].lower()}"
+    assert len(prompts) == 1 and REQUIREMENTS[0] not in prompts[0]
+    assert reviewed["summary"].tolist() == [first["summary"][0], f"Verify {REQUIREMENTS[2].lower()}"]
+    assert report["incremental"]["regenerated"] == 1
+
+    prompts.clear()
+    events, reviewed, _ = run([REQUIREMENTS[0], REQUIREMENTS[2]], load_case_groups(path))
+    assert [e for e, _, _ in events] == ["columns", "reused", "generated", "result"] and prompts == []
+    assert len(reviewed) == 2
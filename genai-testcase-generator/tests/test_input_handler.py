@@ -0,0 +1,42 @@
+# tests/test_input_handler.py
+import io
+from input_handler import _cap, extract_text, ExtractionCache, InputHandler
+
+
+class Upload(io.BytesIO):
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+
+def test_cap_keeps_text_that_fits_exactly():
+    assert "".join(_cap(["abc", "de"], 5)) == "abcde"
+    assert "".join(_cap(["abc", "de", ""], 5)) == "abcde"
+
+
+def test_cap_cuts_the_overflowing_part_and_notes_it():
+    text = "".join(_cap(["abc", "def", "ghi"], 5))
+    assert text.startswith("abcde\n[Truncated") and "5 character" in text
+    assert "".join(_cap(["abcde", "f"], 5)).startswith("abcde\n[Truncated")
+
+
+def test_extract_text_txt_and_unknown():
+    assert extract_text("req.TXT", b"  login must lock after 3 tries \n") == "login must lock after 3 tries"
+    assert extract_text("req.txt", b"x" * 10, max_chars=10) == "x" * 10
+    assert "[Truncated" in extract_text("req.txt", b"x" * 11, max_chars=10)
+    assert extract_text("image.png", b"\x89PNG") == ""
+
+
+def test_extraction_cache_is_bounded_and_skips_errors():
+    cache = ExtractionCache(max_chars=10)
+    cache.put("a", "12345")
+    cache.put("b", "123456")
+    cache.put("err", "[Error reading file: bad]")
+    assert cache.get("a") is None and cache.get("b") == "123456" and cache.get("err") is None
+
+
+def test_extract_from_files_caches_by_content():
+    handler = InputHandler(workers=1)
+    first = handler.extract_from_files([Upload("a.txt", b"same requirement")])
+    again = handler.extract_from_files([Upload("b.txt", b"same requirement")])
+    assert first["uploaded_files"][0]["content"] == again["uploaded_files"][0]["content"] == "same requirement"
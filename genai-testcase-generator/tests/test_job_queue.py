@@ -0,0 +1,71 @@
+# tests/test_job_queue.py
+import threading
+import pytest
+from job_queue import JobQueue, QueueFullError
+from session_store import SQLiteSessionStore
+
+
+def wait_for(queue, job_id, state, tries=500):
+    for _ in range(tries):
+        job = queue.get(job_id)
+        if job and job["state"] == state:
+            return job
+        threading.Event().wait(0.01)
+    raise AssertionError(f"job {job_id} never reached {state}: {queue.get(job_id)}")
+
+
+def test_job_reports_stage_progress_and_result():
+    queue = JobQueue(max_workers=1, queue_depth=0)
+
+    def work(x, progress):
+        progress("parse", "running")
+        progress("parse", "done")
+        return {"value": x * 2}
+
+    job_id = queue.submit(work, 21, stages=("parse", "write"))
+    job = wait_for(queue, job_id, "succeeded")
+    assert job["result"] == {"value": 42}
+    assert job["stages"]["parse"]["state"] == "done" and job["progress"] == 0.5
+
+
+def test_failed_job_marks_running_stage_failed():
+    queue = JobQueue(max_workers=1, queue_depth=0)
+
+    def work(progress):
+        progress("parse", "running")
+        raise RuntimeError("bad input")
+
+    job = wait_for(queue, queue.submit(work, stages=("parse",)), "failed")
+    assert job["error"] == "bad input" and job["stages"]["parse"]["state"] == "failed"
+
+
+def test_full_queue_is_refused():
+    gate = threading.Event()
+    queue = JobQueue(max_workers=1, queue_depth=1)
+    try:
+        queue.submit(lambda progress: gate.wait(5))
+        queue.submit(lambda progress: gate.wait(5))
+        with pytest.raises(QueueFullError):
+            queue.submit(lambda progress: None)
+    finally:
+        gate.set()
+
+
+def test_other_worker_sees_job_through_shared_store(tmp_path):
+    db = str(tmp_path / "sessions.db")
+    gate = threading.Event()
+    accepting = JobQueue(max_workers=1, store=SQLiteSessionStore(db, table="jobs", on_evict=None))
+    polling = JobQueue(max_workers=1, store=SQLiteSessionStore(db, table="jobs", on_evict=None))
+
+    def work(progress):
+        progress("generate", "running")
+        gate.wait(5)
+        return {"cases": 3}
+
+    job_id = accepting.submit(work, stages=("generate",))
+    job = wait_for(polling, job_id, "running")
+    assert job["stages"]["generate"]["state"] == "running"
+    gate.set()
+    assert wait_for(polling, job_id, "succeeded")["result"] == {"cases": 3}
+    assert polling.get("no-such-job") is None
+    assert len(SQLiteSessionStore(db)) == 0  # jobs live in their own table, not among the sessions
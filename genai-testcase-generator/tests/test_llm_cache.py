@@ -0,0 +1,47 @@
+# tests/test_llm_cache.py
+import os
+import time
+from llm_cache import LLMCache, cache_key
+
+
+def test_memory_then_disk_hits(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), memory_entries=1, enabled=True)
+    assert cache.get("m", "p1") is None
+    cache.put("m", "p1", "one")
+    cache.put("m", "p2", "two")  # pushes p1 out of memory
+    assert cache.get("m", "p2") == "two"
+    assert cache.get("m", "p1") == "one"
+    assert cache.get("other-model", "p1") is None
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"], stats["writes"]) == (1, 1, 2, 2)
+
+
+def test_disk_entries_are_shared_between_processes(tmp_path):
+    LLMCache(cache_dir=str(tmp_path), enabled=True).put("m", "p", "answer")
+    other = LLMCache(cache_dir=str(tmp_path), enabled=True)
+    assert other.get("m", "p") == "answer" and other.stats()["disk_hits"] == 1
+
+
+def test_expired_entry_is_a_miss_and_removed(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), ttl_seconds=60, enabled=True)
+    cache.put("m", "p", "old")
+    fresh = LLMCache(cache_dir=str(tmp_path), ttl_seconds=-1, enabled=True)
+    assert fresh.get("m", "p") is None
+    assert not os.path.exists(cache._path(cache_key("m", "p")))
+
+
+def test_sweep_evicts_least_recently_used_over_budget(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), max_bytes=1, enabled=True)
+    for n in range(3):
+        cache.put("m", f"p{n}", "x" * 100)
+        path = cache._path(cache_key("m", f"p{n}"))
+        os.utime(path, (time.time() - 100 + n, time.time() - 100 + n))
+    cache.max_bytes = 250
+    assert cache.sweep() == 2
+    assert os.path.exists(cache._path(cache_key("m", "p2")))
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = LLMCache(cache_dir=str(tmp_path), enabled=False)
+    cache.put("m", "p", "text")
+    assert cache.get("m", "p") is None and os.listdir(tmp_path) == []
@@ -0,0 +1,43 @@
+# tests/test_metrics.py
+import re
+import pytest
+from metrics import Counter, Histogram, timed_stage, render_metrics
+
+
+def test_counter_and_histogram_exposition():
+    c = Counter("t_requests_total", "Requests.", ("outcome",))
+    c.inc(outcome="ok")
+    c.inc(2, outcome="ok")
+    assert c.render() == ["# HELP t_requests_total Requests.", "# TYPE t_requests_total counter",
+                          't_requests_total{outcome="ok"} 3']
+    h = Histogram("t_seconds", "Latency.", buckets=(0.1, 1.0))
+    h.observe(0.05)
+    h.observe(0.5)
+    lines = h.render()
+    assert 't_seconds_bucket{le="0.1"} 1' in lines and 't_seconds_bucket{le="+Inf"} 2' in lines
+    assert "t_seconds_count 2" in lines
+
+
+def test_timed_stage_accumulates_and_reports_progress():
+    timings, events = {}, []
+    with timed_stage("parse", lambda s, state: events.append(state), timings):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed_stage("parse", timings=timings):
+            raise RuntimeError("boom")
+    assert events == ["running", "done"] and timings["parse_ms"] >= 0
+    assert 'tcgen_stage_seconds_count{stage="parse",outcome="error"} 1' in render_metrics()
+
+
+def test_service_totals_are_counters():
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex()
+    import backend_api  # registers the LLM cache / Vertex collector
+    text = render_metrics()
+    types = dict(re.findall(r"^# TYPE (\S+) (\S+)$", text, re.M))
+    assert types["tcgen_vertex_retries_total"] == "counter"
+    assert types["tcgen_vertex_rate_wait_seconds_total"] == "counter"
+    assert types["tcgen_llm_cache_misses_total"] == "counter"
+    assert types["tcgen_vertex_in_flight"] == "gauge" and types["tcgen_llm_cache_hit_rate"] == "gauge"
+    assert all(name.endswith("_total") for name, kind in types.items() if kind == "counter")
+    assert not any(name.endswith("_total") for name, kind in types.items() if kind == "gauge")
@@ -0,0 +1,37 @@
+# tests/test_prompt_budget.py
+import pandas as pd
+from prompt_budget import fit_text, fit_chunks, fit_rows
+from rag_ingest import format_chunks
+
+
+def test_short_text_is_untouched():
+    text, usage = fit_text("short requirement", 100)
+    assert text == "short requirement" and usage["truncated"] is False
+
+
+def test_long_text_is_cut_at_a_paragraph_and_noted():
+    paragraphs = [f"Paragraph {n}: " + "word " * 30 for n in range(10)]
+    text, usage = fit_text("\n\n".join(paragraphs), 100)
+    kept, note = text.split("\n[... ")
+    assert kept == "\n\n".join(paragraphs[:2]).rstrip()  # the two whole paragraphs that fit in ~400 chars
+    assert usage["truncated"] and usage["tokens"] <= 100 < usage["input_tokens"]
+    assert note.startswith(f"{usage['input_tokens'] - usage['tokens']} tokens omitted")
+
+
+def test_chunks_kept_by_score_and_oversized_ones_skipped():
+    chunks = [{"id": "big", "source": "a.txt", "text": "x" * 2000, "score": 0.1},
+              {"id": "best", "source": "b.txt", "text": "audit trail", "score": 0.0},
+              {"id": "small", "source": "c.txt", "text": "consent", "score": 0.5}]
+    text, usage = fit_chunks(chunks, 50, format_chunks)
+    assert usage["kept"] == ["best", "small"] and usage["dropped"] == ["big"]
+    assert text.index("audit trail") < text.index("consent")
+    assert fit_chunks([], 50, format_chunks) == ("", {"budget": 50, "tokens": 0, "kept": [], "dropped": []})
+
+
+def test_rows_kept_in_file_order_with_at_least_one():
+    df = pd.DataFrame({"summary": [f"Case {n} " + "detail " * 10 for n in range(20)]})
+    text, usage = fit_rows(df, 100)
+    assert 0 < usage["kept"] < 20 and usage["kept"] + usage["dropped"] == 20 and usage["tokens"] <= 100
+    assert "Case 0" in text and f"Case {usage['kept']} " not in text
+    text, usage = fit_rows(pd.DataFrame({"summary": ["y" * 4000]}), 50)
+    assert usage["kept"] == 1 and "tokens omitted" in text
@@ -0,0 +1,46 @@
+# tests/test_rag_ingest.py
+import json
+from rag_ingest import iter_corpus_files, chunk_units, load_chunks, format_chunks, _split_long
+
+
+def test_iter_corpus_files_skips_hidden_lock_and_unsupported(tmp_path):
+    (tmp_path / "b.txt").write_text("b")
+    (tmp_path / "notes.md").write_text("md")
+    (tmp_path / "~$open.xlsx").write_text("lock")
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "x.txt").write_text("x")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "a.json").write_text("[]")
+    assert [p[len(str(tmp_path)) + 1:] for p in iter_corpus_files(str(tmp_path))] == ["b.txt", "sub/a.json"]
+
+
+def test_chunks_stay_within_limit_and_keep_sections():
+    units = [("s1", "a" * 40), ("s1", "b" * 40), ("s1", "c" * 40), ("s2", "d" * 10)]
+    chunks = chunk_units(units, max_chars=100, overlap=10)
+    assert [s for s, _ in chunks] == ["s1", "s1", "s2"]
+    assert chunks[0][1] == "a" * 40 + "\n\n" + "b" * 40
+    assert all(len(text) <= 100 for _, text in chunks)
+
+
+def test_oversized_unit_is_wrapped_with_overlap():
+    text = " ".join(f"word{i:03d}" for i in range(100))  # 799 chars
+    pieces = _split_long(text, 200, 30)
+    assert all(len(p) <= 200 for p in pieces) and len(pieces) > 4
+    assert pieces[1].split()[0] in pieces[0]  # windows overlap
+    assert pieces[-1].endswith("word099")
+
+
+def test_load_chunks_carries_source_metadata(tmp_path):
+    (tmp_path / "policy.txt").write_text("First rule.\n\nSecond rule.")
+    (tmp_path / "stories.json").write_text(json.dumps([{"story_id": "US-1", "text": "Login"}, {"text": "Logout"}]))
+    chunks = load_chunks(str(tmp_path), max_chars=1200)
+    assert [(c["id"], c["section"]) for c in chunks] == [
+        ("policy.txt#0", ""), ("stories.json#0", "US-1"), ("stories.json#1", "record 2")]
+    assert chunks[0]["text"] == "First rule.\n\nSecond rule."
+    assert format_chunks(chunks[1:2]) == "[stories.json — US-1]\nstory_id: US-1\ntext: Login"
+
+
+def test_unreadable_file_is_skipped(tmp_path):
+    (tmp_path / "broken.json").write_text("{not json")
+    (tmp_path / "ok.txt").write_text("fine")
+    assert [c["source"] for c in load_chunks(str(tmp_path))] == ["ok.txt"]
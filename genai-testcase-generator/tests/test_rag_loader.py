@@ -0,0 +1,83 @@
+# tests/test_rag_loader.py
+import pytest
+import rag_loader
+from rag_loader import RagIndex, EmbeddingStore
+from fake_vertex import FakeEmbeddingModel
+
+pytest.importorskip("faiss")
+
+DOCS = {
+    "audit.txt": "Every access to a patient record is written to the audit trail with user and time.",
+    "login.txt": "Accounts lock after three failed login attempts and unlock after thirty minutes.",
+    "export.txt": "Clinicians can export discharge summaries as PDF for the referring physician.",
+}
+
+
+@pytest.fixture
+def rag_dir(tmp_path):
+    folder = tmp_path / "rag"
+    folder.mkdir()
+    for name, text in DOCS.items():
+        (folder / name).write_text(text, encoding="utf-8")
+    return folder
+
+
+def test_embed_batches_uncached_texts(tmp_path):
+    model = FakeEmbeddingModel(dim=16)
+    store = EmbeddingStore(str(tmp_path), "fake")
+    texts = [f"chunk {i}" for i in range(70)]
+    assert store.embed(texts, model, batch_size=32).shape == (70, 16)
+    assert model.calls == 3
+    store.embed(texts + ["new"], model, batch_size=32)
+    assert model.calls == 4 and model.texts_embedded == 71
+    assert rag_loader.EMBED_BATCH_SIZE > 1
+
+
+def test_signature_walk_is_cached_for_ttl(rag_dir, tmp_path, monkeypatch):
+    index = RagIndex(str(rag_dir), str(tmp_path / "cache"), model=FakeEmbeddingModel(), model_name="fake",
+                     signature_ttl=60)
+    walks = []
+    real = rag_loader.iter_corpus_files
+    monkeypatch.setattr(rag_loader, "iter_corpus_files", lambda d: walks.append(d) or real(d))
+    for _ in range(5):
+        assert index.search("failed login attempts", k=1, mode="lexical")[0] == DOCS["login.txt"]
+    assert len(walks) == 1
+
+    (rag_dir / "login.txt").write_text("Accounts lock after five failed login attempts.", encoding="utf-8")
+    assert "three" in index.search("failed login attempts", k=1, mode="lexical")[0]  # within the TTL
+    index.signature_ttl = 0
+    assert "five" in index.search("failed login attempts", k=1, mode="lexical")[0]
+
+
+def test_rebuild_sees_changes_at_once(rag_dir, tmp_path):
+    index = RagIndex(str(rag_dir), str(tmp_path / "cache"), model=FakeEmbeddingModel(), model_name="fake",
+                     signature_ttl=3600)
+    index.ensure_fresh()
+    (rag_dir / "consent.txt").write_text("Patient consent is recorded before any data sharing.", encoding="utf-8")
+    index.rebuild()
+    assert index.search("patient consent data sharing", k=1, mode="vector")[0].startswith("Patient consent")
+    assert len(index.chunks) == 4 and index.index.ntotal == 4
+
+
+def test_cold_hybrid_query_answers_lexically_and_builds_in_background(rag_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(rag_loader, "RAG_EMBED_DEADLINE_SECONDS", 5.0)
+    model = FakeEmbeddingModel(latency=0.3)
+    index = RagIndex(str(rag_dir), str(tmp_path / "cache"), model=model, model_name="fake")
+
+    hits = index.search_chunks("audit trail patient record", k=1, mode="hybrid")
+    assert hits[0]["retriever"] == "lexical_fallback" and hits[0]["source"].endswith("audit.txt")
+    assert model.calls == 0  # the corpus is embedded off the request path, not under the deadline
+
+    index._vector_build.join(10)
+    assert index.index is not None
+    hits = index.search_chunks("audit trail patient record", k=1, mode="hybrid")
+    assert hits[0]["retriever"] == "hybrid" and hits[0]["source"].endswith("audit.txt")
+
+
+def test_slow_query_embedding_falls_back_to_lexical(rag_dir, tmp_path, monkeypatch):
+    index = RagIndex(str(rag_dir), str(tmp_path / "cache"), model=FakeEmbeddingModel(), model_name="fake")
+    index.ensure_fresh()
+    index._model = FakeEmbeddingModel(latency=1.0)
+    monkeypatch.setattr(rag_loader, "RAG_EMBED_DEADLINE_SECONDS", 0.05)
+    hits = index.search_chunks("failed login attempts", k=1, mode="hybrid")
+    assert hits[0]["retriever"] == "lexical_fallback" and hits[0]["source"].endswith("login.txt")
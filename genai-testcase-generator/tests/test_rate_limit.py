@@ -0,0 +1,101 @@
+# tests/test_rate_limit.py
+import random
+import threading
+import pytest
+from rate_limit import TokenBucket, AdaptiveConcurrency, CircuitBreaker, CircuitOpenError, backoff_delay
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_waits_for_refill():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)  # one token per second
+    assert bucket.acquire(60) == 0.0
+    assert bucket.acquire(2) == pytest.approx(2.0)
+    clock.now += 1000
+    assert bucket.acquire(1) == 0.0 and bucket.tokens == pytest.approx(59)  # capped at one minute
+
+
+def test_token_bucket_debt_delays_next_acquire():
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock, sleep=clock.sleep)
+    bucket.consume(70)  # 10 tokens in debt
+    assert bucket.acquire(1) == pytest.approx(11.0)
+    assert bucket.acquire(1000) == pytest.approx(60.0)  # oversized requests are capped at capacity
+
+
+def test_concurrency_halves_on_throttle_and_grows_back():
+    limiter = AdaptiveConcurrency(max_limit=8)
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.limit == 2
+    for _ in range(2):
+        limiter.on_success()
+    assert limiter.limit == 3
+    for _ in range(10):
+        limiter.on_throttle()
+    assert limiter.limit == 1
+
+
+def test_concurrency_blocks_at_limit():
+    limiter = AdaptiveConcurrency(max_limit=1)
+    limiter.acquire()
+    entered = threading.Event()
+    worker = threading.Thread(target=lambda: (limiter.acquire(), entered.set()))
+    worker.start()
+    assert not entered.wait(0.05)
+    limiter.release()
+    assert entered.wait(5)
+    worker.join()
+    assert limiter.in_flight == 1
+
+
+def test_breaker_opens_fails_fast_then_allows_one_trial():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=clock)
+    breaker.record_failure()
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 1
+    with pytest.raises(CircuitOpenError, match="open"):
+        breaker.allow()
+
+    clock.now += 30
+    breaker.allow()  # the trial
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError, match="half-open"):
+        breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+    breaker.allow()
+
+
+def test_failed_trial_reopens_and_released_trial_admits_next():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.trips == 2
+    clock.now += 10
+    breaker.allow()
+    breaker.release_trial()
+    breaker.allow()  # not rejected: the abandoned trial no longer blocks
+    assert breaker.state == "half_open"
+
+
+def test_backoff_is_full_jitter_and_capped():
+    rng = random.Random(7)
+    delays = [backoff_delay(attempt, base=1.0, cap=8.0, rng=rng) for attempt in range(10) for _ in range(20)]
+    assert all(0 <= d <= 8.0 for d in delays)
+    assert max(backoff_delay(0, base=1.0, cap=8.0, rng=rng) for _ in range(50)) <= 1.0
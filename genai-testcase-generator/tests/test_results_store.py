@@ -0,0 +1,53 @@
+# tests/test_results_store.py
+import os
+import pandas as pd
+import pytest
+import exporters
+from results_store import query_results, RESULTS_MAX_LIMIT
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "backend", "examples")
+JIRA_COLUMNS = pd.read_excel(os.path.join(EXAMPLES, "jira_testcase_eg.xlsx")).columns.tolist()
+
+
+def jira_rows(n):
+    return [{"summary": f"Case {i:04d}", "description": "audit trail" if i % 10 == 0 else "login",
+             "customfield_requirement": f"REQ-{i % 7}", "steps": "Step 1", "actions": "do it",
+             "expectedResults": "ok", "acceptanceCriteria": ""} for i in range(n)]
+
+
+@pytest.fixture(params=["parquet", "jsonl"])
+def results(request, tmp_path, monkeypatch):
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+        monkeypatch.setattr(exporters, "EXPORT_BATCH_ROWS", 64)  # several row groups
+    path = str(tmp_path / f"results.{request.param}")
+    exporters.write_export(path, request.param, JIRA_COLUMNS, jira_rows(300))
+    return path
+
+
+def test_pages_and_projects_a_shipped_format(results):
+    page = query_results(results, offset=120, limit=30, columns=["Summary", "customfield_requirement"])
+    assert page["total"] == 300 and page["columns"] == ["summary", "customfield_requirement"]
+    assert [r["summary"] for r in page["rows"]] == [f"Case {i:04d}" for i in range(120, 150)]
+    assert query_results(results, offset=290, limit=30)["rows"][-1]["summary"] == "Case 0299"
+    assert query_results(results, limit=10_000)["limit"] == RESULTS_MAX_LIMIT
+
+
+def test_text_filter_and_sort(results):
+    page = query_results(results, limit=5, text="AUDIT", sort="summary", descending=True)
+    assert page["total"] == 30
+    assert [r["summary"] for r in page["rows"]] == ["Case 0290", "Case 0280", "Case 0270", "Case 0260", "Case 0250"]
+    page = query_results(results, offset=30, limit=1, sort="customfield_requirement")
+    assert page["rows"][0]["customfield_requirement"] == "REQ-0" and page["total"] == 300
+
+
+def test_unknown_column_is_rejected(results):
+    with pytest.raises(ValueError, match="Unknown column"):
+        query_results(results, sort="Priority")
+
+
+def test_priority_column_sorts_by_rank(tmp_path):
+    path = str(tmp_path / "results.jsonl")
+    rows = [{"TestCaseID": str(i), "Priority": p} for i, p in enumerate(["Low", "High", "Medium", "Critical"])]
+    exporters.write_export(path, "jsonl", ["TestCaseID", "Priority"], rows)
+    assert [r["Priority"] for r in query_results(path, sort="priority")["rows"]] == ["Critical", "High", "Medium", "Low"]
@@ -0,0 +1,105 @@
+# tests/test_salvage.py
+import json
+import pytest
+from stream_parser import salvage_json_array
+
+TOPICS = ["lockout", "audit trail", "consent", "export", "allergy alert", "discharge", "billing code",
+          "lab result", "appointment", "prescription", "vital signs", "referral", "imaging"]
+
+
+def cases(start, n):
+    """Cases in the Jira example columns."""
+    return [{"summary": f"Verify {TOPICS[i % len(TOPICS)]} handling variant {i}",
+             "expectedResults": f"{TOPICS[i % len(TOPICS)]} behaves as specified"} for i in range(start, start + n)]
+
+
+def truncated(objects, cut=25):
+    text = json.dumps(objects)
+    return text[:len(text) - cut]
+
+
+def test_salvage_recovers_complete_objects_of_a_cut_off_array():
+    objects, info = salvage_json_array("```json\n" + truncated(cases(0, 4)))
+    assert objects == cases(0, 3)
+    assert info["complete"] is False and info["recovered"] == 3 and info["truncated_chars"] > 0
+
+
+def test_salvage_accepts_prose_and_bare_objects():
+    objects, info = salvage_json_array('Here you go: {"a": 1}, {"b": 2,}, {"c": oops}')
+    assert objects == [{"a": 1}, {"b": 2}]
+    assert (info["repaired"], info["dropped"]) == (1, 1)
+    assert salvage_json_array("no json here") == ([], {"complete": False, "recovered": 0, "repaired": 0,
+                                                        "dropped": 0, "truncated_chars": 0})
+
+
+def test_needs_continuation_only_for_short_damaged_output(monkeypatch):
+    from generator import GeneratorService
+    service = GeneratorService()
+    assert service.needs_continuation(None, 3) == 0
+    assert service.needs_continuation({"complete": True, "dropped": 0}, 3) == 0
+    assert service.needs_continuation({"complete": True, "dropped": 1}, 3) == 7
+    assert service.needs_continuation({"complete": False, "dropped": 0}, 12) == 0
+    monkeypatch.setattr("generator.GEN_CONTINUE_ON_TRUNCATION", False)
+    assert service.needs_continuation({"complete": False, "dropped": 0}, 3) == 0
+
+
+def test_parse_with_salvage_raises_only_when_nothing_is_recovered():
+    from generator import GeneratorService
+    service = GeneratorService()
+    parsed, _, info = service.parse_with_salvage("```json\n" + json.dumps(cases(0, 2)) + "\n```")
+    assert len(parsed) == 2 and info is None
+    with pytest.raises(RuntimeError):
+        service.parse_with_salvage('[{"summary": "cut')
+
+
+def test_truncated_generation_asks_only_for_the_missing_cases(monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    prompts = []
+
+    def scripted(prompt, *args, **kwargs):
+        prompts.append(prompt)
+        return truncated(cases(0, 4)) if len(prompts) == 1 else json.dumps(cases(3, 7))
+
+    monkeypatch.setattr(generator, "generate_with_gemini", scripted)
+    report = {}
+    normalized, _, _, _ = generator.GeneratorService().generate_full_pipeline(
+        typed_requirements=["Patient portal requirements"], alm_tool="jira", sharded=False, use_cache=False, report=report)
+    assert len(prompts) == 2
+    assert "generate 7 unique test cases" in prompts[1] and "do not repeat them" in prompts[1]
+    assert "lockout handling variant 0" in prompts[1]
+    salvage = report["salvage"]["generation"]
+    assert salvage["recovered"] == 3 and salvage["continuation"] == {"requested": 7, "recovered": 7, "complete": True}
+    assert len(normalized) == 10
+
+
+def test_streamed_continuation_cases_carry_their_final_ids(monkeypatch):
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=3)
+    import generator
+    import reviewer
+    def numbered(start, n):
+        """cases() in the fallback columns, numbered from TC001 as models do, continuation or not."""
+        return [{"TestCaseID": f"TC{i:03d}", "Description": c["summary"], "ExpectedResult": c["expectedResults"]}
+                for i, c in enumerate(cases(start, n), start=1)]
+    text = truncated(numbered(0, 4))
+    monkeypatch.setattr(generator, "stream_with_gemini", lambda *a, **k: iter([text[:40], text[40:]]))
+    monkeypatch.setattr(generator, "generate_with_gemini", lambda *a, **k: json.dumps(numbered(4, 2)))
+    monkeypatch.setattr(reviewer, "generate_with_gemini", lambda *a, **k: (_ for _ in ()).throw(RuntimeError("off")))
+
+    service = generator.GeneratorService()
+    monkeypatch.setattr(service, "needs_continuation", lambda salvage, n: 2)
+    monkeypatch.setattr(service, "load_format", lambda *a, **k: ("", service.columns))  # has a TestCaseID column
+    shown, result = [], None
+    for event, data in service.stream_full_pipeline(typed_requirements=["Patient portal"], alm_tool="jira",
+                                                    use_cache=False):
+        if event == "testcase":
+            shown.append(dict(data))
+        elif event == "result":
+            result = data
+    normalized, reviewed, columns, _ = result
+    assert "TestCaseID" in columns
+    assert [c["TestCaseID"] for c in shown] == ["TC001", "TC002", "TC003", "TC004", "TC005"]
+    assert shown == normalized
+    assert reviewed["TestCaseID"].tolist() == [c["TestCaseID"] for c in shown]
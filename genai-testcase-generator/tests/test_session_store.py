@@ -0,0 +1,69 @@
+# tests/test_session_store.py
+import threading
+import pytest
+from session_store import MemorySessionStore, SQLiteSessionStore, create_session_store
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    evicted = []
+
+    def make(**kwargs):
+        kwargs.setdefault("on_evict", evicted.append)
+        if request.param == "memory":
+            return MemorySessionStore(**kwargs)
+        return SQLiteSessionStore(str(tmp_path / "sessions.db"), **kwargs)
+
+    make.evicted = evicted
+    return make
+
+
+def test_put_get_delete(make_store):
+    store = make_store()
+    store.put("s1", {"out_dir": "/x", "columns": ["a"]})
+    assert store.get("s1") == {"out_dir": "/x", "columns": ["a"]}
+    store.delete("s1")
+    assert store.get("s1") is None and len(store) == 0
+    assert make_store.evicted == [{"out_dir": "/x", "columns": ["a"]}]
+
+
+def test_expired_sessions_are_evicted(make_store):
+    store = make_store(ttl_seconds=-1)
+    store.put("s1", {"n": 1})
+    assert store.get("s1") is None
+    assert make_store.evicted == [{"n": 1}]
+
+
+def test_oldest_sessions_go_over_max_entries(make_store):
+    store = make_store(max_entries=2)
+    for n in range(4):
+        store.put(f"s{n}", {"n": n})
+    assert len(store) == 2 and store.get("s0") is None and store.get("s3") == {"n": 3}
+    assert sorted(s["n"] for s in make_store.evicted) == [0, 1]
+
+
+def test_sqlite_store_is_shared_and_evicts_once(tmp_path):
+    path = str(tmp_path / "sessions.db")
+    evicted = []
+    workers = [SQLiteSessionStore(path, ttl_seconds=60, on_evict=evicted.append) for _ in range(4)]
+    workers[0].put("s1", {"n": 1})
+    assert workers[3].get("s1") == {"n": 1}
+
+    workers[1].put("s2", {"n": 2})
+    for w in workers:
+        w.max_entries = 0  # everything is now over the limit; all workers sweep at once
+    threads = [threading.Thread(target=w.sweep) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(s["n"] for s in evicted) == [1, 2]
+
+
+def test_tables_are_independent(tmp_path):
+    sessions = create_session_store(str(tmp_path), kind="sqlite")
+    jobs = create_session_store(str(tmp_path), kind="sqlite", table="jobs", on_evict=None)
+    jobs.put("j1", {"state": "queued"})
+    assert len(sessions) == 0 and sessions.get("j1") is None and jobs.get("j1") == {"state": "queued"}
+    with pytest.raises(ValueError):
+        create_session_store(str(tmp_path), kind="redis")
@@ -0,0 +1,26 @@
+# tests/test_startup.py
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+HEAVY = ("vertexai", "pandas", "faiss", "PyPDF2", "docx")
+
+CHILD = """
+import sys, json
+sys.path.insert(0, {backend!r})
+import backend_api
+loaded = [m for m in {heavy!r} if m in sys.modules]
+first, second = backend_api.startup(warm=False), backend_api.startup(warm=False)
+print(json.dumps({{"loaded": loaded, "startup": [first, second]}}))
+"""
+
+
+def test_import_is_light_and_startup_runs_once(tmp_path):
+    env = dict(os.environ, TEMP_FOLDER=str(tmp_path / "uploads"), SESSION_STORE="memory")
+    code = CHILD.format(backend=os.path.join(ROOT, "backend"), heavy=HEAVY)
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, timeout=120)
+    assert out.returncode == 0, out.stderr
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    assert result == {"loaded": [], "startup": [True, False]}
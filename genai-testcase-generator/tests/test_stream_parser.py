@@ -0,0 +1,38 @@
+# tests/test_stream_parser.py
+import json
+from stream_parser import JsonArrayStreamParser, iter_json_objects, salvage_json_array
+
+CASES = [{"id": "TC001", "steps": "Open {form} [A]", "note": "say \"hi\" \\ bye"},
+         {"id": "TC002", "nested": {"a": [1, {"b": 2}]}}]
+
+
+def test_objects_complete_as_their_closing_brace_arrives():
+    text = "```json\n" + json.dumps(CASES) + "\n```"
+    parser = JsonArrayStreamParser()
+    got, seen_at = [], []
+    for ch in text:
+        got.extend(parser.feed(ch))
+        seen_at.append(len(got))
+    first_close = len("```json\n[") + len(json.dumps(CASES[0])) - 1  # the first object's closing brace
+    assert seen_at.index(1) == first_close
+    assert got == CASES and parser.finished
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = json.dumps(CASES)
+    for size in (1, 3, 7, len(text)):
+        chunks = [text[i:i + size] for i in range(0, len(text), size)]
+        assert list(iter_json_objects(chunks)) == CASES
+
+
+def test_trailing_commas_are_repaired_and_broken_objects_reported():
+    parser = JsonArrayStreamParser()
+    objects = parser.feed('[{"a": 1,}, {"b": tru}, {"c": [1, 2,]}]')
+    assert objects == [{"a": 1}, {"c": [1, 2]}]
+    assert parser.repaired == 2 and parser.errors == ['{"b": tru}']
+
+
+def test_text_after_the_array_is_ignored():
+    parser = JsonArrayStreamParser()
+    assert parser.feed('[{"a": 1}] and then {"b": 2}') == [{"a": 1}]
+    assert parser.feed('{"c": 3}') == []
@@ -0,0 +1,67 @@
+# tests/test_streaming_api.py
+import json
+import pytest
+
+
+@pytest.fixture(scope="module")
+def client():
+    from fake_vertex import install_fake_vertex
+    install_fake_vertex(num_cases=4)
+    import backend_api
+    backend_api.startup(warm=False)
+    return backend_api.app.test_client()
+
+
+def events(body):
+    out = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def test_cases_are_streamed_before_review_and_done(client):
+    resp = client.post("/generate_testcases/stream", json={
+        "username": "tester", "typed_requirements": ["Login locks after three failed attempts"],
+        "alm_tool": "jira", "use_cache": False})
+    assert resp.status_code == 200 and resp.mimetype == "text/event-stream"
+    stream = events(resp.get_data(as_text=True))
+    names = [name for name, _ in stream]
+    assert names[0] == "columns" and names[-1] == "done"
+    cases = [data for name, data in stream if name == "testcase"]
+    assert len(cases) == 4 and [c["index"] for c in cases] == [1, 2, 3, 4]
+    assert names.index("generated") > names.index("testcase") and names.index("reviewed") > names.index("generated")
+    done = stream[-1][1]
+    assert done["session_id"] and not any(k.startswith("file_path_") for k in done)
+
+
+def test_resubmission_streams_reused_cases_without_generating(client):
+    payload = {"username": "tester", "inputs": {"typed_requirements": ["Audit trail records every chart access"]},
+               "alm_tool": "jira", "use_cache": False}
+    first = events(client.post("/generate_testcases/stream", json=payload).get_data(as_text=True))
+    done = first[-1][1]
+    again = events(client.post("/generate_testcases/stream",
+                               json=dict(payload, previous_session_id=done["session_id"])).get_data(as_text=True))
+    names = [name for name, _ in again]
+    assert names == ["columns", "reused", "generated", "reviewed", "done"]
+    assert again[1][1]["count"] == done["count"] and again[-1][1]["incremental"]["reused"] == 1
+
+
+def test_reuse_first_env_default_applies_to_the_stream(client, tmp_path, monkeypatch):
+    import backend_api
+    import generator
+    from case_library import CaseLibrary
+    library = CaseLibrary(library_dir=str(tmp_path / "library"), uploads_dir=str(tmp_path / "uploads"),
+                          cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(backend_api, "get_case_library", lambda: library)
+    monkeypatch.setattr(generator, "get_case_library", lambda: library)
+    monkeypatch.setattr(generator, "CASE_LIBRARY_REUSE_FIRST", True)  # as CASE_LIBRARY_REUSE_FIRST=1 sets it
+    payload = {"username": "tester", "inputs": {"typed_requirements": ["Discharge summary is signed by the physician"]},
+               "alm_tool": "jira", "use_cache": False}
+
+    first = events(client.post("/generate_testcases/stream", json=payload).get_data(as_text=True))
+    assert "testcase" in [name for name, _ in first]  # empty library: generated, then indexed
+    again = events(client.post("/generate_testcases/stream", json=payload).get_data(as_text=True))
+    assert [name for name, _ in again] == ["columns", "reused", "generated", "reviewed", "done"]
+    assert again[1][1]["count"] == first[-1][1]["count"]
+    assert again[-1][1]["library"]["reused"] == 1
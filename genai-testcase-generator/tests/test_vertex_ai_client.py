@@ -0,0 +1,123 @@
+# tests/test_vertex_ai_client.py
+import pytest
+from rate_limit import CircuitOpenError
+from vertex_ai_client import VertexClientManager
+
+
+class Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class ScriptedModel:
+    """generate_content answers from a queue of outcomes: a text, a list of chunks, or an exception."""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    def generate_content(self, prompt, stream=False):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if not stream:
+            return Chunk(outcome)
+        return self._stream(outcome)
+
+    def _stream(self, chunks):
+        for c in chunks:
+            if isinstance(c, BaseException):
+                raise c
+            yield Chunk(c)
+
+
+def manager(model, **kwargs):
+    kwargs.setdefault("max_retries", 0)
+    return VertexClientManager(model_factory=lambda name: model, embedding_factory=lambda name: None,
+                               rpm=1_000_000, tpm=1_000_000_000, sleep=lambda s: None, **kwargs)
+
+
+def open_breaker(client):
+    """Trip the breaker with one failed call; reset_seconds=0 makes the next call the half-open trial."""
+    with pytest.raises(ConnectionError):
+        client.generate("p")
+    assert client.breaker.state == "open"
+
+
+def test_mid_stream_error_settles_half_open_trial():
+    model = ScriptedModel(ConnectionError("down"), ["[{", ConnectionError("reset")], "ok")
+    client = manager(model, breaker_failures=1, breaker_reset_seconds=0)
+    open_breaker(client)
+
+    stream = client.stream("p")
+    assert next(stream) == "[{"
+    with pytest.raises(ConnectionError):
+        next(stream)
+    assert client.breaker.state == "open"
+    assert client.stats()["failures"] == 2
+
+    assert client.generate("p") == "ok"  # the next call is a fresh trial, not rejected
+    assert client.breaker.state == "closed"
+
+
+def test_mid_stream_error_counts_towards_tripping():
+    model = ScriptedModel(["a", ConnectionError("reset")], ["b", ConnectionError("reset")])
+    client = manager(model, breaker_failures=2, breaker_reset_seconds=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            list(client.stream("p"))
+    assert client.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.generate("p")
+
+
+def test_abandoned_stream_settles_half_open_trial():
+    model = ScriptedModel(ConnectionError("down"), ["[{", "}]"], "ok")
+    client = manager(model, breaker_failures=1, breaker_reset_seconds=0)
+    open_breaker(client)
+
+    stream = client.stream("p")
+    assert next(stream) == "[{"
+    stream.close()  # what an SSE client disconnect does to the generator
+    assert client.stats()["in_flight"] == 0
+    assert client.breaker.state == "closed"
+    assert client.generate("p") == "ok"
+
+
+def test_interrupted_call_releases_half_open_trial():
+    model = ScriptedModel(ConnectionError("down"), KeyboardInterrupt(), "ok")
+    client = manager(model, breaker_failures=1, breaker_reset_seconds=0)
+    open_breaker(client)
+    with pytest.raises(KeyboardInterrupt):
+        client.generate("p")
+    assert client.generate("p") == "ok"
+
+
+def test_error_before_first_chunk_is_retried():
+    model = ScriptedModel(ConnectionError("down"), ["[]"])
+    client = manager(model, max_retries=1)
+    assert list(client.stream("p")) == ["[]"]
+    assert client.stats()["retries"] == 1
+
+
+class Throttled(Exception):
+    code = 429
+
+
+class BadRequest(Exception):
+    code = 400
+
+
+def test_throttling_is_retried_and_halves_concurrency():
+    model = ScriptedModel(Throttled("slow down"), "ok")
+    client = manager(model, max_retries=2, max_concurrency=8)
+    assert client.generate("p") == "ok"
+    stats = client.stats()
+    assert (stats["throttled"], stats["retries"], stats["attempts"]) == (1, 1, 2)
+    assert stats["concurrency_limit"] == 4 and client.breaker.state == "closed"
+
+
+def test_bad_request_is_not_retried_and_keeps_breaker_closed():
+    client = manager(ScriptedModel(BadRequest("invalid"), "unused"), max_retries=3, breaker_failures=1)
+    with pytest.raises(BadRequest):
+        client.generate("p")
+    assert client.stats()["retries"] == 0 and client.breaker.state == "closed"